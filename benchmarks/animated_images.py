@@ -0,0 +1,101 @@
+"""
+Compare animated GIF/APNG/WebP handling on synthetic multi-frame inputs.
+
+For each format, times the first-frame path (what still images get), the frame-aware path of
+ImageCompressor and, for GIF, a frame-aware resize that lets Pillow build a palette per frame
+instead of reusing one.
+
+Usage:
+    python -m benchmarks.animated_images [--size 640x360] [--frames 30] [--repeat 3] [--json report.json]
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from unittest import mock
+from PIL import Image, ImageDraw, ImageSequence
+from benchmarks.corpus import make_photo
+from benchmarks.harness import build_report, write_report
+from utils.images.image_compressor import ImageCompressor
+
+FORMATS = [".gif", ".png", ".webp"]
+
+
+def make_animation(path, width, height, frame_count):
+    background = make_photo(width, height).convert("RGBA")
+    frames = []
+    for index in range(frame_count):
+        frame = background.copy()
+        x = index * (width - height // 3) // max(1, frame_count - 1)
+        ImageDraw.Draw(frame).ellipse((x, height // 3, x + height // 3, 2 * height // 3), fill=(255, 200, 0, 255))
+        frames.append(frame)
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=40, loop=0)
+
+
+def per_frame_palette(input_file, output_file, max_long_edge=None):
+    """Frame-aware resize where Pillow quantizes every RGBA frame to its own palette."""
+    with Image.open(input_file) as img:
+        new_size = ImageCompressor.get_target_size(img.width, img.height, max_long_edge)
+        frames = [frame.convert("RGBA").resize(new_size, Image.LANCZOS) for frame in ImageSequence.Iterator(img)]
+    frames[0].save(output_file, save_all=True, append_images=frames[1:], duration=40, loop=0, optimize=True)
+
+
+def first_frame(input_file, output_file):
+    with mock.patch.object(ImageCompressor, "ANIMATED_IMAGE_POLICY", "first_frame"):
+        ImageCompressor.compress_image(input_file, output_file)
+
+
+def timed(function, input_file, output_file, repeat):
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(input_file, output_file)
+        seconds.append(time.perf_counter() - start)
+    with Image.open(output_file) as img:
+        frames = getattr(img, "n_frames", 1)
+    return min(seconds), os.path.getsize(output_file), frames
+
+
+def run(width, height, frame_count, repeat):
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for extension in FORMATS:
+            input_file = os.path.join(directory, f"input{extension}")
+            make_animation(input_file, width, height, frame_count)
+            cases = [("first frame", first_frame), ("frames", ImageCompressor.compress_image)]
+            if extension == ".gif":
+                cases.append(("frames, palette per frame", per_frame_palette))
+            for name, function in cases:
+                output_file = os.path.join(directory, f"output{extension}")
+                seconds, output_bytes, frames = timed(function, input_file, output_file, repeat)
+                results.append({
+                    "name": f"{extension[1:]} {name}",
+                    "input_bytes": os.path.getsize(input_file),
+                    "output_bytes": output_bytes,
+                    "frames": frames,
+                    "seconds": round(seconds, 4),
+                })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", default="640x360")
+    parser.add_argument("--frames", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.lower().split("x"))
+
+    ImageCompressor.LOGGER = logging.getLogger("benchmarks")
+    results = run(width, height, args.frames, args.repeat)
+    print(f"{'case':<32}{'frames':>8}{'bytes':>12}{'seconds':>10}")
+    for row in results:
+        print(f"{row['name']:<32}{row['frames']:>8}{row['output_bytes']:>12}{row['seconds']:>10.3f}")
+    if args.json_path:
+        write_report(args.json_path, build_report(results, size=args.size, frames=args.frames))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Compare batched NumPy box downsampling with per-image resizes on same-size synthetic photos.
+
+Times decoding and halving every image with LANCZOS one at a time (the default path), with
+Pillow's box reduce one at a time, and in batches through ImageCompressor.resize_batch, then
+whole directory runs with and without ImageCompressor.BATCH_RESIZE.
+
+Usage:
+    python -m benchmarks.batch_resize [--files 64] [--size 1920x1080] [--repeat 3] [--json report.json]
+"""
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+import time
+from unittest import mock
+from PIL import Image
+from benchmarks.corpus import make_photo
+from benchmarks.harness import build_report, write_report
+from utils.images.config import BATCH_SIZE
+from utils.images.image_compressor import ImageCompressor
+
+
+def write_images(directory, count, width, height):
+    photo = make_photo(width, height)
+    paths = []
+    for index in range(count):
+        path = os.path.join(directory, f"photo_{index:05d}.jpg")
+        photo.save(path, quality=90)
+        paths.append(path)
+    return paths
+
+
+def lanczos(paths):
+    for path in paths:
+        with Image.open(path) as img:
+            img.resize(ImageCompressor.get_target_size(img.width, img.height), Image.LANCZOS)
+
+
+def reduce(paths):
+    for path in paths:
+        with Image.open(path) as img:
+            img.reduce(2)
+
+
+def batched(paths):
+    for start in range(0, len(paths), BATCH_SIZE):
+        ImageCompressor.resize_batch(paths[start:start + BATCH_SIZE])
+
+
+def directory_run(input_directory, batch):
+    output_directory = tempfile.mkdtemp()
+    try:
+        with mock.patch.object(ImageCompressor, "BATCH_RESIZE", batch):
+            ImageCompressor.compress_images_in_directory(input_directory, output_directory)
+    finally:
+        shutil.rmtree(output_directory)
+
+
+def timed(function, repeat):
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        seconds.append(time.perf_counter() - start)
+    return min(seconds)
+
+
+def run(count, width, height, repeat):
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_images(directory, count, width, height)
+        cases = [
+            ("decode + LANCZOS per image", lambda: lanczos(paths)),
+            ("decode + box reduce per image", lambda: reduce(paths)),
+            ("decode + NumPy box batch", lambda: batched(paths)),
+            ("directory run", lambda: directory_run(directory, False)),
+            ("directory run, batch resize", lambda: directory_run(directory, True)),
+        ]
+        results = []
+        for name, function in cases:
+            seconds = timed(function, repeat)
+            results.append({"name": name, "seconds": round(seconds, 4), "images_per_second": round(count / seconds, 1)})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=64)
+    parser.add_argument("--size", default="1920x1080")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.lower().split("x"))
+
+    ImageCompressor.LOGGER = logging.getLogger("benchmarks")
+    results = run(args.files, width, height, args.repeat)
+    print(f"{'case':<34}{'seconds':>10}{'images/s':>10}")
+    for row in results:
+        print(f"{row['name']:<34}{row['seconds']:>10.3f}{row['images_per_second']:>10.1f}")
+    if args.json_path:
+        write_report(args.json_path, build_report(results, files=args.files, size=args.size, batch_size=BATCH_SIZE))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Deterministic synthetic media for benchmarks.
+
+Videos are rendered by ffmpeg from the lavfi testsrc2 and sine sources, images are drawn
+procedurally with Pillow from a fixed seed, so the same spec always yields the same corpus.
+"""
+import os
+import random
+import shutil
+import subprocess
+import numpy as np
+from PIL import Image, ImageDraw
+
+# name: (video specs as (width, height, seconds, fps), image specs as (width, height, extension, count))
+CORPUS_SCALES = {
+    "small": (
+        [(640, 360, 2, 30), (1280, 720, 2, 25)],
+        [(1280, 720, ".jpg", 8), (1280, 720, ".png", 4), (1280, 720, ".tiff", 2)],
+    ),
+    "medium": (
+        [(1280, 720, 5, 30), (1920, 1080, 5, 60), (1920, 1080, 10, 24)],
+        [(1920, 1080, ".jpg", 40), (1920, 1080, ".png", 20), (1920, 1080, ".tiff", 10)],
+    ),
+    "large": (
+        [(1920, 1080, 20, 30), (3840, 2160, 10, 30), (3840, 2160, 10, 60)],
+        [(4000, 3000, ".jpg", 100), (2560, 1440, ".png", 50), (4000, 3000, ".tiff", 20)],
+    ),
+}
+
+
+def make_screenshot(width, height, seed=0):
+    """Flat UI-like blocks with text lines, the kind of content PNG screenshots hold."""
+    rng = random.Random(seed)
+    img = Image.new("RGB", (width, height), (240, 240, 240))
+    draw = ImageDraw.Draw(img)
+    for _ in range(40):
+        x0, y0 = rng.randrange(width), rng.randrange(height)
+        x1, y1 = min(width, x0 + rng.randrange(40, 400)), min(height, y0 + rng.randrange(20, 200))
+        draw.rectangle((x0, y0, x1, y1), fill=tuple(rng.randrange(256) for _ in range(3)))
+    for y in range(0, height, 14):
+        line = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz0123456789 ") for _ in range(width // 6))
+        draw.text((4, y), line, fill=(30, 30, 30))
+    return img
+
+
+def make_photo(width, height, seed=0):
+    """Smooth gradients with sensor-like noise, the kind of content camera images hold."""
+    gradient = Image.linear_gradient("L").resize((width, height))
+    rng = np.random.default_rng(seed)
+    noise = Image.fromarray(np.clip(rng.normal(128, 24, (height, width)), 0, 255).astype(np.uint8))
+    return Image.merge("RGB", (gradient, noise, gradient.rotate(90 + seed).resize((width, height))))
+
+
+def generate_image(path, width, height, seed):
+    """Write one synthetic image, screenshots for PNG and photos for everything else."""
+    extension = os.path.splitext(path)[1].lower()
+    img = make_screenshot(width, height, seed) if extension == ".png" else make_photo(width, height, seed)
+    if extension in (".jpg", ".jpeg"):
+        img.save(path, quality=92)
+    else:
+        img.save(path)
+
+
+def generate_video(path, width, height, seconds, fps):
+    """Render a testsrc2 video with a sine audio track through ffmpeg."""
+    cmd = [
+        "ffmpeg",
+        "-y",
+        "-f", "lavfi", "-i", f"testsrc2=size={width}x{height}:rate={fps}:duration={seconds}",
+        "-f", "lavfi", "-i", f"sine=frequency=440:sample_rate=48000:duration={seconds}",
+        "-c:v", "libx264", "-preset", "ultrafast", "-crf", "12", "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-b:a", "192k",
+        "-shortest",
+        "-loglevel", "error",
+        path,
+    ]
+    subprocess.run(cmd, capture_output=True, check=True)
+
+
+def generate_corpus(directory, scale="small", include_video=True, include_image=True):
+    """
+    Generate a corpus into directory and return the list of created files.
+
+    Existing files are reused so a corpus is only rendered once per cache directory.
+    Video generation is skipped when ffmpeg is not on the PATH.
+    """
+    video_specs, image_specs = CORPUS_SCALES[scale]
+    created = []
+    if include_video and shutil.which("ffmpeg") is None:
+        print("ffmpeg not found, skipping synthetic videos")
+        include_video = False
+
+    if include_video:
+        video_directory = os.path.join(directory, "videos")
+        os.makedirs(video_directory, exist_ok=True)
+        for width, height, seconds, fps in video_specs:
+            path = os.path.join(video_directory, f"testsrc_{width}x{height}_{seconds}s_{fps}fps.mp4")
+            if not os.path.exists(path):
+                generate_video(path, width, height, seconds, fps)
+            created.append(path)
+
+    if include_image:
+        image_directory = os.path.join(directory, "images")
+        os.makedirs(image_directory, exist_ok=True)
+        for width, height, extension, count in image_specs:
+            for index in range(count):
+                path = os.path.join(image_directory, f"synthetic_{width}x{height}_{index:04d}{extension}")
+                if not os.path.exists(path):
+                    generate_image(path, width, height, seed=index)
+                created.append(path)
+    return created
@@ -0,0 +1,75 @@
+"""
+Compare concurrent encodes with ffmpeg's default threading against a partitioned CPU budget.
+
+"oversubscribed" runs N encodes that each start a thread per core; "partitioned" gives each
+encode 1/N of the cores through -threads, and "pinned" additionally restricts each to its own
+CPU set.
+
+Usage:
+    python -m benchmarks.encode_threads [--workers 2] [--size 1280x720] [--seconds 10] [--json report.json]
+"""
+import argparse
+import logging
+import os
+import shutil
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from benchmarks.corpus import generate_video
+from benchmarks.harness import build_report, measure, print_results, write_report
+from utils.concurrency.resources import CpuBudget
+from utils.logging.logging import setup_logging
+from utils.video.video_compressor import VideoCompressor
+
+MODES = {
+    "oversubscribed": {"partition_threads": False, "pin_cpus": False},
+    "partitioned": {"partition_threads": True, "pin_cpus": False},
+    "pinned": {"partition_threads": True, "pin_cpus": True},
+}
+
+
+def encode_concurrently(files, work_directory, workers, budget):
+    def encode(index_and_file):
+        index, input_file = index_and_file
+        output_file = os.path.join(work_directory, f"output_{index}.mp4")
+        with budget.allocate() as resources:
+            VideoCompressor.compress_video_cpu(input_file, output_file, "1000K", resources=resources)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(encode, enumerate(files)))
+
+
+def run(workers, width, height, seconds, work_directory):
+    setup_logging(work_directory)
+    VideoCompressor.LOGGER = logging.getLogger(VideoCompressor.__module__)
+    source = os.path.join(work_directory, f"source_{width}x{height}_{seconds}s.mp4")
+    generate_video(source, width, height, seconds, 30)
+    files = [source] * workers
+    results = []
+    for mode, options in MODES.items():
+        budget = CpuBudget(workers, **options)
+        results.append(measure(f"{mode} x{workers}", lambda: encode_concurrently(files, work_directory, workers, budget), files))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--size", default="1280x720")
+    parser.add_argument("--seconds", type=int, default=10)
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.lower().split("x"))
+
+    if shutil.which("ffmpeg") is None:
+        print("ffmpeg not found, nothing to benchmark")
+        return
+
+    with tempfile.TemporaryDirectory() as work_directory:
+        results = run(args.workers, width, height, args.seconds, work_directory)
+    print_results(results)
+    if args.json_path:
+        write_report(args.json_path, build_report(results, workers=args.workers, size=args.size))
+
+
+if __name__ == "__main__":
+    main()
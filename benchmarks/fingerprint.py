@@ -0,0 +1,84 @@
+"""
+Measure fingerprint throughput in GB/s on a large local file.
+
+Compares a naive read()-and-hash loop with the buffered read and mmap paths of
+Fingerprint.hash_file for each available algorithm, and the sampled fingerprint. The file is
+written just before the runs, so results reflect a warm page cache unless --cold is used
+(which drops it first, Linux only and needs root).
+
+Usage:
+    python -m benchmarks.fingerprint [--size-mb 1024] [--directory DIR] [--cold] [--json report.json]
+"""
+import argparse
+import hashlib
+import os
+import subprocess
+import tempfile
+import time
+from benchmarks.harness import build_report, write_report
+from utils.fingerprint.fingerprint import Fingerprint, xxhash
+
+BLOCK_SIZE = 8 * 1024 * 1024
+
+
+def write_file(path, size_mb):
+    block = os.urandom(BLOCK_SIZE)
+    with open(path, "wb") as output:
+        for _ in range(size_mb * 1024 * 1024 // BLOCK_SIZE):
+            output.write(block)
+
+
+def naive_hash(path):
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as file:
+        while chunk := file.read(64 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def drop_caches():
+    subprocess.run(["sync"], check=False)
+    with open("/proc/sys/vm/drop_caches", "w") as drop:
+        drop.write("3\n")
+
+
+def timed(name, function, size_bytes, cold):
+    if cold:
+        drop_caches()
+    start = time.perf_counter()
+    function()
+    seconds = time.perf_counter() - start
+    return {"name": name, "seconds": round(seconds, 4), "gb_per_second": round(size_bytes / 1e9 / seconds, 3)}
+
+
+def run(path, cold):
+    size_bytes = os.path.getsize(path)
+    cases = [("naive read 64KiB blake2b", lambda: naive_hash(path))]
+    for algorithm in ["blake2b"] + (["xxh3_128"] if xxhash is not None else []):
+        cases.append((f"reads {algorithm}", lambda algorithm=algorithm: Fingerprint.hash_file(path, algorithm, use_mmap=False)))
+        cases.append((f"mmap {algorithm}", lambda algorithm=algorithm: Fingerprint.hash_file(path, algorithm, use_mmap=True)))
+    cases.append(("sampled", lambda: Fingerprint.sample_file(path)))
+    return [timed(name, function, size_bytes, cold) for name, function in cases]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size-mb", type=int, default=1024)
+    parser.add_argument("--directory", help="Write the test file here (defaults to the system temp directory)")
+    parser.add_argument("--cold", action="store_true")
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(dir=args.directory) as directory:
+        path = os.path.join(directory, "fingerprint.bin")
+        write_file(path, args.size_mb)
+        results = run(path, args.cold)
+    print(f"{'method':<28}{'seconds':>10}{'GB/s':>8}")
+    for row in results:
+        print(f"{row['name']:<28}{row['seconds']:>10.3f}{row['gb_per_second']:>8.2f}")
+    if args.json_path:
+        write_report(args.json_path, build_report(results, size_mb=args.size_mb, cold=args.cold))
+
+
+if __name__ == "__main__":
+    main()
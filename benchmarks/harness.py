@@ -0,0 +1,108 @@
+"""
+Measurement helpers shared by the benchmarks.
+
+A measurement records wall time, CPU time of this process and of finished child processes
+(ffmpeg/ffprobe), average CPU utilization across cores and peak RSS, and derives files/sec
+and MB/sec from the files handed to the measured stage.
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - Windows
+    resource = None
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process and of its waited-for children, in MB."""
+    if resource is None:  # pragma: no cover
+        return None, None
+    # ru_maxrss is reported in KB on Linux and in bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return round(own, 1), round(children, 1)
+
+
+def measure(name, stage, files):
+    """Run stage() once and return a measurement dict for the given input files."""
+    input_bytes = sum(os.path.getsize(f) for f in files)
+    times_before = os.times()
+    start = time.perf_counter()
+    stage()
+    wall = time.perf_counter() - start
+    times_after = os.times()
+
+    cpu_self = (times_after.user - times_before.user) + (times_after.system - times_before.system)
+    cpu_children = (times_after.children_user - times_before.children_user) + (
+        times_after.children_system - times_before.children_system
+    )
+    rss_self, rss_children = peak_rss_mb()
+    return {
+        "name": name,
+        "files": len(files),
+        "input_mb": round(input_bytes / 1024 ** 2, 3),
+        "wall_seconds": round(wall, 4),
+        "cpu_seconds": round(cpu_self + cpu_children, 4),
+        "cpu_utilization": round((cpu_self + cpu_children) / wall / (os.cpu_count() or 1), 4) if wall else 0,
+        "files_per_second": round(len(files) / wall, 3) if wall else 0,
+        "mb_per_second": round(input_bytes / 1024 ** 2 / wall, 3) if wall else 0,
+        "peak_rss_mb": rss_self,
+        "peak_child_rss_mb": rss_children,
+    }
+
+
+def git_revision():
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+        return result.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    """Describe the machine so reports from different hosts are not compared blindly."""
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def build_report(results, **extra):
+    return {"environment": environment(), **extra, "results": results}
+
+
+def write_report(path, report):
+    with open(path, "w", encoding="utf-8") as output:
+        json.dump(report, output, indent=2)
+
+
+def compare_reports(baseline, current, metric="wall_seconds"):
+    """Return (name, baseline, current, relative change) for results present in both reports."""
+    baseline_results = {result["name"]: result for result in baseline["results"]}
+    rows = []
+    for result in current["results"]:
+        previous = baseline_results.get(result["name"])
+        if previous and previous[metric]:
+            change = (result[metric] - previous[metric]) / previous[metric]
+            rows.append((result["name"], previous[metric], result[metric], round(change, 4)))
+    return rows
+
+
+def print_results(results):
+    print(f"{'stage':<32}{'files':>7}{'wall s':>10}{'files/s':>10}{'MB/s':>10}{'cpu %':>8}{'rss MB':>9}")
+    for result in results:
+        print(
+            f"{result['name']:<32}{result['files']:>7}{result['wall_seconds']:>10.3f}"
+            f"{result['files_per_second']:>10.2f}{result['mb_per_second']:>10.2f}"
+            f"{result['cpu_utilization']:>8.1%}{result['peak_rss_mb'] or 0:>9.1f}"
+        )
@@ -0,0 +1,69 @@
+"""
+Compare output formats and encoder effort levels on synthetic images.
+
+Usage:
+    python -m benchmarks.image_formats [--size 1920x1080] [--repeat 3] [--json report.json]
+"""
+import argparse
+import io
+import json
+import time
+from benchmarks.corpus import make_photo, make_screenshot
+from utils.images.config import ENCODER_EFFORT, OUTPUT_FORMATS
+from utils.images.image_compressor import ImageCompressor
+
+
+def encode(img, pil_format, options):
+    buffer = io.BytesIO()
+    start = time.perf_counter()
+    img.save(buffer, pil_format, **options)
+    return buffer.tell(), time.perf_counter() - start
+
+
+def run(width, height, repeat):
+    sources = {"screenshot": make_screenshot(width, height), "photo": make_photo(width, height)}
+    results = []
+    for source_name, img in sources.items():
+        baseline_bytes, _ = encode(img, "PNG", {"optimize": True})
+        for format_name in OUTPUT_FORMATS:
+            if not ImageCompressor.is_format_supported(format_name):
+                continue
+            for effort in ENCODER_EFFORT:
+                pil_format, options = ImageCompressor.get_save_options(format_name, effort)
+                prepared = ImageCompressor.prepare_for_format(img, pil_format)
+                timings = [encode(prepared, pil_format, options) for _ in range(repeat)]
+                output_bytes = timings[0][0]
+                results.append({
+                    "source": source_name,
+                    "format": format_name,
+                    "effort": effort,
+                    "input_bytes": baseline_bytes,
+                    "output_bytes": output_bytes,
+                    "saved_ratio": round(1 - output_bytes / baseline_bytes, 4),
+                    "encode_seconds": round(min(t for _, t in timings), 4),
+                })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", default="1920x1080")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.lower().split("x"))
+
+    results = run(width, height, args.repeat)
+    print(f"{'source':<12}{'format':<8}{'effort':<8}{'bytes':>12}{'saved':>8}{'seconds':>10}")
+    for row in results:
+        print(
+            f"{row['source']:<12}{row['format']:<8}{row['effort']:<8}"
+            f"{row['output_bytes']:>12}{row['saved_ratio']:>8.1%}{row['encode_seconds']:>10.3f}"
+        )
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as report:
+            json.dump(results, report, indent=2)
+
+
+if __name__ == "__main__":
+    main()
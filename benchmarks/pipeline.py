@@ -0,0 +1,113 @@
+"""
+Benchmark the compression pipeline on a deterministic synthetic corpus.
+
+Runs Handler.start_compression end to end and the individual compressor stages, and writes
+a JSON report that can be compared against a previous run to track regressions.
+
+Usage:
+    python -m benchmarks.pipeline [--scale small|medium|large] [--cache-dir DIR]
+                                  [--json report.json] [--compare baseline.json]
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import tempfile
+from benchmarks.corpus import CORPUS_SCALES, generate_corpus
+from benchmarks.harness import build_report, compare_reports, measure, print_results, write_report
+from utils.handler.handler import Handler
+from utils.images.config import IMAGE_FILETYPES
+from utils.images.image_compressor import ImageCompressor
+from utils.logging.logging import setup_logging
+from utils.video.config import VIDEO_FILETYPES
+from utils.video.video_compressor import VideoCompressor
+
+
+def split_corpus(files):
+    videos = [f for f in files if os.path.splitext(f)[1].lower() in VIDEO_FILETYPES]
+    images = [f for f in files if os.path.splitext(f)[1].lower() in IMAGE_FILETYPES]
+    return videos, images
+
+
+def stage_outputs(work_directory, stage, files):
+    output_directory = os.path.join(work_directory, f"stage_{stage}")
+    os.makedirs(output_directory, exist_ok=True)
+    return [os.path.join(output_directory, os.path.basename(f)) for f in files]
+
+
+def run_stages(corpus_directory, corpus_files, work_directory):
+    videos, images = split_corpus(corpus_files)
+    setup_logging(work_directory)
+    VideoCompressor.LOGGER = logging.getLogger(VideoCompressor.__module__)
+    ImageCompressor.LOGGER = logging.getLogger(ImageCompressor.__module__)
+    results = []
+
+    if videos:
+        VideoCompressor.PROBE_CACHE.clear()
+        results.append(measure("video.probe", lambda: [VideoCompressor.probe_video(f) for f in videos], videos))
+        video_codec = VideoCompressor.select_best_codec()
+        video_outputs = stage_outputs(work_directory, "video", videos)
+
+        def encode_videos():
+            for input_file, output_file in zip(videos, video_outputs):
+                bitrate = VideoCompressor.get_bitrate(input_file)
+                VideoCompressor.compress_video(input_file, output_file, bitrate, video_codec)
+
+        results.append(measure("video.encode", encode_videos, videos))
+
+    if images:
+        image_outputs = stage_outputs(work_directory, "image", images)
+        results.append(measure(
+            "image.compress",
+            lambda: [ImageCompressor.compress_image(i, o) for i, o in zip(images, image_outputs)],
+            images,
+        ))
+        results.append(measure(
+            "image.metadata",
+            lambda: [ImageCompressor.add_metadata(o) for o in image_outputs],
+            image_outputs,
+        ))
+    Handler.cleanup_logging()
+
+    # End to end on a fresh copy, since outputs are written inside the input tree
+    run_directory = os.path.join(work_directory, "end_to_end")
+    shutil.copytree(corpus_directory, run_directory)
+    VideoCompressor.PROBE_CACHE.clear()
+    results.append(measure(
+        "handler.start_compression",
+        lambda: Handler.start_compression(run_directory, bool(videos), bool(images), False),
+        videos + images,
+    ))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", choices=CORPUS_SCALES, default="small")
+    parser.add_argument("--cache-dir", help="Directory reused across runs to hold the generated corpus")
+    parser.add_argument("--json", dest="json_path", help="Write the report to this file")
+    parser.add_argument("--compare", help="Previous report to compare wall times against")
+    args = parser.parse_args()
+
+    cache_directory = args.cache_dir or os.path.join(tempfile.gettempdir(), "media_compressor_bench")
+    corpus_directory = os.path.join(cache_directory, args.scale)
+    os.makedirs(corpus_directory, exist_ok=True)
+    corpus_files = generate_corpus(corpus_directory, args.scale)
+
+    with tempfile.TemporaryDirectory() as work_directory:
+        results = run_stages(corpus_directory, corpus_files, work_directory)
+
+    print_results(results)
+    report = build_report(results, scale=args.scale)
+    if args.json_path:
+        write_report(args.json_path, report)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+        for name, before, after, change in compare_reports(baseline, report):
+            print(f"{name:<32}{before:>10.3f}{after:>10.3f}{change:>+10.1%}")
+
+
+if __name__ == "__main__":
+    main()
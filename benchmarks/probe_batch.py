@@ -0,0 +1,80 @@
+"""
+Measure probes/sec on a folder of many tiny clips.
+
+Compares one ffprobe per file in sequence (the pre-batching discovery), a concurrent ffprobe
+batch and, when the av package is installed, in-process PyAV probing. The clips are copies of
+one rendered clip, so generating 10k files costs a single encode.
+
+Usage:
+    python -m benchmarks.probe_batch [--files 10000] [--cache-dir DIR] [--json report.json]
+"""
+import argparse
+import os
+import shutil
+import tempfile
+from benchmarks.corpus import generate_video
+from benchmarks.harness import build_report, measure, print_results, write_report
+from utils.video.config import PROBE_BATCH_SIZE
+from utils.video.video_compressor import VideoCompressor, av
+
+
+def make_clips(directory, count):
+    source = os.path.join(directory, "source.mp4")
+    if not os.path.exists(source):
+        generate_video(source, 160, 90, 1, 10)
+    clips_directory = os.path.join(directory, "clips")
+    os.makedirs(clips_directory, exist_ok=True)
+    clips = []
+    for index in range(count):
+        path = os.path.join(clips_directory, f"clip_{index:05d}.mp4")
+        if not os.path.exists(path):
+            shutil.copyfile(source, path)
+        clips.append(path)
+    return clips
+
+
+def probe_sequentially(clips):
+    for clip in clips:
+        VideoCompressor.run_subprocess_with_flags(VideoCompressor.get_probe_command(clip), capture_output=True, text=True)
+
+
+def probe_in_batches(clips):
+    VideoCompressor.PROBE_CACHE.clear()
+    for start in range(0, len(clips), PROBE_BATCH_SIZE):
+        VideoCompressor.probe_videos(clips[start:start + PROBE_BATCH_SIZE])
+
+
+def run(clips):
+    results = []
+    sequential_clips = clips[:min(len(clips), 500)]
+    results.append(measure("ffprobe sequential", lambda: probe_sequentially(sequential_clips), sequential_clips))
+    backends = ["ffprobe"] + (["pyav"] if av is not None else [])
+    for backend in backends:
+        VideoCompressor.PROBE_BACKEND = backend
+        results.append(measure(f"{backend} batch", lambda: probe_in_batches(clips), clips))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=10000)
+    parser.add_argument("--cache-dir", help="Reuse generated clips between runs")
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args()
+
+    if shutil.which("ffmpeg") is None or shutil.which("ffprobe") is None:
+        print("ffmpeg/ffprobe not found, nothing to benchmark")
+        return
+
+    with tempfile.TemporaryDirectory() as temporary_directory:
+        directory = args.cache_dir or temporary_directory
+        clips = make_clips(directory, args.files)
+        results = run(clips)
+    print("files/s is probes per second; the sequential run probes at most 500 files")
+    print_results(results)
+    if args.json_path:
+        write_report(args.json_path, build_report(results, files=args.files))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import argparse
+import os
+import sys
+from threading import Thread
+from utils.handler.handler import Handler
+from utils.images.image_compressor import ImageCompressor
+from utils.progress.config import CLI_REFRESH_SECONDS, MAX_JOBS_SHOWN
+from utils.progress.progress import ProgressTracker
+from utils.storage.storage import Storage
+from utils.video.video_compressor import VideoCompressor
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="GEP Media Compressor")
+    parser.add_argument("input_path", help="Directory or single file to compress")
+    parser.add_argument("--no-video", action="store_true", help="Skip video compression")
+    parser.add_argument("--no-image", action="store_true", help="Skip image compression")
+    parser.add_argument("--no-convert", action="store_true", help="Skip converting incompatible video formats")
+    parser.add_argument("--output-root", default=Handler.OUTPUT_ROOT, help="Write the output folder here instead of inside the input")
+    parser.add_argument("--scratch-dir", default=Storage.SCRATCH_DIRECTORY, help="Write in-progress files here and move them on completion")
+    parser.add_argument("--max-long-edge", type=int, default=ImageCompressor.MAX_LONG_EDGE, help="Cap the long edge of images instead of halving them")
+    parser.add_argument("--passthrough", action="store_true", help="Link or copy every other file into the output for a complete mirror")
+    parser.add_argument("--adaptive", action="store_true", help="Adapt the number of concurrent encodes to live CPU/memory load")
+    parser.add_argument("--log-level", default=Handler.LOG_LEVEL, help="Log level for app.log (default: %(default)s)")
+    parser.add_argument("--json-logs", action="store_true", help="Also write JSON lines to app.jsonl")
+    return parser.parse_args(argv)
+
+
+def render(overall, stream=sys.stdout):
+    """Write the overall progress line followed by one line per in-flight job."""
+    progress_ratio, file_index, total_files = overall
+    lines = [f"[{progress_ratio * 100:5.1f}%] Processed: {file_index}/{total_files}"]
+    lines += ProgressTracker.format_lines(ProgressTracker.snapshot(), MAX_JOBS_SHOWN)
+    stream.write("\n".join(lines) + "\n\n")
+    stream.flush()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not os.path.exists(args.input_path):
+        print(f"Input path does not exist: {args.input_path}", file=sys.stderr)
+        return 1
+
+    Handler.OUTPUT_ROOT = args.output_root
+    Storage.SCRATCH_DIRECTORY = args.scratch_dir
+    ImageCompressor.MAX_LONG_EDGE = args.max_long_edge
+    Handler.PASSTHROUGH = args.passthrough or Handler.PASSTHROUGH
+    if args.adaptive:
+        VideoCompressor.ADAPTIVE_CONCURRENCY = ImageCompressor.ADAPTIVE_CONCURRENCY = True
+    Handler.LOG_LEVEL = args.log_level.upper()
+    Handler.JSON_LOGS = args.json_logs or Handler.JSON_LOGS
+
+    overall = [0.0, 0, 0]
+    result = {}
+
+    def update_progress(progress_ratio, current_file, file_index, total_files):
+        overall[:] = [progress_ratio, file_index, total_files]
+
+    def run():
+        try:
+            result["summary"] = Handler.start_compression(
+                input_directory=args.input_path,
+                process_video=not args.no_video,
+                process_image=not args.no_image,
+                convert_incompatible=not args.no_convert,
+                progress_callback=update_progress,
+            )
+        except RuntimeError as e:
+            result["error"] = str(e)
+
+    thread = Thread(target=run, daemon=True)
+    thread.start()
+    while thread.is_alive():
+        thread.join(CLI_REFRESH_SECONDS)
+        render(overall)
+
+    if "error" in result:
+        print(f"Error: {result['error']}", file=sys.stderr)
+        return 1
+    summary = result["summary"]
+    print(f"Output directory: {summary['output_directory']}")
+    for media_type, totals in summary["by_type"].items():
+        print(f"{media_type}: {totals['files']} files, {totals['input_bytes']} B -> {totals['output_bytes']} B, {totals['failed']} failed")
+    print(
+        f"Original size: {summary['input_bytes']} B, compressed size: {summary['output_bytes']} B, "
+        f"space saved: {round(summary['saved_ratio'] * 100)}%"
+    )
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,46 @@
+from unittest import mock
+from benchmarks.corpus import generate_corpus
+from benchmarks.harness import compare_reports, measure
+
+
+def test_generate_corpus_is_deterministic(tmp_path):
+    # Arrange
+    first_directory = tmp_path / "first"
+    second_directory = tmp_path / "second"
+
+    # Act
+    with mock.patch("benchmarks.corpus.CORPUS_SCALES", {"tiny": ([], [(32, 24, ".png", 2), (32, 24, ".jpg", 1)])}):
+        first = generate_corpus(str(first_directory), "tiny", include_video=False)
+        second = generate_corpus(str(second_directory), "tiny", include_video=False)
+
+    # Assert
+    assert len(first) == 3
+    for first_file, second_file in zip(first, second):
+        with open(first_file, "rb") as a, open(second_file, "rb") as b:
+            assert a.read() == b.read()
+
+def test_measure(tmp_path):
+    # Arrange
+    input_file = tmp_path / "input.bin"
+    input_file.write_bytes(b"x" * 1024)
+    stage = mock.Mock()
+
+    # Act
+    result = measure("stage", stage, [str(input_file)])
+
+    # Assert
+    stage.assert_called_once()
+    assert result["name"] == "stage"
+    assert result["files"] == 1
+    assert result["wall_seconds"] >= 0
+
+def test_compare_reports():
+    # Arrange
+    baseline = {"results": [{"name": "a", "wall_seconds": 2.0}, {"name": "b", "wall_seconds": 1.0}]}
+    current = {"results": [{"name": "a", "wall_seconds": 1.0}, {"name": "c", "wall_seconds": 1.0}]}
+
+    # Act
+    rows = compare_reports(baseline, current)
+
+    # Assert
+    assert rows == [("a", 2.0, 1.0, -0.5)]
@@ -0,0 +1,171 @@
+import threading
+from unittest import mock
+from utils.concurrency.controller import AdaptiveConcurrency, SystemLoad
+from utils.concurrency.resources import CpuBudget, get_command_prefix, has_process_settings
+
+
+def make_controller(**kwargs):
+    return AdaptiveConcurrency(**{"min_workers": 1, "max_workers": 4, "cpu_ceiling": 0.9, "memory_floor": 0.1, **kwargs})
+
+def test_grows_while_saturated_and_cpu_is_idle():
+    # Arrange
+    controller = make_controller()
+
+    # Act
+    with controller.slot():
+        limit = controller.adjust(cpu=0.3, memory_ratio=0.5, throughput=10)
+
+    # Assert
+    assert limit == 2
+
+def test_holds_when_not_saturated():
+    # Act
+    limit = make_controller().adjust(cpu=0.3, memory_ratio=0.5, throughput=10)
+
+    # Assert
+    assert limit == 1
+
+def test_shrinks_on_cpu_or_memory_pressure():
+    # Arrange
+    controller = make_controller()
+    controller.limit = 3
+
+    # Act
+    after_cpu = controller.adjust(cpu=0.97, memory_ratio=0.5, throughput=10)
+    after_memory = controller.adjust(cpu=0.2, memory_ratio=0.05, throughput=10)
+
+    # Assert
+    assert (after_cpu, after_memory) == (2, 1)
+
+def test_undoes_step_that_lowered_throughput():
+    # Arrange
+    controller = make_controller()
+    controller.busy_since_sample = True
+    controller.adjust(cpu=0.5, memory_ratio=0.5, throughput=10)
+
+    # Act
+    waiting = controller.adjust(cpu=0.5, memory_ratio=0.5, throughput=None)
+    reverted = controller.adjust(cpu=0.5, memory_ratio=0.5, throughput=6)
+    controller.busy_since_sample = True
+    held = controller.adjust(cpu=0.5, memory_ratio=0.5, throughput=6)
+
+    # Assert
+    assert (waiting, reverted, held) == (2, 1, 1)
+
+def test_respects_bounds():
+    # Arrange
+    controller = make_controller(max_workers=2)
+    controller.limit = 2
+    controller.busy_since_sample = True
+
+    # Act
+    limit = controller.adjust(cpu=0.1, memory_ratio=0.9, throughput=10)
+
+    # Assert
+    assert limit == 2
+
+def test_slot_blocks_at_limit():
+    # Arrange
+    controller = make_controller()
+    entered = threading.Event()
+
+    def second_job():
+        with controller.slot():
+            entered.set()
+
+    # Act
+    with controller.slot():
+        thread = threading.Thread(target=second_job)
+        thread.start()
+        blocked = not entered.wait(0.2)
+    thread.join(5)
+
+    # Assert
+    assert blocked
+    assert entered.is_set()
+    assert controller.completed_jobs == 2
+
+def test_cpu_utilization():
+    # Act & Assert
+    assert SystemLoad.cpu_utilization((100, 400), (150, 600)) == 0.75
+    assert SystemLoad.cpu_utilization(None, (150, 600)) is None
+
+def test_memory_available_ratio():
+    # Arrange
+    meminfo = "MemTotal:       16000000 kB\nMemFree:         1000000 kB\nMemAvailable:    4000000 kB\n"
+
+    # Act
+    with mock.patch("builtins.open", mock.mock_open(read_data=meminfo)):
+        ratio = SystemLoad.memory_available_ratio()
+
+    # Assert
+    assert ratio == 0.25
+
+def test_cpu_budget_single_worker_keeps_ffmpeg_defaults():
+    # Arrange
+    budget = CpuBudget(1, cpus=range(8), pin_cpus=True)
+
+    # Act
+    with budget.allocate() as resources:
+        pass
+
+    # Assert
+    assert resources["threads"] is None
+    assert resources["cpus"] is None
+
+def test_cpu_budget_partitions_between_concurrent_encodes():
+    # Arrange
+    budget = CpuBudget(lambda: 3, cpus=range(8), pin_cpus=True)
+
+    # Act
+    with budget.allocate() as first, budget.allocate() as second, budget.allocate() as third:
+        pass
+
+    # Assert
+    assert [first["threads"], second["threads"], third["threads"]] == [2, 2, 2]
+    assert [first["cpus"], second["cpus"], third["cpus"]] == [[0, 1, 2], [3, 4, 5], [6, 7]]
+
+def test_cpu_budget_reuses_released_slots():
+    # Arrange
+    budget = CpuBudget(2, cpus=range(4), pin_cpus=True)
+
+    # Act
+    with budget.allocate():
+        pass
+    with budget.allocate() as resources:
+        pass
+
+    # Assert
+    assert resources["cpus"] == [0, 1]
+
+def test_get_command_prefix_chains_tools():
+    # Arrange
+    resources = {"threads": 2, "cpus": [0, 1], "nice": 5, "ionice": "best-effort", "ionice_level": 7}
+
+    with mock.patch("utils.concurrency.resources.os.name", "posix"), \
+         mock.patch("utils.concurrency.resources.shutil.which", side_effect=lambda tool: f"/usr/bin/{tool}"):
+        # Act
+        prefix = get_command_prefix(resources)
+
+    # Assert
+    assert prefix == [
+        "/usr/bin/taskset", "-c", "0,1", "/usr/bin/nice", "-n", "5", "/usr/bin/ionice", "-t", "-c", "2", "-n", "7"
+    ]
+
+def test_get_command_prefix_skips_missing_tools():
+    # Arrange
+    resources = {"threads": 2, "cpus": [0, 1], "nice": None, "ionice": "idle", "ionice_level": 7}
+
+    with mock.patch("utils.concurrency.resources.os.name", "posix"), \
+         mock.patch("utils.concurrency.resources.shutil.which", side_effect=lambda tool: "/usr/bin/ionice" if tool == "ionice" else None):
+        # Act
+        prefix = get_command_prefix(resources)
+
+    # Assert
+    assert prefix == ["/usr/bin/ionice", "-t", "-c", "3"]
+    assert get_command_prefix({"threads": 4, "cpus": None, "nice": None, "ionice": None}) == []
+
+def test_has_process_settings():
+    assert has_process_settings(None) is False
+    assert has_process_settings({"threads": 4, "cpus": None, "nice": None, "ionice": None}) is False
+    assert has_process_settings({"threads": None, "cpus": None, "nice": 10, "ionice": None}) is True
@@ -0,0 +1,154 @@
+import os
+import socket
+import subprocess
+import sys
+import numpy as np
+import pytest
+from unittest import mock
+from PIL import Image
+from utils.distributed.coordinator import Coordinator
+from utils.distributed.job_queue import JobQueue
+from utils.distributed.worker import Worker
+
+REPOSITORY_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def clock():
+    with mock.patch("utils.distributed.job_queue.time.monotonic", return_value=0) as mock_monotonic:
+        yield mock_monotonic
+
+def test_lease_and_complete(clock):
+    # Arrange
+    job_queue = JobQueue(lease_seconds=10)
+    job_id = job_queue.add_job("image", "in/a.jpg", "out/a.jpg")
+
+    # Act
+    job = job_queue.lease("worker-1")
+    second_lease = job_queue.lease("worker-2")
+    completed = job_queue.complete(job_id, job["lease"])
+
+    # Assert
+    assert job["id"] == job_id and job["attempts"] == 1
+    assert second_lease is None
+    assert completed["status"] == "done"
+    assert job_queue.is_finished()
+
+def test_expired_lease_is_retried_then_failed(clock):
+    # Arrange
+    job_queue = JobQueue(lease_seconds=10, max_attempts=2)
+    job_queue.add_job("video", "in/a.mp4", "out/a.mp4")
+
+    # Act
+    first = job_queue.lease("worker-1")
+    clock.return_value = 11
+    second = job_queue.lease("worker-2")
+    stale_report = job_queue.complete(first["id"], first["lease"])
+    clock.return_value = 22
+
+    # Assert
+    assert second["worker"] == "worker-2" and second["attempts"] == 2
+    assert stale_report is None
+    assert job_queue.is_finished()
+    assert job_queue.counts()["failed"] == 1
+
+def test_renew_extends_lease(clock):
+    # Arrange
+    job_queue = JobQueue(lease_seconds=10)
+    job_queue.add_job("video", "in/a.mp4", "out/a.mp4")
+    job = job_queue.lease("worker-1")
+
+    # Act
+    clock.return_value = 8
+    renewed = job_queue.renew(job["id"], job["lease"])
+    clock.return_value = 15
+
+    # Assert
+    assert renewed is True
+    assert job_queue.counts()["leased"] == 1
+
+def test_failed_job_is_requeued(clock):
+    # Arrange
+    job_queue = JobQueue(max_attempts=3)
+    job_queue.add_job("image", "in/a.jpg", "out/a.jpg")
+    job = job_queue.lease("worker-1")
+
+    # Act
+    failed = job_queue.fail(job["id"], job["lease"], "Compression error")
+    retried = job_queue.lease("worker-2")
+
+    # Assert
+    assert failed["status"] == "pending" and failed["error"] == "Compression error"
+    assert retried["id"] == job["id"] and retried["attempts"] == 2
+
+def get_free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def test_run_with_local_worker_processes(tmp_path):
+    # Arrange
+    input_directory = tmp_path / "media"
+    (input_directory / "nested").mkdir(parents=True)
+    rng = np.random.default_rng(0)
+    for index in range(4):
+        Image.fromarray(rng.integers(0, 256, (240, 320, 3), dtype=np.uint8)).save(input_directory / "nested" / f"image{index}.jpg")
+    # Below the small image thresholds, copied unchanged as in a local run
+    for index in range(4, 6):
+        Image.new("RGB", (64, 48), (index * 40, 80, 120)).save(input_directory / "nested" / f"image{index}.jpg")
+    port = get_free_port()
+    workers = [
+        subprocess.Popen(
+            [sys.executable, "-m", "utils.distributed.worker", f"http://127.0.0.1:{port}", "--id", f"worker-{index}",
+             "--poll-seconds", "0.1"],
+            cwd=REPOSITORY_ROOT,
+        )
+        for index in range(2)
+    ]
+
+    try:
+        # Act
+        summary = Coordinator.run(
+            str(input_directory), process_video=False, convert_incompatible=False, port=port, finish_grace_seconds=1
+        )
+        return_codes = [worker.wait(timeout=30) for worker in workers]
+    finally:
+        for worker in workers:
+            worker.kill()
+
+    # Assert
+    assert return_codes == [0, 0]
+    assert summary["files"] == 6 and summary["failed"] == 0
+    for index in range(6):
+        with Image.open(os.path.join(summary["output_directory"], "nested", f"image{index}.jpg")) as img:
+            assert img.size == ((160, 120) if index < 4 else (64, 48))
+
+def test_worker_encode_raises_on_failed_video(tmp_path):
+    # Arrange
+    output_file = tmp_path / "out" / "clip.mp4"
+    output_file.parent.mkdir()
+    output_file.write_bytes(b"stale")
+    worker = Worker("http://127.0.0.1:1")
+    worker.video_codec = "libx264"
+
+    with mock.patch("utils.distributed.worker.VideoCompressor.get_bitrate", return_value="1000K"), \
+         mock.patch("utils.distributed.worker.VideoCompressor.get_output_framerate", return_value=None), \
+         mock.patch("utils.distributed.worker.VideoCompressor.compress_video", return_value=False):
+        # Act / Assert
+        with pytest.raises(RuntimeError):
+            worker.encode("video", str(tmp_path / "clip.mp4"), str(output_file))
+    assert not output_file.exists()
+
+def test_worker_encode_copies_small_image_unchanged(tmp_path):
+    # Arrange
+    input_file = tmp_path / "icon.png"
+    Image.new("RGB", (32, 32), "red").save(input_file)
+    output_file = tmp_path / "out" / "icon.png"
+
+    with mock.patch("utils.distributed.worker.ImageCompressor.compress_image") as mock_compress_image:
+        # Act
+        Worker("http://127.0.0.1:1").encode("image", str(input_file), str(output_file))
+
+    # Assert
+    mock_compress_image.assert_not_called()
+    assert output_file.read_bytes() == input_file.read_bytes()
@@ -0,0 +1,73 @@
+import hashlib
+import os
+import pytest
+from unittest import mock
+from utils.fingerprint.fingerprint import Fingerprint
+
+
+def blake2b(data):
+    return "blake2b:" + hashlib.blake2b(data, digest_size=16).hexdigest()
+
+@pytest.mark.parametrize("use_mmap", [True, False])
+def test_hash_file_matches_whole_content_hash(tmp_path, use_mmap):
+    # Arrange
+    data = os.urandom(3 * 1024 * 1024 + 123)
+    video = tmp_path / "video.mp4"
+    video.write_bytes(data)
+
+    with mock.patch("utils.fingerprint.fingerprint.CHUNK_SIZE", 1024 * 1024):
+        # Act
+        result = Fingerprint.hash_file(str(video), "blake2b", use_mmap)
+
+    # Assert
+    assert result == blake2b(data)
+
+def test_hash_empty_file(tmp_path):
+    # Arrange
+    video = tmp_path / "empty.mp4"
+    video.write_bytes(b"")
+
+    # Act
+    result = Fingerprint.hash_file(str(video), "blake2b", use_mmap=True)
+
+    # Assert
+    assert result == blake2b(b"")
+
+def test_sample_file_detects_head_middle_and_tail_changes(tmp_path):
+    # Arrange
+    data = bytearray(os.urandom(64 * 1024))
+    video = tmp_path / "video.mp4"
+    video.write_bytes(data)
+    original = Fingerprint.sample_file(str(video), "blake2b", sample_size=4096)
+    fingerprints = []
+
+    # Act
+    for offset in (0, len(data) // 2, len(data) - 1):
+        changed = bytearray(data)
+        changed[offset] ^= 0xFF
+        video.write_bytes(changed)
+        fingerprints.append(Fingerprint.sample_file(str(video), "blake2b", sample_size=4096))
+
+    # Assert
+    assert original.startswith("sampled-blake2b:")
+    assert original not in fingerprints
+    assert len(set(fingerprints)) == 3
+
+def test_sample_file_covers_small_files_whole(tmp_path):
+    # Arrange
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"a" * 10000)
+    first = Fingerprint.sample_file(str(video), "blake2b", sample_size=4096)
+
+    # Act
+    video.write_bytes(b"a" * 5000 + b"b" + b"a" * 4999)
+    second = Fingerprint.sample_file(str(video), "blake2b", sample_size=4096)
+
+    # Assert
+    assert first != second
+
+def test_auto_algorithm_without_xxhash():
+    with mock.patch("utils.fingerprint.fingerprint.xxhash", None):
+        assert Fingerprint.get_algorithm("auto") == "blake2b"
+        with pytest.raises(RuntimeError):
+            Fingerprint.get_algorithm("xxh3_128")
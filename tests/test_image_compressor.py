@@ -61,10 +61,10 @@ def test_get_image_files(mock_os_walk, mock_logger):
     # Arrange
     input_directory = "path/to/images"
     mock_os_walk.return_value = [(input_directory, [], ["image1.jpg", "image2.png"])]
-    ImageCompressor.is_processed = mock.MagicMock(return_value=False)
 
     # Act
-    result = ImageCompressor.get_image_files(input_directory)
+    with mock.patch.object(ImageCompressor, "is_processed", return_value=False):
+        result = ImageCompressor.get_image_files(input_directory)
 
     # Assert
     assert "image1.jpg" in [os.path.basename(file) for file in result]
@@ -74,14 +74,31 @@ def test_get_image_files_processed(mock_os_walk, mock_logger):
     # Arrange
     input_directory = "path/to/images"
     mock_os_walk.return_value = [(input_directory, [], ["image1.jpg", "image2.png"])]
-    ImageCompressor.is_processed = mock.MagicMock(return_value=True)
 
     # Act
-    result = ImageCompressor.get_image_files(input_directory)
+    with mock.patch.object(ImageCompressor, "is_processed", return_value=True):
+        result = ImageCompressor.get_image_files(input_directory)
 
     # Assert
     assert len(result) == 0
 
+def test_get_image_files_skips_run_outputs(tmp_path, mock_logger):
+    # Arrange
+    directories = ["output_01-01-2025_00-00-00", "output_02-01-2025_00-00-00", "output_notes", "photos"]
+    for directory in directories:
+        (tmp_path / directory).mkdir()
+        Image.new("RGB", (8, 8)).save(tmp_path / directory / "icon.png")
+    (tmp_path / "output_01-01-2025_00-00-00" / "app.log").write_text("log")
+
+    # Act
+    with mock.patch.object(ImageCompressor, "is_processed", return_value=False):
+        result = ImageCompressor.get_image_files(str(tmp_path), output_directory=str(tmp_path / "output_02-01-2025_00-00-00"))
+
+    # Assert
+    assert sorted(os.path.relpath(file, tmp_path) for file in result) == [
+        os.path.join("output_notes", "icon.png"), os.path.join("photos", "icon.png")
+    ]
+
 @patch("utils.images.image_compressor.Image.open")
 @patch("utils.images.image_compressor.ImageCompressor.LOGGER")
 def test_compress_image(mock_logger, mock_image_open):
@@ -121,10 +138,10 @@ def test_compress_image_error(mock_image_open, mock_logger):
 @mock.patch("utils.images.image_compressor.os.walk")
 @mock.patch("utils.images.image_compressor.Image.open")
 @mock.patch("utils.images.image_compressor.logging.getLogger")
-def test_compress_images_in_directory(mock_get_logger, mock_image_open, mock_os_walk):
+def test_compress_images_in_directory(mock_get_logger, mock_image_open, mock_os_walk, tmp_path):
     # Arrange
     input_directory = "path/to/input"
-    output_directory = "path/to/output"
+    output_directory = str(tmp_path / "output")
     mock_logger = mock.Mock()
     mock_get_logger.return_value = mock_logger
     mock_os_walk.return_value = [(input_directory, [], ["image1.jpg", "image2.png"])]
@@ -132,6 +149,7 @@ def test_compress_images_in_directory(mock_get_logger, mock_image_open, mock_os_
     mock_image.format = "JPEG"
     mock_image_open.return_value.__enter__.return_value = mock_image
     with mock.patch.object(ImageCompressor, "is_processed", return_value=False), \
+         mock.patch("utils.images.image_compressor.Storage.read_file", return_value=b"image") as mock_read_file, \
          mock.patch.object(ImageCompressor, "compress_image") as mock_compress_image, \
          mock.patch.object(ImageCompressor, "add_metadata") as mock_add_metadata:
 
@@ -141,33 +159,408 @@ def test_compress_images_in_directory(mock_get_logger, mock_image_open, mock_os_
         # Assert
         mock_compress_image.assert_any_call(
             os.path.join(input_directory, "image1.jpg"),
-            os.path.join(output_directory, "image1.jpg")
+            os.path.join(output_directory, "image1.jpg"),
+            None,
+            None,
+            image=None,
+            source=mock.ANY
         )
         mock_compress_image.assert_any_call(
             os.path.join(input_directory, "image2.png"),
-            os.path.join(output_directory, "image2.png")
+            os.path.join(output_directory, "image2.png"),
+            None,
+            None,
+            image=None,
+            source=mock.ANY
         )
+        mock_read_file.assert_any_call(os.path.join(input_directory, "image1.jpg"))
         mock_add_metadata.assert_called()
         mock_logger.info.assert_any_call(f"Finished compressing images in directory: {input_directory}")
 
 @mock.patch("utils.images.image_compressor.os.walk")
 @mock.patch("utils.images.image_compressor.Image.open")
 @mock.patch("utils.images.image_compressor.logging.getLogger")
-def test_compress_images_in_directory_error(mock_get_logger, mock_image_open, mock_os_walk):
+def test_compress_images_in_directory_error(mock_get_logger, mock_image_open, mock_os_walk, tmp_path):
     # Arrange
     input_directory = "path/to/input"
-    output_directory = "path/to/output"
+    output_directory = str(tmp_path / "output")
     mock_logger = mock.Mock()
     mock_get_logger.return_value = mock_logger
     mock_os_walk.return_value = [(input_directory, [], ["image1.jpg"])]
-    ImageCompressor.is_processed = mock.MagicMock(return_value=False)
-    ImageCompressor.get_image_files = mock.MagicMock(return_value=["path/to/input/image1.jpg"])
-    ImageCompressor.compress_image = mock.MagicMock(side_effect=Exception("Compression error"))
 
     # Act
-    ImageCompressor.compress_images_in_directory(input_directory, output_directory)
+    with mock.patch.multiple(ImageCompressor,
+        is_processed=mock.MagicMock(return_value=False),
+        get_image_files=mock.MagicMock(return_value=["path/to/input/image1.jpg"]),
+        compress_image=mock.MagicMock(side_effect=Exception("Compression error"))), \
+         mock.patch("utils.images.image_compressor.Storage.read_file", return_value=b"image"):
+        ImageCompressor.compress_images_in_directory(input_directory, output_directory)
 
     # Assert
     mock_logger.error.assert_called_once_with(
         "Uncaught error occurred while compressing image: path/to/input/image1.jpg. ERROR MESSAGE: Compression error"
-    )
\ No newline at end of file
+    )
+
+def test_get_output_format_keep(mock_logger):
+    # Act
+    result = ImageCompressor.get_output_format("path/to/image.png", {".png": "keep"})
+
+    # Assert
+    assert result is None
+
+def test_get_output_format_webp(mock_logger):
+    # Arrange
+    with mock.patch("utils.images.image_compressor.features.check", return_value=True):
+        # Act
+        result = ImageCompressor.get_output_format("path/to/image.PNG", {".png": "webp"})
+
+    # Assert
+    assert result == "webp"
+
+def test_get_output_format_unsupported(mock_logger):
+    # Arrange
+    with mock.patch("utils.images.image_compressor.features.check", return_value=False):
+        # Act
+        result = ImageCompressor.get_output_format("path/to/image.png", {".png": "avif"})
+
+    # Assert
+    assert result is None
+    mock_logger.warning.assert_called_once()
+
+def test_get_output_path(mock_logger):
+    # Arrange
+    with mock.patch("utils.images.image_compressor.features.check", return_value=True):
+        # Act
+        result = ImageCompressor.get_output_path("in/image.bmp", "out/image.bmp", {".bmp": "webp"})
+
+    # Assert
+    assert result == "out/image.webp"
+
+@patch("utils.images.image_compressor.Image.open")
+@patch("utils.images.image_compressor.ImageCompressor.LOGGER")
+def test_compress_image_converts_format(mock_logger, mock_image_open):
+    # Arrange
+    input_file = "path/to/input.png"
+    output_file = "path/to/output.webp"
+    mock_img = MagicMock()
+    mock_img.width = 800
+    mock_img.height = 600
+    mock_resized_img = MagicMock()
+    mock_resized_img.mode = "RGB"
+    mock_resized_img.info = {}
+    mock_img.resize.return_value = mock_resized_img
+    mock_image_open.return_value.__enter__.return_value = mock_img
+
+    # Act
+    ImageCompressor.compress_image(input_file, output_file, "high")
+
+    # Assert
+    args, kwargs = mock_resized_img.save.call_args
+    assert args == (output_file, "WEBP")
+    assert kwargs["method"] == 6
+    assert b"Processed" in kwargs["exif"]
+
+def test_compress_image_to_webp_roundtrip(tmp_path, mock_logger):
+    # Arrange
+    input_file = tmp_path / "input.png"
+    output_file = tmp_path / "output.webp"
+    Image.new("RGBA", (64, 48), (10, 200, 30, 128)).save(input_file)
+
+    # Act
+    ImageCompressor.compress_image(str(input_file), str(output_file))
+
+    # Assert
+    with Image.open(output_file) as img:
+        assert img.format == "WEBP"
+        assert img.size == (32, 24)
+
+def make_noisy_image(width=96, height=64):
+    return Image.merge("RGB", [Image.effect_noise((width, height), 40).convert("L")] * 3)
+
+def test_search_quality_target_size(mock_logger):
+    # Arrange
+    img = make_noisy_image()
+    target_size = len(ImageCompressor.encode_to_bytes(img, "JPEG", {"quality": 60}))
+
+    # Act
+    data = ImageCompressor.search_quality(img, "JPEG", {}, {"target_size": target_size})
+
+    # Assert
+    assert data == ImageCompressor.encode_to_bytes(img, "JPEG", {"quality": 60})
+
+def test_search_quality_min_ssim(mock_logger):
+    # Arrange
+    img = make_noisy_image()
+
+    # Act
+    low_bar = ImageCompressor.search_quality(img, "JPEG", {}, {"min_ssim": 0.5})
+    high_bar = ImageCompressor.search_quality(img, "JPEG", {}, {"min_ssim": 0.95})
+
+    # Assert
+    assert len(low_bar) < len(high_bar)
+
+def test_compress_image_quality_target_writes_once(tmp_path, mock_logger):
+    # Arrange
+    input_file = tmp_path / "input.jpg"
+    output_file = tmp_path / "output.jpg"
+    make_noisy_image(192, 128).save(input_file, quality=95)
+
+    # Act
+    with mock.patch.object(ImageCompressor, "search_quality", wraps=ImageCompressor.search_quality) as mock_search:
+        ImageCompressor.compress_image(str(input_file), str(output_file), quality_target={"min_psnr": 30})
+
+    # Assert
+    mock_search.assert_called_once()
+    with Image.open(output_file) as img:
+        assert img.format == "JPEG"
+        assert img.size == (96, 64)
+
+def make_noise_image(path, width, height):
+    import numpy as np
+    pixels = np.random.default_rng(0).integers(0, 256, (height, width, 3), dtype=np.uint8)
+    Image.fromarray(pixels).save(path)
+
+def test_get_size_action_small_image_passthrough(tmp_path, mock_logger):
+    # Arrange
+    icon = tmp_path / "icon.png"
+    make_noise_image(icon, 64, 64)
+
+    # Act
+    action = ImageCompressor.get_size_action(str(icon))
+
+    # Assert
+    assert action == "passthrough"
+
+def test_get_size_action_large_or_dense_image(tmp_path, mock_logger):
+    # Arrange
+    photo = tmp_path / "photo.png"
+    make_noise_image(photo, 400, 300)
+    flat = tmp_path / "flat.png"
+    Image.new("RGB", (1000, 1000), "white").save(flat)
+
+    # Act
+    photo_action = ImageCompressor.get_size_action(str(photo))
+    flat_action = ImageCompressor.get_size_action(str(flat))
+
+    # Assert
+    assert photo_action == "compress"
+    assert flat_action == "passthrough"
+
+@pytest.mark.parametrize("width,height,max_long_edge,expected", [
+    (800, 600, None, (400, 300)),
+    (4000, 3000, 1920, (1920, 1440)),
+    (1200, 1600, 1000, (750, 1000)),
+    (800, 600, 1920, (800, 600)),
+])
+def test_get_target_size(width, height, max_long_edge, expected):
+    # Act
+    with mock.patch.object(ImageCompressor, "MAX_LONG_EDGE", None):
+        result = ImageCompressor.get_target_size(width, height, max_long_edge)
+
+    # Assert
+    assert result == expected
+
+def test_compress_image_caps_long_edge(tmp_path, mock_logger):
+    # Arrange
+    input_file = tmp_path / "photo.png"
+    output_file = tmp_path / "output.png"
+    make_noise_image(input_file, 400, 300)
+
+    # Act
+    ImageCompressor.compress_image(str(input_file), str(output_file), max_long_edge=320)
+
+    # Assert
+    with Image.open(output_file) as img:
+        assert img.size == (320, 240)
+
+@pytest.mark.parametrize("policy,copied", [("passthrough", True), ("skip", False)])
+def test_process_image_small_image_policy(tmp_path, mock_logger, policy, copied):
+    # Arrange
+    input_directory = tmp_path / "input"
+    input_directory.mkdir()
+    icon = input_directory / "icon.gif"
+    make_noise_image(icon, 32, 32)
+    output_directory = tmp_path / "output"
+
+    with mock.patch.object(ImageCompressor, "SMALL_IMAGE_POLICY", policy), \
+         mock.patch.object(ImageCompressor, "compress_image") as mock_compress_image:
+        # Act
+        ImageCompressor.process_image(str(icon), str(input_directory), str(output_directory), 1, 1)
+
+    # Assert
+    mock_compress_image.assert_not_called()
+    output_file = output_directory / "icon.gif"
+    assert output_file.exists() is copied
+    if copied:
+        assert output_file.read_bytes() == icon.read_bytes()
+
+def test_get_image_files_feeds_passthrough(mock_os_walk, mock_logger):
+    # Arrange
+    mock_os_walk.return_value = [("path/to/images", [], ["image1.jpg", "image2.png", "notes.txt"])]
+    passthrough = mock.Mock()
+    passthrough.claim_walk.return_value = True
+
+    with mock.patch.object(ImageCompressor, "is_processed", side_effect=lambda path: path.endswith("image2.png")):
+        # Act
+        result = ImageCompressor.get_image_files("path/to/images", passthrough)
+
+    # Assert
+    assert result == [os.path.join("path/to/images", "image1.jpg")]
+    passthrough.other.assert_called_once_with(os.path.join("path/to/images", "notes.txt"))
+    passthrough.skipped.assert_called_once_with(os.path.join("path/to/images", "image2.png"))
+
+def make_animation(path, frame_count=6, width=120, height=80):
+    from PIL import ImageDraw
+    frames = []
+    for index in range(frame_count):
+        frame = Image.new("RGBA", (width, height), (0, 0, 0, 0))
+        ImageDraw.Draw(frame).ellipse((index * 10, 10, index * 10 + 40, 50), fill=(255, 200, 0, 255))
+        frames.append(frame)
+    frames[0].save(path, save_all=True, append_images=frames[1:], duration=60, loop=0, disposal=2)
+
+@pytest.mark.parametrize("extension", [".gif", ".png", ".webp"])
+def test_compress_image_keeps_animation_frames(tmp_path, mock_logger, extension):
+    # Arrange
+    input_file = tmp_path / f"input{extension}"
+    output_file = tmp_path / f"output{extension}"
+    make_animation(input_file)
+
+    # Act
+    ImageCompressor.compress_image(str(input_file), str(output_file))
+
+    # Assert
+    with Image.open(output_file) as img:
+        assert img.size == (60, 40)
+        assert img.n_frames == 6
+        assert img.info["loop"] == 0
+        assert img.convert("RGBA").getpixel((0, 0))[3] == 0
+    assert ImageCompressor.is_processed(str(output_file)) is True
+    assert ImageCompressor.is_processed(str(input_file)) is False
+
+def test_compress_image_animation_first_frame_policy(tmp_path, mock_logger):
+    # Arrange
+    input_file = tmp_path / "input.gif"
+    output_file = tmp_path / "output.gif"
+    make_animation(input_file)
+
+    with mock.patch.object(ImageCompressor, "ANIMATED_IMAGE_POLICY", "first_frame"):
+        # Act
+        ImageCompressor.compress_image(str(input_file), str(output_file))
+
+    # Assert
+    with Image.open(output_file) as img:
+        assert img.size == (60, 40)
+        assert getattr(img, "n_frames", 1) == 1
+
+def test_compress_image_animation_to_still_format(tmp_path, mock_logger):
+    # Arrange
+    input_file = tmp_path / "input.gif"
+    output_file = tmp_path / "output.jpg"
+    make_animation(input_file)
+
+    # Act
+    ImageCompressor.compress_image(str(input_file), str(output_file))
+
+    # Assert
+    with Image.open(output_file) as img:
+        assert img.format == "JPEG"
+    mock_logger.warning.assert_called_once()
+
+def test_quantize_frames_shares_palette(mock_logger):
+    # Arrange
+    frames = [Image.new("RGBA", (8, 8), (255, 0, 0, 255)), Image.new("RGBA", (8, 8), (0, 0, 255, 255))]
+    frames[1].putpixel((0, 0), (0, 0, 0, 0))
+
+    # Act
+    quantized, transparency = ImageCompressor.quantize_frames(frames)
+
+    # Assert
+    assert quantized[0].getpalette() == quantized[1].getpalette()
+    assert quantized[1].getpixel((0, 0)) == transparency
+    assert quantized[1].getpixel((1, 1)) != transparency
+    assert quantized[1].convert("RGB").getpixel((1, 1)) == (0, 0, 255)
+
+def test_process_image_animated_passthrough(tmp_path, mock_logger):
+    # Arrange
+    input_directory = tmp_path / "input"
+    input_directory.mkdir()
+    animation = input_directory / "clip.gif"
+    make_animation(animation, width=400, height=300)
+    output_directory = tmp_path / "output"
+
+    with mock.patch.object(ImageCompressor, "ANIMATED_IMAGE_POLICY", "passthrough"), \
+         mock.patch.object(ImageCompressor, "get_size_action", return_value="compress"), \
+         mock.patch.object(ImageCompressor, "compress_image") as mock_compress_image:
+        # Act
+        ImageCompressor.process_image(str(animation), str(input_directory), str(output_directory), 1, 1)
+
+    # Assert
+    mock_compress_image.assert_not_called()
+    assert (output_directory / "clip.gif").read_bytes() == animation.read_bytes()
+
+def test_iter_batches_groups_same_size(tmp_path, mock_logger):
+    # Arrange
+    files = []
+    for name, size in [("a.png", (600, 400)), ("b.png", (600, 400)), ("c.png", (640, 480)), ("d.png", (600, 400))]:
+        make_noise_image(tmp_path / name, *size)
+        files.append(str(tmp_path / name))
+
+    with mock.patch("utils.images.image_compressor.BATCH_SIZE", 2):
+        # Act
+        batches = list(ImageCompressor.iter_batches(files))
+
+    # Assert
+    assert batches == [files[:2], [files[2]], [files[3]]]
+
+def test_get_batch_key_requires_exact_factor(tmp_path, mock_logger):
+    # Arrange
+    make_noise_image(tmp_path / "a.png", 600, 400)
+
+    with mock.patch.object(ImageCompressor, "MAX_LONG_EDGE", 250):
+        # Act
+        key = ImageCompressor.get_batch_key(str(tmp_path / "a.png"))
+
+    # Assert
+    assert key is None
+
+def test_compress_images_in_directory_batch_resize(tmp_path):
+    # Arrange
+    input_directory = tmp_path / "input"
+    input_directory.mkdir()
+    for name in ["a.png", "b.png", "c.png"]:
+        make_noise_image(input_directory / name, 600, 400)
+    make_noise_image(input_directory / "odd.png", 640, 480)
+    output_directory = tmp_path / "output"
+
+    with mock.patch.object(ImageCompressor, "BATCH_RESIZE", True), \
+         mock.patch.object(ImageCompressor, "resize_batch", wraps=ImageCompressor.resize_batch) as mock_resize_batch:
+        # Act
+        ImageCompressor.compress_images_in_directory(str(input_directory), str(output_directory))
+
+    # Assert
+    assert sorted(len(args[0]) for args, _ in mock_resize_batch.call_args_list) == [1, 3]
+    for name, size in [("a.png", (300, 200)), ("b.png", (300, 200)), ("c.png", (300, 200)), ("odd.png", (320, 240))]:
+        with Image.open(output_directory / name) as img:
+            assert img.size == size
+
+def test_process_image_failed_compress_not_counted(tmp_path, mock_logger):
+    # Arrange
+    input_directory = tmp_path / "input"
+    input_directory.mkdir()
+    photo = input_directory / "photo.png"
+    make_noise_image(photo, 400, 300)
+    output_directory = tmp_path / "output"
+
+    def fail(input_file, output_file, *args, **kwargs):
+        with open(output_file, "wb") as partial:
+            partial.write(b"partial")
+        return False
+
+    with mock.patch.object(ImageCompressor, "compress_image", side_effect=fail), \
+         mock.patch("utils.images.image_compressor.RunMetrics.record_job") as mock_record_job:
+        # Act
+        ImageCompressor.process_image(str(photo), str(input_directory), str(output_directory), 1, 1)
+
+    # Assert
+    assert not (output_directory / "photo.png").exists()
+    mock_record_job.assert_called_once_with("image", str(photo), str(output_directory / "photo.png"), False)
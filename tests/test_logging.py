@@ -0,0 +1,52 @@
+import json
+import logging
+import pytest
+from utils.logging.logging import setup_logging, stop_logging
+
+
+@pytest.fixture(autouse=True)
+def isolated_logging():
+    stop_logging()
+    root_logger = logging.getLogger()
+    level = root_logger.level
+    yield
+    stop_logging()
+    root_logger.setLevel(level)
+
+def test_repeated_runs_route_to_new_directory(tmp_path):
+    # Arrange
+    first_run = tmp_path / "first"
+    second_run = tmp_path / "second"
+    logger = logging.getLogger("tests.logging")
+
+    # Act
+    setup_logging(str(first_run))
+    logger.info("first message")
+    setup_logging(str(first_run))
+    setup_logging(str(second_run))
+    logger.info("second message")
+    stop_logging()
+
+    # Assert
+    first_log = (first_run / "app.log").read_text(encoding="utf-8")
+    second_log = (second_run / "app.log").read_text(encoding="utf-8")
+    assert "first message" in first_log and "second message" not in first_log
+    assert "second message" in second_log and "first message" not in second_log
+    assert first_log.count("first message") == 1
+
+def test_level_and_json_lines(tmp_path):
+    # Arrange
+    logger = logging.getLogger("tests.logging")
+
+    # Act
+    setup_logging(str(tmp_path), level="WARNING", json_lines=True)
+    logger.info("hidden")
+    logger.warning("shown")
+    stop_logging()
+
+    # Assert
+    assert "hidden" not in (tmp_path / "app.log").read_text(encoding="utf-8")
+    entries = [json.loads(line) for line in (tmp_path / "app.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert [(entry["level"], entry["logger"], entry["message"]) for entry in entries] == [
+        ("WARNING", "tests.logging", "shown")
+    ]
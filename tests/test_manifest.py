@@ -0,0 +1,109 @@
+import json
+import os
+import pytest
+from utils.fingerprint.fingerprint import Fingerprint
+from utils.manifest.config import MANIFEST_FILENAME
+from utils.manifest.manifest import Manifest
+
+SETTINGS = {"video_codec": "libx264", "rate_control": "abr"}
+
+
+@pytest.fixture(autouse=True)
+def reset_manifest():
+    Manifest.reset()
+    yield
+    Manifest.reset()
+
+def make_prior_run(tmp_path):
+    source = tmp_path / "input" / "video.mp4"
+    source.parent.mkdir()
+    source.write_bytes(b"source data")
+    output_directory = tmp_path / "input" / "output_01-01-2025_00-00-00"
+    output_directory.mkdir()
+    output = output_directory / "video.mp4"
+    output.write_bytes(b"out")
+    Manifest.start(str(output_directory))
+    Manifest.record(str(source), str(output), SETTINGS)
+    Manifest.reset()
+    return source, output
+
+def test_record_writes_stat_hash_and_settings(tmp_path):
+    # Arrange
+    source, output = make_prior_run(tmp_path)
+
+    # Act
+    with open(output.parent / MANIFEST_FILENAME, encoding="utf-8") as manifest:
+        records = [json.loads(line) for line in manifest]
+
+    # Assert
+    assert len(records) == 1
+    assert records[0]["source"] == str(source)
+    assert records[0]["output_size"] == 3
+    assert records[0]["output_hash"] == Fingerprint.hash_file(str(output))
+    assert records[0]["settings"] == SETTINGS
+
+def test_prior_run_recognized_from_stat(tmp_path):
+    # Arrange
+    source, output = make_prior_run(tmp_path)
+
+    # Act
+    Manifest.load(str(tmp_path / "input"))
+
+    # Assert
+    assert Manifest.is_recorded(str(source), SETTINGS) is True
+    assert Manifest.is_recorded(str(output), {"video_codec": "h264_qsv"}) is True
+
+def test_changed_source_or_settings_not_recognized(tmp_path):
+    # Arrange
+    source, _ = make_prior_run(tmp_path)
+    Manifest.load(str(tmp_path / "input"))
+
+    # Act
+    different_settings = Manifest.is_recorded(str(source), {**SETTINGS, "rate_control": "crf"})
+    source.write_bytes(b"edited source data")
+    modified = Manifest.is_recorded(str(source), SETTINGS)
+
+    # Assert
+    assert different_settings is False
+    assert modified is False
+
+def test_manifests_found_under_output_root(tmp_path):
+    # Arrange
+    output_root = tmp_path / "root"
+    run_directory = output_root / "input_output_01-01-2025_00-00-00"
+    run_directory.mkdir(parents=True)
+    (run_directory / MANIFEST_FILENAME).write_text("")
+    (tmp_path / "input").mkdir()
+
+    # Act
+    manifests = Manifest.find_manifests(str(tmp_path / "input"), str(output_root))
+
+    # Assert
+    assert manifests == [str(run_directory / MANIFEST_FILENAME)]
+
+def test_record_outside_run_is_noop(tmp_path):
+    # Arrange
+    output = tmp_path / "video.mp4"
+    output.write_bytes(b"out")
+
+    # Act
+    Manifest.record(str(output), str(output), SETTINGS)
+
+    # Assert
+    assert not os.path.exists(tmp_path / MANIFEST_FILENAME)
+
+def test_touched_source_recognized_from_fingerprint(tmp_path):
+    # Arrange
+    source, _ = make_prior_run(tmp_path)
+    Manifest.load(str(tmp_path / "input"))
+    stat = os.stat(source)
+
+    # Act
+    os.utime(source, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    touched = Manifest.is_recorded(str(source), SETTINGS)
+    source.write_bytes(b"source DATA")
+    edited = Manifest.is_recorded(str(source), SETTINGS)
+
+    # Assert
+    assert touched is True
+    assert edited is False
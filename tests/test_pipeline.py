@@ -0,0 +1,77 @@
+import threading
+import pytest
+from utils.pipeline.pipeline import Pipeline
+
+
+def test_run_passes_items_through_stages():
+    # Arrange
+    results = []
+
+    # Act
+    Pipeline.run(range(10), [(lambda item: item * 2, 3), (lambda item: item if item % 4 else None, 2), (results.append, 1)])
+
+    # Assert
+    assert sorted(results) == [2, 6, 10, 14, 18]
+
+def test_last_stage_runs_on_calling_thread():
+    # Arrange
+    threads = set()
+
+    # Act
+    Pipeline.run(range(3), [(lambda item: item, 1), (lambda item: threads.add(threading.current_thread()), 1)])
+
+    # Assert
+    assert threads == {threading.current_thread()}
+
+def test_first_item_is_consumed_before_discovery_finishes():
+    # Arrange
+    first_consumed = threading.Event()
+    produced = []
+
+    def source():
+        for item in range(5):
+            produced.append(item)
+            yield item
+            if item == 0:
+                assert first_consumed.wait(5)
+
+    # Act
+    Pipeline.run(source(), [(lambda item: first_consumed.set(), 1)])
+
+    # Assert
+    assert produced == [0, 1, 2, 3, 4]
+
+def test_queues_are_bounded():
+    # Arrange
+    produced = []
+    release = threading.Event()
+    seen_while_blocked = []
+
+    def source():
+        for item in range(100):
+            produced.append(item)
+            yield item
+
+    def consume(item):
+        if item == 0:
+            # Let the source fill the queues, then record how far ahead it got
+            release.wait(0.5)
+            seen_while_blocked.append(len(produced))
+
+    # Act
+    Pipeline.run(source(), [(consume, 1)], queue_size=4)
+
+    # Assert
+    assert seen_while_blocked[0] <= 4 + 2
+    assert len(produced) == 100
+
+def test_stage_error_is_raised():
+    # Arrange
+    def fail(item):
+        if item == 3:
+            raise ValueError("bad item")
+        return item
+
+    # Act & Assert
+    with pytest.raises(ValueError, match="bad item"):
+        Pipeline.run(range(1000), [(fail, 2), (lambda item: None, 1)])
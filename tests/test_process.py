@@ -0,0 +1,122 @@
+import ctypes
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import pytest
+from unittest import mock
+from utils.metrics.prometheus import PrometheusMetrics
+from utils.process.runner import ProcessRunner
+
+PYTHON = os.path.basename(sys.executable)
+
+
+def python(code):
+    return [sys.executable, "-c", code]
+
+def active_processes():
+    return dict(PrometheusMetrics.ACTIVE_PROCESSES.values).get((PYTHON,), 0)
+
+def test_run_captures_output():
+    # Act
+    result = ProcessRunner.run(
+        python("import sys; print('out'); print('err', file=sys.stderr)"), capture_output=True, text=True
+    )
+
+    # Assert
+    assert result.returncode == 0
+    assert result.stdout.strip() == "out"
+    assert result.stderr.strip() == "err"
+
+def test_run_check_raises_with_stderr():
+    # Act & Assert
+    with pytest.raises(subprocess.CalledProcessError) as error:
+        ProcessRunner.run(python("import sys; sys.stderr.write('bad'); sys.exit(3)"), capture_output=True, check=True)
+    assert error.value.returncode == 3
+    assert error.value.stderr == b"bad"
+
+def test_run_streams_lines_while_running():
+    # Arrange
+    lines = []
+
+    # Act
+    ProcessRunner.run(python("print('a'); print('b')"), on_stdout_line=lines.append)
+
+    # Assert
+    assert [line.strip() for line in lines] == [b"a", b"b"]
+
+def test_run_kills_process_on_timeout():
+    # Arrange
+    start = time.perf_counter()
+
+    # Act & Assert
+    with pytest.raises(subprocess.TimeoutExpired):
+        ProcessRunner.run(python("import time; time.sleep(30)"), capture_output=True, timeout=0.5)
+    assert time.perf_counter() - start < 10
+    assert active_processes() == 0
+
+def test_run_many_bounds_concurrency_and_keeps_order():
+    # Arrange
+    cmds = [python(f"import time; time.sleep(0.3); print({index})") for index in range(4)]
+    cmds.append(python("import sys; sys.exit(1)"))
+
+    with mock.patch.dict("utils.process.runner.COMMAND_CONCURRENCY", {PYTHON: 2}), \
+         mock.patch.object(ProcessRunner, "SEMAPHORES", {}):
+        start = time.perf_counter()
+        # Act
+        results = ProcessRunner.run_many(cmds, capture_output=True, text=True, check=True)
+        elapsed = time.perf_counter() - start
+
+    # Assert
+    assert [result.stdout.strip() for result in results[:4]] == ["0", "1", "2", "3"]
+    assert isinstance(results[4], subprocess.CalledProcessError)
+    assert elapsed >= 0.6
+
+def test_exception_in_waiting_thread_kills_process():
+    # Arrange
+    started = threading.Event()
+    errors = []
+
+    def run():
+        try:
+            ProcessRunner.run(python("print('ready', flush=True); import time; time.sleep(30)"),
+                              on_stdout_line=lambda line: started.set())
+        except SystemExit as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    started.wait(10)
+
+    # Act
+    ctypes.pythonapi.PyThreadState_SetAsyncExc(ctypes.c_long(thread.ident), ctypes.py_object(SystemExit))
+    thread.join(10)
+
+    # Assert
+    assert not thread.is_alive()
+    assert len(errors) == 1
+    deadline = time.perf_counter() + 5
+    while active_processes() and time.perf_counter() < deadline:
+        time.sleep(0.05)
+    assert active_processes() == 0
+
+@pytest.mark.skipif(
+    not hasattr(os, "sched_getaffinity") or not shutil.which("taskset") or not shutil.which("nice"),
+    reason="needs Linux scheduling calls, taskset and nice"
+)
+def test_run_applies_resources_before_exec():
+    # Arrange
+    resources = {"threads": 1, "cpus": [min(os.sched_getaffinity(0))], "nice": 5, "ionice": None, "ionice_level": 7}
+
+    # Act
+    result = ProcessRunner.run(
+        python("import os; print(os.getpriority(os.PRIO_PROCESS, 0), sorted(os.sched_getaffinity(0)))"),
+        capture_output=True, text=True, resources=resources,
+    )
+
+    # Assert
+    nice, cpus = result.stdout.split(" ", 1)
+    assert int(nice) == os.getpriority(os.PRIO_PROCESS, 0) + 5
+    assert cpus.strip() == str(resources["cpus"])
@@ -0,0 +1,76 @@
+import pytest
+from unittest import mock
+from utils.progress.progress import ProgressTracker
+
+
+@pytest.fixture(autouse=True)
+def reset_progress():
+    ProgressTracker.reset()
+    yield
+    ProgressTracker.reset()
+
+def test_update_from_ffmpeg():
+    # Arrange
+    job_id = ProgressTracker.start_job("in/video.mp4", "video", media_duration=10)
+
+    # Act
+    ProgressTracker.update_from_ffmpeg(job_id, {"out_time_us": "2500000", "speed": "1.75x", "progress": "continue"})
+
+    # Assert
+    job = ProgressTracker.snapshot()["jobs"][0]
+    assert job["percent"] == 25
+    assert job["speed"] == 1.75
+
+def test_update_from_ffmpeg_unknown_values():
+    # Arrange
+    job_id = ProgressTracker.start_job("in/video.mp4", "video")
+
+    # Act
+    ProgressTracker.update_from_ffmpeg(job_id, {"out_time_us": "N/A", "speed": "N/A", "progress": "continue"})
+
+    # Assert
+    job = ProgressTracker.snapshot()["jobs"][0]
+    assert job["percent"] == 0
+    assert job["speed"] is None
+
+def test_finish_job_updates_aggregate():
+    # Arrange
+    with mock.patch("utils.progress.progress.time.perf_counter", side_effect=[0, 1, 2, 10]):
+        ProgressTracker.reset()
+        video_job = ProgressTracker.start_job("in/video.mp4", "video", media_duration=40)
+        image_job = ProgressTracker.start_job("in/image.jpg", "image", megapixels=12)
+
+        # Act
+        ProgressTracker.finish_job(video_job)
+        ProgressTracker.finish_job(image_job)
+        snapshot = ProgressTracker.snapshot()
+
+    # Assert
+    assert snapshot["jobs"] == []
+    assert snapshot["completed"] == 2
+    assert snapshot["realtime_speed"] == 4.0
+    assert snapshot["megapixels_per_second"] == 1.2
+
+def test_format_lines():
+    # Arrange
+    snapshot = {
+        "jobs": [
+            {"id": 1, "file": "in/video.mp4", "type": "video", "percent": 42.4, "speed": 2.5},
+            {"id": 2, "file": "in/image.jpg", "type": "image", "percent": 0, "speed": 8.0},
+            {"id": 3, "file": "in/other.mp4", "type": "video", "percent": 0, "speed": None},
+        ],
+        "completed": 5,
+        "realtime_speed": 1.5,
+        "megapixels_per_second": 3.25,
+    }
+
+    # Act
+    lines = ProgressTracker.format_lines(snapshot, max_jobs=2)
+
+    # Assert
+    assert lines == [
+        "video.mp4  42%  2.50x",
+        "image.jpg  0%  8.0 MP/s",
+        "... and 1 more",
+        "Active: 3  Done: 5  Throughput: 1.50x realtime, 3.2 MP/s",
+    ]
@@ -0,0 +1,92 @@
+import urllib.error
+import urllib.request
+import pytest
+from utils.metrics.prometheus import Counter, Gauge, Histogram, MetricsServer, PrometheusMetrics
+
+
+def test_counter_expose():
+    # Arrange
+    counter = Counter("jobs_total", "Jobs.", ("type", "status"))
+
+    # Act
+    counter.inc(type="video", status="succeeded")
+    counter.inc(2, type="video", status="succeeded")
+    counter.inc(type="image", status="failed")
+
+    # Assert
+    assert counter.expose().splitlines() == [
+        "# HELP media_compressor_jobs_total Jobs.",
+        "# TYPE media_compressor_jobs_total counter",
+        'media_compressor_jobs_total{type="image",status="failed"} 1',
+        'media_compressor_jobs_total{type="video",status="succeeded"} 3',
+    ]
+
+def test_gauge_set_and_dec():
+    # Arrange
+    gauge = Gauge("queue_depth", "Queue.", ("type",))
+
+    # Act
+    gauge.set(5, type="video")
+    gauge.dec(type="video")
+
+    # Assert
+    assert gauge.samples() == [("media_compressor_queue_depth", ("video",), 4)]
+
+def test_histogram_buckets():
+    # Arrange
+    histogram = Histogram("duration_seconds", "Durations.", ("stage",), buckets=[1, 10])
+
+    # Act
+    histogram.observe(0.5, stage="encode")
+    histogram.observe(5, stage="encode")
+    histogram.observe(50, stage="encode")
+
+    # Assert
+    lines = histogram.expose().splitlines()
+    assert 'media_compressor_duration_seconds_bucket{stage="encode",le="1"} 1' in lines
+    assert 'media_compressor_duration_seconds_bucket{stage="encode",le="10"} 2' in lines
+    assert 'media_compressor_duration_seconds_bucket{stage="encode",le="+Inf"} 3' in lines
+    assert 'media_compressor_duration_seconds_sum{stage="encode"} 55.5' in lines
+    assert 'media_compressor_duration_seconds_count{stage="encode"} 3' in lines
+
+def test_label_escaping():
+    # Arrange
+    counter = Counter("escaped_total", "Escaped.", ("path",))
+
+    # Act
+    counter.inc(path='a"b\\c')
+
+    # Assert
+    assert 'media_compressor_escaped_total{path="a\\"b\\\\c"} 1' in counter.expose()
+
+def test_count_job():
+    # Arrange
+    before_in = dict(PrometheusMetrics.BYTES_IN.values)
+    before_out = dict(PrometheusMetrics.BYTES_OUT.values)
+    before_jobs = dict(PrometheusMetrics.JOBS.values)
+
+    # Act
+    PrometheusMetrics.count_job("image", True, 100, 40)
+    PrometheusMetrics.count_job("image", False, 50, 0)
+
+    # Assert
+    assert PrometheusMetrics.BYTES_IN.values[("image",)] - before_in.get(("image",), 0) == 150
+    assert PrometheusMetrics.BYTES_OUT.values[("image",)] - before_out.get(("image",), 0) == 40
+    assert PrometheusMetrics.JOBS.values[("image", "failed")] - before_jobs.get(("image", "failed"), 0) == 1
+
+def test_metrics_server():
+    # Arrange
+    port = MetricsServer.start("127.0.0.1", 0)
+
+    try:
+        # Act
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics") as response:
+            body = response.read().decode("utf-8")
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/other")
+    finally:
+        MetricsServer.stop()
+
+    # Assert
+    assert "# TYPE media_compressor_jobs_total counter" in body
+    assert "# TYPE media_compressor_stage_duration_seconds histogram" in body
@@ -0,0 +1,76 @@
+import numpy as np
+from PIL import Image
+from utils.images.quality import box_mean, psnr, ssim, to_luma
+
+
+def test_psnr_identical():
+    # Arrange
+    values = np.arange(64, dtype=np.float64).reshape(8, 8)
+
+    # Act
+    result = psnr(values, values)
+
+    # Assert
+    assert result == float("inf")
+
+def test_psnr_known_value():
+    # Arrange
+    reference = np.zeros((4, 4))
+    distorted = np.full((4, 4), 255.0)
+
+    # Act
+    result = psnr(reference, distorted)
+
+    # Assert
+    assert result == 0.0
+
+def test_box_mean_matches_loop():
+    # Arrange
+    rng = np.random.default_rng(0)
+    values = rng.random((10, 12))
+    window = 3
+
+    # Act
+    result = box_mean(values, window)
+
+    # Assert
+    expected = np.array([
+        [values[y:y + window, x:x + window].mean() for x in range(12 - window + 1)]
+        for y in range(10 - window + 1)
+    ])
+    np.testing.assert_allclose(result, expected)
+
+def test_ssim_identical_and_degraded():
+    # Arrange
+    rng = np.random.default_rng(1)
+    reference = rng.integers(0, 256, (32, 32)).astype(np.float64)
+    distorted = np.clip(reference + rng.normal(0, 40, reference.shape), 0, 255)
+
+    # Act
+    identical = ssim(reference, reference)
+    degraded = ssim(reference, distorted)
+
+    # Assert
+    assert identical == 1.0
+    assert degraded < 0.9
+
+def test_ssim_small_image():
+    # Arrange
+    reference = np.full((3, 5), 100.0)
+
+    # Act
+    result = ssim(reference, reference)
+
+    # Assert
+    assert result == 1.0
+
+def test_to_luma():
+    # Arrange
+    img = Image.new("RGB", (4, 2), (255, 255, 255))
+
+    # Act
+    result = to_luma(img)
+
+    # Assert
+    assert result.shape == (2, 4)
+    assert result.dtype == np.float64
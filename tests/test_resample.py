@@ -0,0 +1,33 @@
+import numpy as np
+from utils.images.resample import box_downsample, get_box_factor
+
+def test_get_box_factor():
+    # Act / Assert
+    assert get_box_factor((1920, 1080), (960, 540)) == 2
+    assert get_box_factor((101, 51), (50, 25)) is None
+    assert get_box_factor((4000, 3000), (1920, 1440)) is None
+    assert get_box_factor((4000, 3000), (2000, 1500)) == 2
+    assert get_box_factor((1920, 1080), (1280, 720)) is None
+    assert get_box_factor((64, 64), (64, 64)) is None
+
+def test_box_downsample_averages_blocks():
+    # Arrange
+    stack = np.array([[[0, 2, 9], [4, 7, 9], [9, 9, 9]], [[255, 255, 0], [255, 255, 0], [0, 0, 0]]], dtype=np.uint8)
+
+    # Act
+    result = box_downsample(stack, 2)
+
+    # Assert
+    assert result.dtype == np.uint8
+    assert result.tolist() == [[[3]], [[255]]]
+
+def test_box_downsample_matches_per_image_mean():
+    # Arrange
+    stack = np.random.default_rng(0).integers(0, 256, (3, 12, 8, 3), dtype=np.uint8)
+
+    # Act
+    result = box_downsample(stack, 4)
+
+    # Assert
+    expected = (stack.reshape(3, 3, 4, 2, 4, 3).sum(axis=(2, 4)) + 8) // 16
+    assert np.array_equal(result, expected)
@@ -0,0 +1,112 @@
+import json
+import pytest
+from unittest import mock
+from utils.metrics.run_metrics import RunMetrics
+
+
+@pytest.fixture(autouse=True)
+def reset_metrics():
+    RunMetrics.reset()
+    yield
+    RunMetrics.reset()
+
+def test_stage_accumulates_per_file():
+    # Arrange
+    with mock.patch("utils.metrics.run_metrics.time.perf_counter", side_effect=[0, 1.5, 2, 2.5]):
+        # Act
+        with RunMetrics.stage("encode", "a.mp4", "video"):
+            pass
+        with RunMetrics.stage("encode", "a.mp4", "video"):
+            pass
+
+    # Assert
+    assert RunMetrics.FILES["a.mp4"] == {"type": "video", "stages": {"encode": 2.0}}
+
+def test_stage_without_file_is_run_level():
+    # Act
+    RunMetrics.add_timing("scan", 3.0)
+
+    # Assert
+    assert RunMetrics.RUN_STAGES == {"scan": 3.0}
+    assert RunMetrics.FILES == {}
+
+def test_nested_stage_is_excluded_from_enclosing_stage():
+    # Arrange
+    with mock.patch("utils.metrics.run_metrics.time.perf_counter", side_effect=[0, 1, 4, 5]):
+        # Act
+        with RunMetrics.stage("scan"):
+            with RunMetrics.stage("probe"):
+                pass
+
+    # Assert
+    assert RunMetrics.RUN_STAGES == {"probe": 3, "scan": 2}
+
+def test_unknown_stage():
+    # Act & Assert
+    with pytest.raises(ValueError):
+        RunMetrics.add_timing("upload", 1.0)
+
+def test_percentile():
+    # Arrange
+    values = list(range(1, 11))
+
+    # Act & Assert
+    assert RunMetrics.percentile(values, 50) == 5
+    assert RunMetrics.percentile(values, 90) == 9
+    assert RunMetrics.percentile(values, 99) == 10
+    assert RunMetrics.percentile([], 50) == 0
+
+def test_summary():
+    # Arrange
+    RunMetrics.add_timing("scan", 0.5)
+    RunMetrics.add_timing("probe", 0.1, "a.mp4", "video")
+    RunMetrics.add_timing("encode", 5.0, "a.mp4", "video")
+    RunMetrics.record("a.mp4", media_duration=20.0)
+    RunMetrics.add_timing("encode", 0.2, "b.jpg", "image")
+    RunMetrics.add_timing("metadata", 0.05, "b.jpg", "image")
+
+    # Act
+    summary = RunMetrics.summary()
+
+    # Assert
+    assert summary["files"] == 2
+    assert summary["stages"]["scan"]["total_seconds"] == 0.5
+    assert summary["stages"]["encode"]["files"] == 2
+    assert summary["stages"]["encode"]["max_seconds"] == 5.0
+    assert summary["video_speed_vs_realtime"] == 4.0
+    assert summary["slowest_files"][0]["path"] == "a.mp4"
+    assert summary["slowest_files"][0]["speed_vs_realtime"] == 4.0
+
+def test_write(tmp_path):
+    # Arrange
+    RunMetrics.add_timing("encode", 1.0, "b.jpg", "image")
+
+    # Act
+    RunMetrics.write(str(tmp_path))
+
+    # Assert
+    with open(tmp_path / "metrics.json", encoding="utf-8") as metrics_file:
+        assert json.load(metrics_file)["files"] == 1
+
+def test_record_job_accumulates_sizes(tmp_path):
+    # Arrange
+    for name, size in [
+        ("a.mp4", 1000), ("a_out.mp4", 200), ("b.jpg", 300), ("b_out.jpg", 100), ("c.jpg", 50), ("d.mp4", 70),
+        ("d_partial.mp4", 20),
+    ]:
+        (tmp_path / name).write_bytes(b"x" * size)
+
+    # Act
+    RunMetrics.record_job("video", str(tmp_path / "a.mp4"), str(tmp_path / "a_out.mp4"), True)
+    RunMetrics.record_job("image", str(tmp_path / "b.jpg"), str(tmp_path / "b_out.jpg"), True)
+    RunMetrics.record_job("image", str(tmp_path / "c.jpg"), None, True)
+    RunMetrics.record_job("video", str(tmp_path / "d.mp4"), str(tmp_path / "d_partial.mp4"), False)
+    summary = RunMetrics.size_summary()
+
+    # Assert
+    assert summary["files"] == 2
+    assert summary["failed"] == 2
+    assert (summary["input_bytes"], summary["output_bytes"]) == (1300, 300)
+    assert summary["saved_ratio"] == round(1 - 300 / 1300, 4)
+    assert summary["by_type"]["image"] == {"files": 1, "failed": 1, "input_bytes": 300, "output_bytes": 100}
+    assert RunMetrics.summary()["sizes"] == summary
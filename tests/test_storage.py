@@ -0,0 +1,217 @@
+import os
+import shutil
+import threading
+import pytest
+from unittest import mock
+from utils.storage.passthrough import Passthrough
+from utils.storage.storage import Storage
+
+
+@pytest.fixture(autouse=True)
+def reset_storage():
+    with mock.patch.multiple(Storage, SCRATCH_DIRECTORY=None, VOLUME_IO_CONCURRENCY={}, VOLUME_SLOTS={}):
+        yield
+
+def test_staged_output_without_scratch(tmp_path):
+    # Arrange
+    output_file = str(tmp_path / "out" / "video.mp4")
+
+    # Act
+    with Storage.staged_output(output_file) as staging_file:
+        pass
+
+    # Assert
+    assert staging_file == output_file
+
+def test_staged_output_moves_on_completion(tmp_path):
+    # Arrange
+    Storage.SCRATCH_DIRECTORY = str(tmp_path / "scratch")
+    output_file = str(tmp_path / "out" / "video.mp4")
+
+    # Act
+    with Storage.staged_output(output_file) as staging_file:
+        with open(staging_file, "wb") as f:
+            f.write(b"encoded")
+        assert not os.path.exists(output_file)
+
+    # Assert
+    assert staging_file.startswith(Storage.SCRATCH_DIRECTORY)
+    assert os.path.basename(staging_file) == "video.mp4"
+    with open(output_file, "rb") as f:
+        assert f.read() == b"encoded"
+    assert os.listdir(Storage.SCRATCH_DIRECTORY) == []
+
+def test_staged_output_discards_failed_job(tmp_path):
+    # Arrange
+    Storage.SCRATCH_DIRECTORY = str(tmp_path / "scratch")
+    output_file = str(tmp_path / "out" / "video.mp4")
+
+    # Act
+    with pytest.raises(RuntimeError):
+        with Storage.staged_output(output_file) as staging_file:
+            with open(staging_file, "wb") as f:
+                f.write(b"partial")
+            raise RuntimeError("encode failed")
+
+    # Assert
+    assert not os.path.exists(output_file)
+    assert os.listdir(Storage.SCRATCH_DIRECTORY) == []
+
+def test_io_slot_limits_volume(tmp_path):
+    # Arrange
+    Storage.VOLUME_IO_CONCURRENCY = {str(tmp_path): 1}
+    entered = threading.Event()
+    release = threading.Event()
+
+    def hold_slot():
+        with Storage.io_slot(str(tmp_path / "a.mp4")):
+            entered.set()
+            release.wait(5)
+
+    holder = threading.Thread(target=hold_slot)
+    holder.start()
+    entered.wait(5)
+
+    # Act
+    slot = Storage.get_volume_slot(Storage.get_volume(str(tmp_path)))
+    acquired_while_held = slot.acquire(blocking=False)
+    release.set()
+    holder.join(5)
+
+    # Assert
+    assert acquired_while_held is False
+    with Storage.io_slot(str(tmp_path / "a.mp4"), str(tmp_path / "missing" / "b.mp4")):
+        pass
+
+def test_staged_output_moves_under_io_slot(tmp_path):
+    # Arrange
+    Storage.SCRATCH_DIRECTORY = str(tmp_path / "scratch")
+    Storage.VOLUME_IO_CONCURRENCY = {str(tmp_path): 1}
+    output_file = str(tmp_path / "out" / "video.mp4")
+    slot = Storage.get_volume_slot(Storage.get_volume(str(tmp_path)))
+    held = []
+    move = shutil.move
+
+    def is_held():
+        if not slot.acquire(blocking=False):
+            return True
+        slot.release()
+        return False
+
+    def record_slot(source, destination):
+        held.append(is_held())
+        return move(source, destination)
+
+    # Act
+    with mock.patch("utils.storage.storage.shutil.move", side_effect=record_slot):
+        with Storage.staged_output(output_file) as staging_file:
+            held.append(is_held())
+            with open(staging_file, "wb") as f:
+                f.write(b"encoded")
+
+    # Assert
+    assert held == [False, True]
+    assert os.path.exists(output_file)
+
+def test_read_file_releases_slot(tmp_path):
+    # Arrange
+    Storage.VOLUME_IO_CONCURRENCY = {str(tmp_path): 1}
+    source = tmp_path / "image.jpg"
+    source.write_bytes(b"image")
+
+    # Act
+    data = Storage.read_file(str(source))
+
+    # Assert
+    assert data == b"image"
+    assert Storage.get_volume_slot(Storage.get_volume(str(tmp_path))).acquire(blocking=False) is True
+
+def test_io_concurrency_for_rotational_volume():
+    # Act
+    with mock.patch.object(Storage, "is_rotational", return_value=True):
+        limit = Storage.get_io_concurrency(12345)
+
+    # Assert
+    assert limit == 1
+
+def test_is_rotational_unknown_off_posix():
+    # Act
+    with mock.patch("utils.storage.storage.os.name", "nt"):
+        rotational = Storage.is_rotational(12345)
+
+    # Assert
+    assert rotational is None
+
+@pytest.mark.parametrize("modes,expected_mode", [(["hardlink"], "hardlink"), (["copy"], "copy")])
+def test_clone_file(tmp_path, modes, expected_mode):
+    # Arrange
+    source = tmp_path / "notes.txt"
+    source.write_bytes(b"notes" * 1000)
+    destination = tmp_path / "mirror" / "notes.txt"
+    destination.parent.mkdir()
+
+    # Act
+    mode = Storage.clone_file(str(source), str(destination), modes)
+
+    # Assert
+    assert mode == expected_mode
+    assert destination.read_bytes() == source.read_bytes()
+    assert os.path.samefile(source, destination) is (expected_mode == "hardlink")
+
+def test_clone_file_falls_back_when_reflink_unsupported(tmp_path):
+    # Arrange
+    source = tmp_path / "notes.txt"
+    source.write_bytes(b"notes")
+    destination = tmp_path / "copy.txt"
+
+    with mock.patch.object(Storage, "reflink", side_effect=OSError("not supported")):
+        # Act
+        mode = Storage.clone_file(str(source), str(destination), ["reflink", "copy"])
+
+    # Assert
+    assert mode == "copy"
+    assert destination.read_bytes() == b"notes"
+
+def make_passthrough_tree(tmp_path):
+    input_directory = tmp_path / "input"
+    (input_directory / "docs").mkdir(parents=True)
+    (input_directory / "docs" / "readme.txt").write_text("readme")
+    (input_directory / "video.mp4").write_bytes(b"video")
+    prior_run = input_directory / "output_01-01-2025_00-00-00"
+    prior_run.mkdir()
+    (prior_run / "metrics.json").write_text("{}")
+    output_directory = input_directory / "output_02-01-2025_00-00-00"
+    output_directory.mkdir()
+    (output_directory / "app.log").write_text("log")
+    return input_directory, output_directory
+
+def test_passthrough_walk_mirrors_unhandled_files(tmp_path):
+    # Arrange
+    input_directory, output_directory = make_passthrough_tree(tmp_path)
+    passthrough = Passthrough(str(input_directory), str(output_directory), [".mp4"], modes=["copy"])
+
+    # Act
+    claimed = passthrough.claim_walk()
+    passthrough.walk()
+
+    # Assert
+    assert claimed is True
+    assert passthrough.claim_walk() is False
+    assert (output_directory / "docs" / "readme.txt").read_text() == "readme"
+    assert not (output_directory / "video.mp4").exists()
+    assert not (output_directory / "output_01-01-2025_00-00-00").exists()
+    assert passthrough.summary() == {"copy": 1}
+
+def test_passthrough_skipped_media_is_mirrored(tmp_path):
+    # Arrange
+    input_directory, output_directory = make_passthrough_tree(tmp_path)
+    passthrough = Passthrough(str(input_directory), str(output_directory), [".mp4"], modes=["copy"])
+
+    # Act
+    passthrough.skipped(str(input_directory / "video.mp4"))
+    passthrough.other(str(input_directory / "video.mp4"))
+    passthrough.skipped(str(output_directory / "app.log"))
+
+    # Assert
+    assert (output_directory / "video.mp4").read_bytes() == b"video"
+    assert passthrough.summary() == {"copy": 1}
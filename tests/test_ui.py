@@ -1,4 +1,5 @@
 import pytest
+from datetime import datetime
 from unittest import mock
 from ui.ui import CompressorApp
 
@@ -243,7 +244,7 @@ def test_setup_running_ui(app):
         mock_progress_bar.pack.assert_called_once_with(pady=10)
         mock_progress_bar.set.assert_called_once_with(0)
 
-        assert MockLabel.call_count == 4
+        assert MockLabel.call_count == 5
         mock_label.pack.assert_any_call()
 
         MockButton.assert_called_once_with(app, text="Stop Compression", command=app.stop_operation)
@@ -252,3 +253,84 @@ def test_setup_running_ui(app):
         # Ensure compress_media starts in a new thread
         mock_thread.assert_called_once_with(target=app.compress_media, args=(app.directory,))
         mock_thread_instance.start.assert_called_once()
+
+def test_compress_media_queues_events(app):
+    # Arrange
+    def start_compression(**kwargs):
+        kwargs["progress_callback"](0.5, "/test/path/video.mp4", 1, 2)
+        return {"input_bytes": 100, "output_bytes": 40}
+
+    app.widgets["progress_bar"] = mock.Mock()
+    with mock.patch("ui.ui.Handler.start_compression", side_effect=start_compression), \
+         mock.patch("ui.ui.Handler.cleanup_logging"):
+        # Act
+        app.compress_media("/test/path")
+
+    # Assert
+    app.widgets["progress_bar"].set.assert_not_called()
+    events = [app.progress_queue.get_nowait() for _ in range(app.progress_queue.qsize())]
+    assert events == [
+        ("progress", 0.5, "/test/path/video.mp4", 1, 2),
+        ("completed", {"input_bytes": 100, "output_bytes": 40}),
+        ("finished",),
+    ]
+
+def test_poll_progress_coalesces_events(app):
+    # Arrange
+    app.running = True
+    app.start_time = datetime.now()
+    for name in ["progress_bar", "elapsed_time_label", "eta_label", "current_file_label", "file_count_label", "jobs_label"]:
+        app.widgets[name] = mock.Mock()
+    for index in range(1, 51):
+        app.progress_queue.put(("progress", index / 100, f"/test/video{index}.mp4", index, 100))
+
+    with mock.patch.object(app, "after") as mock_after:
+        # Act
+        app.poll_progress()
+
+    # Assert
+    app.widgets["progress_bar"].set.assert_called_once_with(0.5)
+    app.widgets["file_count_label"].configure.assert_called_once_with(text="Processed: 50/100")
+    mock_after.assert_called_once_with(app.PROGRESS_REFRESH_MS, app.poll_progress)
+
+def test_poll_progress_finished(app, mock_messagebox):
+    # Arrange
+    app.running = True
+    app.start_time = datetime.now()
+    for name in ["progress_bar", "elapsed_time_label", "eta_label", "current_file_label", "file_count_label", "jobs_label"]:
+        app.widgets[name] = mock.Mock()
+    run_summary = {
+        "output_directory": "/test/path/output", "files": 1, "failed": 0, "input_bytes": 100, "output_bytes": 40,
+        "saved_ratio": 0.6, "by_type": {"video": {"files": 1, "failed": 0, "input_bytes": 100, "output_bytes": 40}},
+    }
+    app.progress_queue.put(("completed", run_summary))
+    app.progress_queue.put(("finished",))
+
+    with mock.patch.object(app, "after") as mock_after, \
+         mock.patch.object(app, "setup_initial_ui") as mock_setup_ui:
+        # Act
+        app.poll_progress()
+
+    # Assert
+    assert app.running is False
+    assert app.run_summary == run_summary
+    mock_messagebox.assert_called_once()
+    mock_setup_ui.assert_called_once()
+    mock_after.assert_not_called()
+
+def test_poll_progress_renders_jobs(app):
+    # Arrange
+    app.running = True
+    app.start_time = datetime.now()
+    for name in ["progress_bar", "elapsed_time_label", "eta_label", "current_file_label", "file_count_label", "jobs_label"]:
+        app.widgets[name] = mock.Mock()
+    snapshot = {"jobs": [], "completed": 0, "elapsed": 0, "realtime_speed": 0.0, "megapixels_per_second": 0.0}
+
+    with mock.patch.object(app, "after"), \
+         mock.patch("ui.ui.ProgressTracker.snapshot", return_value=snapshot), \
+         mock.patch("ui.ui.ProgressTracker.format_lines", return_value=["video1.mp4  50%  2.00x", "Active: 1"]):
+        # Act
+        app.poll_progress()
+
+    # Assert
+    app.widgets["jobs_label"].configure.assert_called_once_with(text="video1.mp4  50%  2.00x\nActive: 1")
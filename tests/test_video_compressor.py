@@ -1,4 +1,5 @@
 import json
+from fractions import Fraction
 import logging
 import subprocess
 import pytest
@@ -25,6 +26,11 @@ def mock_ffmpeg():
         yield mock_probe, mock_input
         
 
+@pytest.fixture
+def mock_probe_video():
+    with mock.patch.object(VideoCompressor, "probe_video", return_value={"format": {}, "streams": []}) as mock_probe:
+        yield mock_probe
+
 @pytest.fixture
 def mock_os_walk():
     with mock.patch('os.walk') as mock_walk:
@@ -48,7 +54,7 @@ def test_is_video_processed(mock_logger):
     })
     mock_result.returncode = 0
 
-    with mock.patch('subprocess.run', return_value=mock_result):
+    with mock.patch('utils.video.video_compressor.ProcessRunner.run', return_value=mock_result):
         # Act
         result = VideoCompressor.is_video_processed(file_path)
 
@@ -69,7 +75,7 @@ def test_is_video_processed_uncompressed(mock_logger):
     })
     mock_result.returncode = 0
 
-    with mock.patch('subprocess.run', return_value=mock_result):
+    with mock.patch('utils.video.video_compressor.ProcessRunner.run', return_value=mock_result):
         # Act
         result = VideoCompressor.is_video_processed(file_path)
 
@@ -82,7 +88,7 @@ def test_is_video_processed_error(mock_logger):
     file_path = "path/to/video.mp4"
     mock_error = Exception("ffprobe error")
     
-    with mock.patch('subprocess.run', side_effect=mock_error):
+    with mock.patch('utils.video.video_compressor.ProcessRunner.run', side_effect=mock_error):
         # Act
         result = VideoCompressor.is_video_processed(file_path)
 
@@ -103,7 +109,7 @@ def test_get_bitrate(mock_logger):
     })
     mock_result.returncode = 0
 
-    with mock.patch('subprocess.run', return_value=mock_result):
+    with mock.patch('utils.video.video_compressor.ProcessRunner.run', return_value=mock_result):
         # Act
         result = VideoCompressor.get_bitrate(input_file)
 
@@ -116,7 +122,7 @@ def test_get_bitrate_error(mock_logger):
     input_file = "path/to/video.mp4"
     mock_error = Exception("ffprobe error")
     
-    with mock.patch('subprocess.run', side_effect=mock_error):
+    with mock.patch('utils.video.video_compressor.ProcessRunner.run', side_effect=mock_error):
         # Act & Assert
         with pytest.raises(Exception) as exc_info:
             VideoCompressor.get_bitrate(input_file)
@@ -161,27 +167,27 @@ def test_is_codec_available_error(mock_ffmpeg, mock_logger):
 
 def test_select_best_codec(mock_ffmpeg, mock_logger):
     # Arrange
-    VideoCompressor.is_codec_available = mock.MagicMock(return_value=True)
 
     # Act
-    result = VideoCompressor.select_best_codec()
+    with mock.patch.object(VideoCompressor, "is_codec_available", return_value=True):
+        result = VideoCompressor.select_best_codec()
 
     # Assert
     assert result == VIDEO_CODECS[0]
 
 def test_select_best_codec_no_available(mock_ffmpeg, mock_logger):
     # Arrange
-    VideoCompressor.is_codec_available = mock.MagicMock(return_value=False)
 
     # Act
-    with pytest.raises(RuntimeError, match="No supported video codec is available."):
+    with mock.patch.object(VideoCompressor, "is_codec_available", return_value=False), \
+         pytest.raises(RuntimeError, match="No supported video codec is available."):
         VideoCompressor.select_best_codec()
         
     # Assert
     mock_logger.error.assert_not_called()
 
-@patch('subprocess.run')
-def test_compress_video_qsv(mock_subprocess_run, mock_logger):
+@patch('utils.video.video_compressor.ProcessRunner.run')
+def test_compress_video_qsv(mock_subprocess_run, mock_logger, mock_probe_video):
     # Arrange
     input_file = "path/to/input.mp4" 
     output_file = "path/to/output.mp4"
@@ -220,7 +226,7 @@ def test_compress_video_qsv_subprocess_error(mock_logger):
         1, "cmd", stderr=error_message
     )
 
-    with mock.patch("subprocess.run", side_effect=mock_error):
+    with mock.patch("utils.video.video_compressor.ProcessRunner.run", side_effect=mock_error):
         # Act
         VideoCompressor.compress_video_qsv(input_file, output_file, bitrate, framerate)
 
@@ -234,10 +240,10 @@ def test_get_video_files(mock_os_walk, mock_os_path_isdir, mock_logger):
     input_directory = "path/to/videos"
     mock_os_walk.return_value = [(input_directory, [], ["video1.mp4", "video2.avi"])]
     mock_os_path_isdir.return_value = True
-    VideoCompressor.is_video_processed = mock.MagicMock(return_value=False)
 
     # Act
-    result = VideoCompressor.get_video_files(input_directory)
+    with mock.patch.object(VideoCompressor, "is_video_processed", return_value=False):
+        result = VideoCompressor.get_video_files(input_directory)
 
     # Assert
     assert "video1.mp4" in [os.path.basename(file) for file in result]
@@ -247,10 +253,10 @@ def test_get_video_files_processed(mock_os_walk, mock_logger):
     # Arrange
     input_directory = "path/to/videos"
     mock_os_walk.return_value = [(input_directory, [], ["video1.mp4", "video2.avi"])]
-    VideoCompressor.is_video_processed = mock.MagicMock(return_value=True)
 
     # Act
-    result = VideoCompressor.get_video_files(input_directory)
+    with mock.patch.object(VideoCompressor, "is_video_processed", return_value=True):
+        result = VideoCompressor.get_video_files(input_directory)
 
     # Assert
     assert len(result) == 0
@@ -265,12 +271,13 @@ def test_compress_videos_in_directory(mock_os_walk, mock_os_path_isdir, mock_log
     
     with mock.patch.multiple(VideoCompressor,
         select_best_codec=mock.Mock(return_value="h264_qsv"),
-        get_video_files=mock.Mock(return_value=["path/to/input/video1.mp4", "path/to/input/video2.avi"]),
+        iter_video_files=mock.Mock(return_value=["path/to/input/video1.mp4", "path/to/input/video2.avi"]),
         get_bitrate=mock.Mock(return_value="1000K"),
         compress_video=mock.Mock(),
         is_video_processed=mock.Mock(return_value=False)), \
         mock.patch('os.path.getsize', return_value=1000000), \
-        mock.patch('os.makedirs'):
+        mock.patch('os.makedirs'), \
+        mock.patch('utils.video.video_compressor.setup_logging'):
 
         # Act
         VideoCompressor.compress_videos_in_directory(
@@ -281,12 +288,18 @@ def test_compress_videos_in_directory(mock_os_walk, mock_os_path_isdir, mock_log
 
         # Assert
         VideoCompressor.select_best_codec.assert_called_once()
-        VideoCompressor.get_video_files.assert_called_once_with(input_directory)
+        VideoCompressor.iter_video_files.assert_called_once_with(
+            input_directory, settings=mock.ANY, passthrough=None, output_directory=output_directory
+        )
         assert VideoCompressor.compress_video.call_count == 2
+        VideoCompressor.compress_video.assert_any_call(
+            "path/to/input/video1.mp4", mock.ANY, "1000K", "h264_qsv", None, None, None, None, None, job_id=mock.ANY,
+            resources=mock.ANY
+        )
         progress_callback.assert_called()
 
-@patch('subprocess.run')
-def test_compress_video_cpu(mock_subprocess_run, mock_logger):
+@patch('utils.video.video_compressor.ProcessRunner.run')
+def test_compress_video_cpu(mock_subprocess_run, mock_logger, mock_probe_video):
     # Arrange
     input_file = "path/to/input.mp4"
     output_file = "path/to/output.mp4"
@@ -324,7 +337,7 @@ def test_compress_video_cpu_error(mock_logger):
         1, "cmd", stderr=error_message.encode()
     )
 
-    with mock.patch("subprocess.run", side_effect=mock_error):
+    with mock.patch("utils.video.video_compressor.ProcessRunner.run", side_effect=mock_error):
         # Act
         VideoCompressor.compress_video_cpu(input_file, output_file, bitrate, framerate)
 
@@ -333,7 +346,7 @@ def test_compress_video_cpu_error(mock_logger):
             f"An error occurred while encoding: {input_file}. ERROR MESSAGE: {error_message}"
         )
 
-@patch('subprocess.run')
+@patch('utils.video.video_compressor.ProcessRunner.run')
 def test_convert_incompatible_video(mock_subprocess_run, mock_logger):
     # Arrange
     input_file = "path/to/input.mkv"
@@ -367,7 +380,7 @@ def test_convert_incompatible_video_error(mock_logger):
         1, "cmd", stderr=error_message.encode()
     )
 
-    with mock.patch("subprocess.run", side_effect=mock_error):
+    with mock.patch("utils.video.video_compressor.ProcessRunner.run", side_effect=mock_error):
         # Act
         VideoCompressor.convert_incompatible_video(input_file, output_file)
 
@@ -389,7 +402,8 @@ def test_convert_incompatible_videos_in_directory_and_compress(mock_os_walk, moc
         convert_incompatible_video=mock.Mock(),
         is_video_processed=mock.Mock(return_value=False)), \
         mock.patch('os.path.getsize', return_value=1000000), \
-        mock.patch('os.makedirs'):
+        mock.patch('os.makedirs'), \
+        mock.patch('utils.video.video_compressor.setup_logging'):
 
         # Act
         VideoCompressor.convert_incompatible_videos_in_directory_and_compress(
@@ -401,12 +415,13 @@ def test_convert_incompatible_videos_in_directory_and_compress(mock_os_walk, moc
         # Assert
         VideoCompressor.get_video_files.assert_called_once_with(
             input_directory, 
-            filetypes=[".h264"]
+            filetypes=[".h264"],
+            passthrough=None
         )
         assert VideoCompressor.convert_incompatible_video.call_count == 2
         progress_callback.assert_called()
 
-@patch('subprocess.run')
+@patch('utils.video.video_compressor.ProcessRunner.run')
 def test_convert_incompatible_video(mock_subprocess_run, mock_logger):
     # Arrange
     input_file = "path/to/input.mkv"
@@ -440,7 +455,7 @@ def test_convert_incompatible_video_error(mock_logger):
         1, "cmd", stderr=error_message.encode()
     )
 
-    with mock.patch("subprocess.run", side_effect=mock_error):
+    with mock.patch("utils.video.video_compressor.ProcessRunner.run", side_effect=mock_error):
         # Act
         VideoCompressor.convert_incompatible_video(input_file, output_file)
 
@@ -452,9 +467,10 @@ def test_convert_incompatible_video_error(mock_logger):
 @mock.patch('utils.handler.handler.VideoCompressor')
 @mock.patch('utils.handler.handler.ImageCompressor')
 @mock.patch('utils.handler.handler.setup_logging')
-def test_start_compression(mock_setup_logging, mock_image_compressor, mock_video_compressor, mock_logger):
+def test_start_compression(mock_setup_logging, mock_image_compressor, mock_video_compressor, tmp_path, mock_logger):
     # Arrange
-    input_directory = "path/to/input"
+    input_directory = str(tmp_path / "input")
+    os.mkdir(input_directory)
     process_video = True
     process_image = True 
     convert_incompatible = True
@@ -474,16 +490,564 @@ def test_start_compression(mock_setup_logging, mock_image_compressor, mock_video
     mock_video_compressor.compress_videos_in_directory.assert_called_once_with(
         input_directory, 
         mock.ANY, 
-        progress_callback
+        progress_callback,
+        passthrough=None
     )
     mock_image_compressor.compress_images_in_directory.assert_called_once_with(
         input_directory,
         mock.ANY,  
-        progress_callback
+        progress_callback,
+        passthrough=None
     )
     mock_video_compressor.convert_incompatible_videos_in_directory_and_compress.assert_called_once_with(
         input_directory,
         mock.ANY,  
-        progress_callback
+        progress_callback,
+        passthrough=None
     )
 
+
+@mock.patch('utils.handler.handler.VideoCompressor')
+@mock.patch('utils.handler.handler.ImageCompressor')
+@mock.patch('utils.handler.handler.setup_logging')
+def test_start_compression_output_root(mock_setup_logging, mock_image_compressor, mock_video_compressor, tmp_path, mock_logger):
+    # Arrange
+    input_directory = tmp_path / "media"
+    input_directory.mkdir()
+    output_root = tmp_path / "target"
+
+    # Act
+    with mock.patch.object(Handler, "OUTPUT_ROOT", str(output_root)):
+        Handler.start_compression(str(input_directory), True, False, False)
+
+    # Assert
+    output_directory = mock_video_compressor.compress_videos_in_directory.call_args[0][1]
+    assert os.path.dirname(output_directory) == str(output_root)
+    assert os.path.basename(output_directory).startswith("media_output_")
+
+
+def make_probe_result(height=1080, bit_rate="5000000"):
+    result = mock.Mock()
+    result.stdout = json.dumps({
+        "format": {"bit_rate": bit_rate},
+        "streams": [{"codec_type": "video", "height": height}],
+    })
+    return result
+
+@pytest.mark.parametrize("height,expected_crf", [(2160, 26), (1080, 24), (720, 23), (480, 22)])
+def test_get_crf(height, expected_crf, mock_logger):
+    # Arrange
+    with mock.patch('utils.video.video_compressor.ProcessRunner.run', return_value=make_probe_result(height)):
+        # Act
+        result = VideoCompressor.get_crf("path/to/video.mp4")
+
+    # Assert
+    assert result == expected_crf
+
+def test_get_rate_control_args_capped_crf(mock_logger):
+    # Arrange
+    with mock.patch('utils.video.video_compressor.ProcessRunner.run', return_value=make_probe_result(720)):
+        # Act
+        result = VideoCompressor.get_rate_control_args("path/to/video.mp4", "1000K", "capped_crf", "libx264")
+
+    # Assert
+    assert result == ["-crf", "23", "-maxrate", "1000K", "-bufsize", "2000K"]
+
+def test_get_rate_control_args_qsv_crf(mock_logger):
+    # Arrange
+    with mock.patch('utils.video.video_compressor.ProcessRunner.run', return_value=make_probe_result(1080)):
+        # Act
+        result = VideoCompressor.get_rate_control_args("path/to/video.mp4", "1000K", "crf", "h264_qsv")
+
+    # Assert
+    assert result == ["-global_quality", "24"]
+
+def test_get_rate_control_args_unknown(mock_logger):
+    # Act & Assert
+    with pytest.raises(ValueError):
+        VideoCompressor.get_rate_control_args("path/to/video.mp4", "1000K", "vbr", "libx264")
+
+@patch('utils.video.video_compressor.ProcessRunner.run')
+def test_compress_video_cpu_crf_with_preset(mock_subprocess_run, mock_logger):
+    # Arrange
+    input_file = "path/to/input.mp4"
+    output_file = "path/to/output.mp4"
+    mock_subprocess_run.return_value = make_probe_result(2160)
+
+    # Act
+    VideoCompressor.compress_video_cpu(input_file, output_file, "1000K", 30, "crf", "veryfast")
+
+    # Assert
+    assert mock_subprocess_run.call_args[0][0] == [
+        'ffmpeg',
+        '-i', input_file,
+        '-crf', '26',
+        '-vcodec', 'libx264',
+        '-r', '30',
+        '-metadata', 'comment=compressed',
+        '-preset', 'veryfast',
+        '-loglevel', 'error',
+        output_file
+    ]
+
+@patch('utils.video.video_compressor.ProcessRunner.run')
+def test_compress_video_cpu_two_pass(mock_subprocess_run, mock_logger, mock_probe_video):
+    # Arrange
+    input_file = "path/to/input.mp4"
+    output_file = "path/to/output.mp4"
+    mock_subprocess_run.return_value = mock.Mock(returncode=0)
+
+    # Act
+    VideoCompressor.compress_video_cpu(input_file, output_file, "1000K", 30, "two_pass")
+
+    # Assert
+    assert mock_subprocess_run.call_count == 2
+    first_pass = mock_subprocess_run.call_args_list[0][0][0]
+    second_pass = mock_subprocess_run.call_args_list[1][0][0]
+    assert first_pass[first_pass.index("-pass") + 1] == "1"
+    assert first_pass[first_pass.index("-f") + 1] == "null"
+    assert first_pass[-1] == "-"
+    assert second_pass[second_pass.index("-pass") + 1] == "2"
+    assert second_pass[-1] == output_file
+    assert first_pass[first_pass.index("-passlogfile") + 1] == second_pass[second_pass.index("-passlogfile") + 1]
+
+def test_probe_video_cached(tmp_path, mock_logger):
+    # Arrange
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"data")
+
+    with mock.patch('utils.video.video_compressor.ProcessRunner.run', return_value=make_probe_result()) as mock_run:
+        # Act
+        VideoCompressor.probe_video(str(video))
+        VideoCompressor.probe_video(str(video))
+        video.write_bytes(b"modified data")
+        VideoCompressor.probe_video(str(video))
+
+    # Assert
+    assert mock_run.call_count == 2
+
+def make_stream_probe_result(height=2160, avg_frame_rate="60000/1001", bit_rate="40000000"):
+    result = mock.Mock()
+    result.stdout = json.dumps({
+        "format": {"bit_rate": bit_rate},
+        "streams": [{"codec_type": "video", "height": height, "avg_frame_rate": avg_frame_rate}],
+    })
+    return result
+
+@pytest.mark.parametrize("framerate,max_framerate,avg_frame_rate,expected", [
+    (None, None, "60000/1001", None),
+    (None, 30, "24000/1001", None),
+    (None, 30, "60000/1001", 30),
+    (25, 30, "60000/1001", 25),
+])
+def test_get_output_framerate(framerate, max_framerate, avg_frame_rate, expected, mock_logger):
+    # Arrange
+    with mock.patch('utils.video.video_compressor.ProcessRunner.run', return_value=make_stream_probe_result(avg_frame_rate=avg_frame_rate)):
+        # Act
+        result = VideoCompressor.get_output_framerate("path/to/video.mp4", framerate, max_framerate)
+
+    # Assert
+    assert result == expected
+
+def test_get_source_framerate_unknown(mock_logger):
+    # Act
+    result = VideoCompressor.get_source_framerate({"streams": [{"codec_type": "video", "avg_frame_rate": "0/0"}]})
+
+    # Assert
+    assert result is None
+
+@pytest.mark.parametrize("max_height,expected", [
+    (None, []),
+    (1080, ["-vf", "scale=-2:1080"]),
+    (4320, []),
+])
+def test_get_filter_args(max_height, expected, mock_logger):
+    # Arrange
+    with mock.patch('utils.video.video_compressor.ProcessRunner.run', return_value=make_stream_probe_result(height=2160)):
+        # Act
+        result = VideoCompressor.get_filter_args("path/to/video.mp4", max_height)
+
+    # Assert
+    assert result == expected
+
+def test_get_bitrate_scaled_by_output_height(mock_logger):
+    # Arrange
+    with mock.patch('utils.video.video_compressor.ProcessRunner.run', return_value=make_stream_probe_result(height=2160, bit_rate="40000000")):
+        # Act
+        result = VideoCompressor.get_bitrate("path/to/video.mp4", 1080)
+
+    # Assert
+    assert result == "2000K"  # 40Mbps / 5, then a quarter of the pixels
+
+@patch('utils.video.video_compressor.ProcessRunner.run')
+def test_compress_video_cpu_preserves_framerate_and_downscales(mock_subprocess_run, mock_logger):
+    # Arrange
+    input_file = "path/to/input.mp4"
+    output_file = "path/to/output.mp4"
+    mock_subprocess_run.return_value = make_stream_probe_result(height=2160)
+
+    # Act
+    VideoCompressor.compress_video_cpu(input_file, output_file, "1000K", None, "abr", None, 720)
+
+    # Assert
+    assert mock_subprocess_run.call_args[0][0] == [
+        'ffmpeg',
+        '-i', input_file,
+        '-b:v', '1000K',
+        '-vcodec', 'libx264',
+        '-vf', 'scale=-2:720',
+        '-metadata', 'comment=compressed',
+        '-loglevel', 'error',
+        output_file
+    ]
+
+def make_audio_probe_result(audio_codecs, video_bit_rate=None, audio_bit_rate="128000", bit_rate="5128000"):
+    video_stream = {"codec_type": "video", "height": 1080}
+    if video_bit_rate:
+        video_stream["bit_rate"] = video_bit_rate
+    result = mock.Mock()
+    result.stdout = json.dumps({
+        "format": {"bit_rate": bit_rate},
+        "streams": [video_stream] + [
+            {"codec_type": "audio", "codec_name": codec, "bit_rate": audio_bit_rate} for codec in audio_codecs
+        ],
+    })
+    return result
+
+@pytest.mark.parametrize("audio_codecs,output_file,expected", [
+    (["aac"], "out/video.mp4", ["-c:a", "copy"]),
+    (["pcm_s16le"], "out/video.mp4", ["-c:a", "aac", "-b:a", "128k"]),
+    (["aac"], "out/video.webm", ["-c:a", "libopus", "-b:a", "128k"]),
+    (["aac", "mp3"], "out/video.mkv", ["-c:a", "copy"]),
+    ([], "out/video.mp4", []),
+])
+def test_get_audio_args_auto(audio_codecs, output_file, expected, mock_logger):
+    # Arrange
+    with mock.patch('utils.video.video_compressor.ProcessRunner.run', return_value=make_audio_probe_result(audio_codecs)):
+        # Act
+        result = VideoCompressor.get_audio_args("path/to/video.mp4", output_file, "auto")
+
+    # Assert
+    assert result == expected
+
+@pytest.mark.parametrize("audio_policy,expected", [
+    ("drop", ["-an"]),
+    ("copy", ["-c:a", "copy"]),
+    ("aac", ["-c:a", "aac", "-b:a", "128k"]),
+])
+def test_get_audio_args_fixed_policies(audio_policy, expected, mock_logger):
+    # Arrange
+    with mock.patch('utils.video.video_compressor.ProcessRunner.run') as mock_run:
+        # Act
+        result = VideoCompressor.get_audio_args("path/to/video.mp4", "out/video.mp4", audio_policy)
+
+    # Assert
+    assert result == expected
+    mock_run.assert_not_called()
+
+def test_get_audio_args_probe_error(mock_logger):
+    # Arrange
+    with mock.patch('utils.video.video_compressor.ProcessRunner.run', side_effect=Exception("ffprobe error")):
+        # Act
+        result = VideoCompressor.get_audio_args("path/to/video.mp4", "out/video.mp4", "auto")
+
+    # Assert
+    assert result == []
+    mock_logger.warning.assert_called_once()
+
+def test_get_bitrate_uses_video_stream(mock_logger):
+    # Arrange
+    probe_result = make_audio_probe_result(["aac"], video_bit_rate="4000000", bit_rate="9000000")
+    with mock.patch('utils.video.video_compressor.ProcessRunner.run', return_value=probe_result):
+        # Act
+        result = VideoCompressor.get_bitrate("path/to/video.mp4")
+
+    # Assert
+    assert result == "800K"
+
+def test_get_bitrate_subtracts_audio(mock_logger):
+    # Arrange
+    probe_result = make_audio_probe_result(["aac"], audio_bit_rate="1000000", bit_rate="6000000")
+    with mock.patch('utils.video.video_compressor.ProcessRunner.run', return_value=probe_result):
+        # Act
+        result = VideoCompressor.get_bitrate("path/to/video.mp4")
+
+    # Assert
+    assert result == "1000K"
+
+def test_compress_video_falls_back_to_cpu(tmp_path, mock_logger):
+    # Arrange
+    output_file = str(tmp_path / "out" / "output.mp4")
+    with mock.patch.object(VideoCompressor, "compress_video_qsv", return_value=False) as mock_qsv, \
+         mock.patch.object(VideoCompressor, "compress_video_cpu", return_value=True) as mock_cpu, \
+         mock.patch("os.path.exists", return_value=False):
+        # Act
+        VideoCompressor.compress_video("path/to/input.mp4", output_file, "1000K", "h264_qsv")
+
+    # Assert
+    mock_qsv.assert_called_once()
+    mock_cpu.assert_called_once()
+    mock_logger.warning.assert_called_once()
+
+def test_compress_video_failure_removes_partial_output(tmp_path, mock_logger):
+    # Arrange
+    output_file = tmp_path / "output.mp4"
+
+    def fail(input_file, output_file, *args):
+        with open(output_file, "wb") as partial:
+            partial.write(b"partial")
+        return False
+
+    with mock.patch.object(VideoCompressor, "compress_video_cpu", side_effect=fail):
+        # Act
+        result = VideoCompressor.compress_video("path/to/input.mp4", str(output_file), "1000K", "libx264")
+
+    # Assert
+    assert result is False
+    assert not output_file.exists()
+
+def test_compress_videos_in_directory_failed_encode_not_recorded(tmp_path, mock_logger):
+    # Arrange
+    input_file = tmp_path / "clip.mp4"
+    input_file.write_bytes(b"video")
+    output_directory = tmp_path / "output"
+
+    with mock.patch.multiple(VideoCompressor,
+        select_best_codec=mock.Mock(return_value="libx264"),
+        iter_video_files=mock.Mock(return_value=[str(input_file)]),
+        get_bitrate=mock.Mock(return_value="1000K"),
+        get_output_framerate=mock.Mock(return_value=None),
+        get_duration=mock.Mock(return_value=1.0),
+        compress_video=mock.Mock(return_value=False)), \
+        mock.patch('utils.video.video_compressor.setup_logging'), \
+        mock.patch('utils.video.video_compressor.Manifest.record') as mock_record, \
+        mock.patch('utils.video.video_compressor.RunMetrics.record_job') as mock_record_job:
+        # Act
+        VideoCompressor.compress_videos_in_directory(str(tmp_path), str(output_directory))
+
+    # Assert
+    mock_record.assert_not_called()
+    mock_record_job.assert_called_once_with("video", str(input_file), mock.ANY, False)
+
+def test_run_encode_streams_progress(mock_logger):
+    # Arrange
+    def run(cmd, **kwargs):
+        for line in [b"out_time_us=5000000\n", b"speed=2.5x\n", b"progress=continue\n"]:
+            kwargs["on_stdout_line"](line)
+        return subprocess.CompletedProcess(cmd, 0, b"", b"")
+
+    cmd = ["ffmpeg", "-i", "in.mp4", "-loglevel", "error", "out.mp4"]
+
+    with mock.patch("utils.video.video_compressor.ProcessRunner.run", side_effect=run) as mock_run, \
+         mock.patch("utils.video.video_compressor.ProgressTracker.update_from_ffmpeg") as mock_update:
+        # Act
+        VideoCompressor.run_encode(cmd, job_id=7)
+
+    # Assert
+    assert mock_run.call_args[0][0] == [
+        "ffmpeg", "-i", "in.mp4", "-loglevel", "error", "-progress", "pipe:1", "-nostats", "out.mp4"
+    ]
+    assert mock_run.call_args[1]["check"] is True
+    mock_update.assert_called_once_with(
+        7, {"out_time_us": "5000000", "speed": "2.5x", "progress": "continue"}
+    )
+
+@patch('utils.video.video_compressor.ProcessRunner.run')
+def test_compress_video_cpu_timeout(mock_subprocess_run, mock_logger, mock_probe_video):
+    # Arrange
+    mock_subprocess_run.side_effect = subprocess.TimeoutExpired("ffmpeg", 10, stderr=b"")
+
+    # Act
+    result = VideoCompressor.compress_video_cpu("path/to/input.mp4", "path/to/output.mp4", "1000K")
+
+    # Assert
+    assert result is False
+    mock_logger.error.assert_called_once()
+
+@patch('utils.video.video_compressor.ProcessRunner.run')
+def test_compress_video_cpu_partitioned_threads(mock_subprocess_run, mock_logger, mock_probe_video):
+    # Arrange
+    mock_subprocess_run.return_value = mock.Mock(returncode=0)
+    resources = {"threads": 4, "cpus": None, "nice": None, "ionice": None, "ionice_level": 7}
+
+    # Act
+    VideoCompressor.compress_video_cpu("path/to/input.mp4", "path/to/output.mp4", "1000K", resources=resources)
+
+    # Assert
+    cmd = mock_subprocess_run.call_args[0][0]
+    assert cmd[cmd.index("libx264") + 1:cmd.index("libx264") + 3] == ["-threads", "4"]
+
+def test_run_encode_applies_process_resources(mock_logger):
+    # Arrange
+    resources = {"threads": 2, "cpus": [0, 1], "nice": 10, "ionice": None, "ionice_level": 7}
+    cmd = ["ffmpeg", "-i", "in.mp4", "out.mp4"]
+
+    with mock.patch("utils.video.video_compressor.ProcessRunner.run") as mock_run:
+        # Act
+        VideoCompressor.run_encode(cmd, resources=resources)
+
+    # Assert
+    mock_run.assert_called_once_with(cmd, capture_output=True, check=True, resources=resources)
+
+def test_probe_videos_runs_batch_concurrently_and_fills_cache(tmp_path, mock_logger):
+    # Arrange
+    videos = [tmp_path / f"video{index}.mp4" for index in range(3)]
+    for video in videos:
+        video.write_bytes(b"data")
+    outputs = [make_probe_result(), make_probe_result(), subprocess.CalledProcessError(1, "ffprobe")]
+
+    with mock.patch.object(VideoCompressor, "PROBE_BACKEND", "ffprobe"), \
+         mock.patch("utils.video.video_compressor.ProcessRunner.run_many", return_value=outputs) as mock_run_many, \
+         mock.patch("utils.video.video_compressor.ProcessRunner.run") as mock_run:
+        # Act
+        results = VideoCompressor.probe_videos([str(video) for video in videos] + ["path/to/missing.mp4"])
+        VideoCompressor.probe_video(str(videos[0]))
+
+    # Assert
+    assert sorted(results) == [str(videos[0]), str(videos[1])]
+    assert [cmd[-1] for cmd in mock_run_many.call_args[0][0]] == [str(video) for video in videos]
+    mock_run.assert_not_called()
+
+def test_probe_video_av_builds_ffprobe_record(tmp_path, mock_logger):
+    # Arrange
+    video_stream = mock.Mock(index=0, type="video", bit_rate=4000000, average_rate=Fraction(30000, 1001), base_rate=Fraction(30, 1))
+    video_stream.codec_context.name = "h264"
+    video_stream.codec_context.width = 1920
+    video_stream.codec_context.height = 1080
+    audio_stream = mock.Mock(index=1, type="audio", bit_rate=128000)
+    audio_stream.codec_context.name = "aac"
+    timecode_stream = mock.Mock(index=2, type="data", codec_context=None)
+    container = mock.MagicMock(duration=12_500_000, bit_rate=4200000, metadata={"comment": "compressed"})
+    container.format.name = "mov,mp4,m4a,3gp,3g2,mj2"
+    container.streams = [video_stream, audio_stream, timecode_stream]
+    container.__enter__.return_value = container
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"data")
+
+    with mock.patch("utils.video.video_compressor.av") as mock_av, \
+         mock.patch.object(VideoCompressor, "PROBE_BACKEND", "auto"):
+        mock_av.open.return_value = container
+        mock_av.time_base = 1_000_000
+        # Act
+        metadata = VideoCompressor.probe_video(str(video))
+        processed = VideoCompressor.is_video_processed(str(video))
+
+    # Assert
+    assert processed is True
+    assert VideoCompressor.get_video_bitrate(metadata) == 4000000
+    assert VideoCompressor.get_source_framerate(metadata) == pytest.approx(29.97, abs=0.01)
+    assert metadata["format"]["duration"] == "12.5"
+    assert [stream["codec_name"] for stream in VideoCompressor.get_audio_streams(metadata)] == ["aac"]
+    assert [stream["index"] for stream in metadata["streams"]] == [0, 1]
+
+def test_probe_video_falls_back_to_ffprobe_when_av_fails(tmp_path, mock_logger):
+    # Arrange
+    video = tmp_path / "video.mp4"
+    video.write_bytes(b"data")
+
+    with mock.patch("utils.video.video_compressor.av") as mock_av, \
+         mock.patch.object(VideoCompressor, "PROBE_BACKEND", "auto"), \
+         mock.patch('utils.video.video_compressor.ProcessRunner.run', return_value=make_probe_result()) as mock_run:
+        mock_av.open.side_effect = ValueError("unsupported stream")
+        # Act
+        metadata = VideoCompressor.probe_video(str(video))
+
+    # Assert
+    mock_run.assert_called_once()
+    assert metadata == json.loads(make_probe_result().stdout)
+
+def test_probe_videos_falls_back_to_ffprobe_for_files_av_cannot_read(tmp_path, mock_logger):
+    # Arrange
+    videos = [tmp_path / f"video{index}.mp4" for index in range(2)]
+    for video in videos:
+        video.write_bytes(b"data")
+
+    def probe_av(file_path):
+        if file_path == str(videos[1]):
+            raise ValueError("unsupported stream")
+        return {"format": {}, "streams": []}
+
+    with mock.patch("utils.video.video_compressor.av"), \
+         mock.patch.object(VideoCompressor, "PROBE_BACKEND", "auto"), \
+         mock.patch.object(VideoCompressor, "probe_video_av", side_effect=probe_av), \
+         mock.patch("utils.video.video_compressor.ProcessRunner.run_many", return_value=[make_probe_result()]) as mock_run_many:
+        # Act
+        results = VideoCompressor.probe_videos([str(video) for video in videos])
+
+    # Assert
+    assert sorted(results) == [str(video) for video in videos]
+    assert [cmd[-1] for cmd in mock_run_many.call_args[0][0]] == [str(videos[1])]
+
+def test_iter_video_files_probes_folder_in_batches(mock_os_walk, mock_logger):
+    # Arrange
+    mock_os_walk.return_value = [("path/to/videos", [], ["video1.mp4", "video2.avi", "notes.txt"])]
+
+    with mock.patch.object(VideoCompressor, "probe_videos") as mock_probe_videos, \
+         mock.patch.object(VideoCompressor, "is_video_processed", return_value=False):
+        # Act
+        result = list(VideoCompressor.iter_video_files_from_directory("path/to/videos"))
+
+    # Assert
+    mock_probe_videos.assert_called_once_with([os.path.join("path/to/videos", "video1.mp4"), os.path.join("path/to/videos", "video2.avi")])
+    assert len(result) == 2
+
+def test_iter_video_files_times_batch_probe_as_probe(mock_os_walk, mock_logger):
+    # Arrange
+    mock_os_walk.return_value = [("path/to/videos", [], ["video1.mp4", "video2.avi"])]
+
+    with mock.patch.object(VideoCompressor, "probe_videos"), \
+         mock.patch.object(VideoCompressor, "is_video_processed", return_value=False), \
+         mock.patch("utils.video.video_compressor.RunMetrics.stage") as mock_stage:
+        # Act
+        list(VideoCompressor.iter_video_files_from_directory("path/to/videos"))
+
+    # Assert
+    mock_stage.assert_called_once_with("probe")
+
+def test_iter_video_files_skips_manifest_records_without_probing(mock_os_walk, mock_logger):
+    # Arrange
+    mock_os_walk.return_value = [("path/to/videos", [], ["video1.mp4", "video2.mp4"])]
+    recorded = os.path.join("path/to/videos", "video1.mp4")
+
+    with mock.patch("utils.video.video_compressor.Manifest.is_recorded", side_effect=lambda path, settings: path == recorded), \
+         mock.patch.object(VideoCompressor, "is_video_processed", return_value=False) as mock_processed, \
+         mock.patch.object(VideoCompressor, "probe_videos") as mock_probe_videos:
+        # Act
+        result = list(VideoCompressor.iter_video_files_from_directory("path/to/videos", settings={"video_codec": "libx264"}))
+
+    # Assert
+    assert result == [os.path.join("path/to/videos", "video2.mp4")]
+    mock_processed.assert_called_once_with(os.path.join("path/to/videos", "video2.mp4"))
+    mock_probe_videos.assert_not_called()
+
+def test_iter_video_files_skips_run_output_directory(tmp_path, mock_logger):
+    # Arrange
+    output_directory = tmp_path / "output_run"
+    output_directory.mkdir()
+    (tmp_path / "clip.ts").write_bytes(b"video")
+    (output_directory / "clip.ts").write_bytes(b"encoded")
+
+    with mock.patch.object(VideoCompressor, "is_video_processed", return_value=False):
+        # Act
+        result = list(VideoCompressor.iter_video_files(str(tmp_path), output_directory=str(output_directory)))
+
+    # Assert
+    assert result == [str(tmp_path / "clip.ts")]
+
+def test_start_compression_passthrough_mirrors_tree(tmp_path):
+    # Arrange
+    from PIL import Image
+    input_directory = tmp_path / "media"
+    (input_directory / "docs").mkdir(parents=True)
+    (input_directory / "docs" / "notes.txt").write_text("notes")
+    Image.new("RGB", (16, 16), "red").save(input_directory / "icon.png")
+
+    with mock.patch.object(Handler, "PASSTHROUGH", True), mock.patch.object(Handler, "OUTPUT_ROOT", None):
+        # Act
+        summary = Handler.start_compression(str(input_directory), False, True, False)
+
+    # Assert
+    output_directory = summary["output_directory"]
+    with open(os.path.join(output_directory, "docs", "notes.txt")) as notes:
+        assert notes.read() == "notes"
+    assert os.path.exists(os.path.join(output_directory, "icon.png"))
@@ -4,9 +4,12 @@ from CTkMessagebox import CTkMessagebox
 from tkinter import StringVar, filedialog
 from threading import Thread
 import os
+import queue
+import subprocess
 from utils.handler.handler import Handler
-from datetime import datetime
-import time
+from utils.progress.config import MAX_JOBS_SHOWN
+from utils.progress.progress import ProgressTracker
+from datetime import datetime, timedelta
 import webbrowser
 from tkinterdnd2 import TkinterDnD, DND_ALL
 
@@ -30,10 +33,13 @@ class CompressorApp(ctk.CTk, TkinterDnD.DnDWrapper):
 
         # Define constants
         self.SELECT_DIRECTORY_TEXT = "Select a directory"
+        self.PROGRESS_REFRESH_MS = 200
 
         # Tracking time and progress
         self.start_time = None
+        self.eta_deadline = None
         self.total_files = 0
+        self.progress_queue = queue.Queue()
 
         # UI widget storage
         self.widgets = {}
@@ -48,19 +54,21 @@ class CompressorApp(ctk.CTk, TkinterDnD.DnDWrapper):
             self.directory = dropped_location
             self.directory_string_var.set(self.directory)
 
-    def open_output_directory(self):
+    def open_output_directory(self, directory=None):
         # Open the directory in the file explorer
+        directory = directory or self.directory
         if os.name == "nt":  # Windows
-            os.startfile(self.directory)
+            os.startfile(directory)
         elif os.name == "posix":  # macOS/Linux
             subprocess.Popen(
-                ["open", self.directory]
+                ["open", directory]
                 if "darwin" in os.sys.platform
-                else ["xdg-open", self.directory]
+                else ["xdg-open", directory]
             )
 
     def setup_initial_ui(self):
         self.clear_ui()
+        self.geometry("500x200")
 
         self.directory_string_var = StringVar()
         self.directory_string_var.set(self.SELECT_DIRECTORY_TEXT)
@@ -243,6 +251,7 @@ class CompressorApp(ctk.CTk, TkinterDnD.DnDWrapper):
     def setup_running_ui(self):
         # Forget all widgets
         self.clear_ui()
+        self.geometry("500x340")
 
         # Progress bar
         self.widgets["progress_bar"] = ctk.CTkProgressBar(
@@ -268,98 +277,128 @@ class CompressorApp(ctk.CTk, TkinterDnD.DnDWrapper):
         self.widgets["file_count_label"] = ctk.CTkLabel(self, text="Processed: 0/0")
         self.widgets["file_count_label"].pack()
 
+        # Every in-flight job with its percentage and encode speed, plus aggregate throughput
+        self.widgets["jobs_label"] = ctk.CTkLabel(self, text="", justify="left", font=("Courier", 12))
+        self.widgets["jobs_label"].pack(pady=5)
+
         # Stop button
         self.widgets["stop_button"] = ctk.CTkButton(
             self, text="Stop Compression", command=self.stop_operation
         )
         self.widgets["stop_button"].pack(pady=10)
 
-        # Start compression in a separate thread
+        # Start compression in a separate thread, progress is drained on the Tk main loop
+        self.start_time = datetime.now()
+        self.eta_deadline = None
+        self.progress_queue = queue.Queue()
         self.thread = Thread(target=self.compress_media, args=(self.directory,))
         self.thread.start()
+        self.after(self.PROGRESS_REFRESH_MS, self.poll_progress)
 
     def compress_media(self, input_directory):
+        """Run the compression on the worker thread, talking to the UI only through the progress queue."""
         try:
-            self.start_time = datetime.now()  # Record the start time
-            self.eta_seconds_remaining = None  # Initialize ETA countdown
-            self.updater_running = True  # Control for the update thread
-
-            def time_updater():
-                """Thread to update elapsed time and countdown ETA every second."""
-                while self.updater_running:
-                    elapsed_time = datetime.now() - self.start_time
-
-                    # Update elapsed time label
-                    self.widgets["elapsed_time_label"].configure(
-                        text=f"Elapsed Time: {str(elapsed_time).split('.')[0]}"
-                    )
-
-                    # Update ETA countdown if applicable
-                    if self.eta_seconds_remaining and self.eta_seconds_remaining > 0:
-                        self.eta_seconds_remaining -= 1
-                        mins, secs = divmod(self.eta_seconds_remaining, 60)
-                        hours, mins = divmod(mins, 60)
-                        self.widgets["eta_label"].configure(
-                            text=f"ETA: {hours:02}:{mins:02}:{secs:02}"
-                        )
-                    elif self.eta_seconds_remaining == 0:
-                        self.widgets["eta_label"].configure(text="ETA: 00:00:00")
-
-                    time.sleep(1)
-
-            # Start the updater thread
-            Thread(target=time_updater, daemon=True).start()
-
             def update_progress(progress_ratio, current_file, file_index, total_files):
-                """Update the progress bar, labels, and estimate the ETA."""
-                self.widgets["progress_bar"].set(progress_ratio)
-
-                # Estimate ETA and update countdown tracker
-                if progress_ratio > 0 and progress_ratio != 1:
-                    elapsed_time = datetime.now() - self.start_time
-                    estimated_total_time = elapsed_time / progress_ratio
-                    eta = estimated_total_time - elapsed_time
-                    self.eta_seconds_remaining = int(eta.total_seconds())
-                elif progress_ratio == 1:
-                    self.eta_seconds_remaining = 0
-
-                # Update current file and progress count
-                self.widgets["current_file_label"].configure(
-                    text=f"Current File: {os.path.basename(current_file)}"
-                )
-                self.widgets["file_count_label"].configure(
-                    text=f"Processed: {file_index}/{total_files}"
-                )
+                """Queue a progress event, never touching Tk from the worker thread."""
+                self.progress_queue.put(("progress", progress_ratio, current_file, file_index, total_files))
 
             # Call the compression handler with the callback
-            original_size, compressed_size, = Handler.start_compression(
+            run_summary = Handler.start_compression(
                 input_directory=input_directory,
                 process_video=self.process_video,
                 process_image=self.process_image,
                 convert_incompatible=self.convert_incompatible,
-                progress_callback=lambda progress_ratio, current_file, file_index, total_files: update_progress(
-                    progress_ratio, current_file, file_index, total_files
-                ),
+                progress_callback=update_progress,
             )
-            
-            self.original_size = original_size
-            self.compressed_size = compressed_size
-
-            # Notify the user upon successful completion
-            if self.running:
-                self.show_operation_completed_message()
-                self.running = False
+            self.progress_queue.put(("completed", run_summary))
 
         except RuntimeError as e:
-            # Notify the user of any errors encountered during compression
-            CTkMessagebox(
-                title="Runtime Error", message=f"Error: {str(e)}", icon="cancel"
-            ).get()
+            self.progress_queue.put(("error", str(e)))
 
         finally:
-            self.updater_running = False
             Handler.cleanup_logging()
+            self.progress_queue.put(("finished",))
+
+    def poll_progress(self):
+        """Drain queued events on the Tk main loop, applying only the latest progress update."""
+        latest_progress = None
+        completed = None
+        error = None
+        finished = False
+        while True:
+            try:
+                event = self.progress_queue.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == "progress":
+                latest_progress = event[1:]
+            elif event[0] == "completed":
+                completed = event[1]
+            elif event[0] == "error":
+                error = event[1]
+            elif event[0] == "finished":
+                finished = True
+
+        # The operation was stopped and the initial UI restored
+        if not self.running:
+            return
+
+        if latest_progress:
+            self.apply_progress(*latest_progress)
+        self.update_time_labels()
+        self.update_jobs_panel()
+
+        if error:
+            # Notify the user of any errors encountered during compression
+            CTkMessagebox(
+                title="Runtime Error", message=f"Error: {error}", icon="cancel"
+            ).get()
+        if completed:
+            # Notify the user upon successful completion
+            self.run_summary = completed
+            self.show_operation_completed_message()
+        if finished:
+            self.running = False
             self.setup_initial_ui()
+            return
+        self.after(self.PROGRESS_REFRESH_MS, self.poll_progress)
+
+    def apply_progress(self, progress_ratio, current_file, file_index, total_files):
+        """Update the progress bar, labels, and estimate the ETA."""
+        self.widgets["progress_bar"].set(progress_ratio)
+
+        # Estimate ETA as a deadline that update_time_labels counts down to
+        if progress_ratio > 0 and progress_ratio != 1:
+            elapsed_time = datetime.now() - self.start_time
+            estimated_total_time = elapsed_time / progress_ratio
+            self.eta_deadline = datetime.now() + (estimated_total_time - elapsed_time)
+        elif progress_ratio == 1:
+            self.eta_deadline = datetime.now()
+
+        # Update current file and progress count
+        self.widgets["current_file_label"].configure(
+            text=f"Current File: {os.path.basename(current_file)}"
+        )
+        self.widgets["file_count_label"].configure(
+            text=f"Processed: {file_index}/{total_files}"
+        )
+
+    def update_time_labels(self):
+        """Refresh the elapsed time and ETA countdown labels."""
+        elapsed_time = datetime.now() - self.start_time
+        self.widgets["elapsed_time_label"].configure(
+            text=f"Elapsed Time: {str(elapsed_time).split('.')[0]}"
+        )
+        if self.eta_deadline is not None:
+            remaining = max(timedelta(0), self.eta_deadline - datetime.now())
+            mins, secs = divmod(int(remaining.total_seconds()), 60)
+            hours, mins = divmod(mins, 60)
+            self.widgets["eta_label"].configure(text=f"ETA: {hours:02}:{mins:02}:{secs:02}")
+
+    def update_jobs_panel(self):
+        """Render the shared progress model into the jobs panel."""
+        lines = ProgressTracker.format_lines(ProgressTracker.snapshot(), MAX_JOBS_SHOWN)
+        self.widgets["jobs_label"].configure(text="\n".join(lines))
 
     def show_operation_completed_message(self):
         def format_size(size_bytes):
@@ -368,14 +407,21 @@ class CompressorApp(ctk.CTk, TkinterDnD.DnDWrapper):
                     return f"{size_bytes:.2f} {unit}"
                 size_bytes /= 1024
         
-        original = format_size(self.original_size)
-        compressed = format_size(self.compressed_size)
-        savings = round((1 - (self.compressed_size / self.original_size)) * 100) if self.original_size > 0 else 0
-        
+        summary = self.run_summary
+        original = format_size(summary["input_bytes"])
+        compressed = format_size(summary["output_bytes"])
+        savings = round(summary["saved_ratio"] * 100)
+
         message = (f"Operation Completed Successfully!\n\n"
+                f"Files compressed: {summary['files']}\n"
                 f"Original size: {original}\n"
                 f"Compressed size: {compressed}\n"
                 f"Space saved: {savings}%")
+        for media_type, totals in summary["by_type"].items():
+            message += (f"\n{media_type.capitalize()}: {totals['files']} files, "
+                    f"{format_size(totals['input_bytes'])} -> {format_size(totals['output_bytes'])}")
+        if summary["failed"]:
+            message += f"\nFailed: {summary['failed']} (see app.log)"
         
         option = CTkMessagebox(
             title="Operation Completed",
@@ -387,7 +433,7 @@ class CompressorApp(ctk.CTk, TkinterDnD.DnDWrapper):
         ).get()
         
         if option == "Open Directory":
-            self.open_output_directory()
+            self.open_output_directory(summary["output_directory"])
 
     def stop_operation(self):
         if not self.thread or self.thread.is_alive():
@@ -400,6 +446,5 @@ class CompressorApp(ctk.CTk, TkinterDnD.DnDWrapper):
             ctypes.pythonapi.PyThreadState_SetAsyncExc(tid, None)
             raise RuntimeError("Failed to kill thread")
         self.running = False
-        self.eta_updater_running = False  # Stop the countdown
         CTkMessagebox(message="The operation has been stopped.").get()
         self.setup_initial_ui()
@@ -0,0 +1,29 @@
+# Grow or shrink the number of concurrent encodes from live load instead of a fixed worker count
+DEFAULT_ADAPTIVE_CONCURRENCY = False
+
+# Bounds on concurrent jobs, None for the maximum means one per CPU
+MIN_WORKERS = 1
+MAX_WORKERS = None
+
+# System-wide ceilings, including other tenants: busy CPU fraction and the floor of available memory
+CPU_CEILING = 0.9
+MEMORY_FLOOR = 0.1
+
+# Seconds between load samples and adjustments
+SAMPLE_SECONDS = 3
+
+# A throughput drop larger than this after growing is treated as thrashing and undone
+THROUGHPUT_TOLERANCE = 0.05
+# Samples to hold the limit after undoing a step, before probing upwards again
+BACKOFF_SAMPLES = 3
+
+# Concurrent encodes split the CPU budget: each gets budget // concurrent encodes ffmpeg threads
+# (a single encode keeps ffmpeg's own default of one thread per core)
+DEFAULT_PARTITION_THREADS = True
+# Also pin each encode to its own slice of the CPUs
+DEFAULT_PIN_CPUS = False
+# Niceness added to encoder processes, None leaves it unchanged (e.g. 10 to yield to interactive work)
+DEFAULT_ENCODER_NICE = None
+# I/O priority of encoder processes: None, "best-effort" or "idle"; level 0 (highest) to 7 for best-effort
+DEFAULT_ENCODER_IONICE = None
+DEFAULT_ENCODER_IONICE_LEVEL = 7
@@ -0,0 +1,166 @@
+import contextlib
+import logging
+import os
+import threading
+import time
+from utils.concurrency.config import (
+    BACKOFF_SAMPLES,
+    CPU_CEILING,
+    MAX_WORKERS,
+    MEMORY_FLOOR,
+    MIN_WORKERS,
+    SAMPLE_SECONDS,
+    THROUGHPUT_TOLERANCE,
+)
+
+
+class SystemLoad:
+    """System-wide CPU and memory readings from /proc, None where unavailable (non-Linux)."""
+
+    @classmethod
+    def read_cpu_times(cls):
+        """Return (idle, total) jiffies summed over all CPUs."""
+        try:
+            with open("/proc/stat") as stat:
+                fields = [int(value) for value in stat.readline().split()[1:]]
+        except (OSError, ValueError):
+            return None
+        # idle + iowait; guest time is already included in user/nice
+        return fields[3] + fields[4], sum(fields[:8])
+
+    @classmethod
+    def cpu_utilization(cls, previous, current):
+        """Busy fraction of all CPUs between two read_cpu_times samples."""
+        if previous is None or current is None or current[1] <= previous[1]:
+            return None
+        return 1 - (current[0] - previous[0]) / (current[1] - previous[1])
+
+    @classmethod
+    def memory_available_ratio(cls):
+        try:
+            with open("/proc/meminfo") as meminfo:
+                values = {line.split(":")[0]: int(line.split()[1]) for line in meminfo}
+            return values["MemAvailable"] / values["MemTotal"]
+        except (OSError, KeyError, ValueError, IndexError):
+            return None
+
+
+class AdaptiveConcurrency:
+    """
+    Limit on concurrent jobs that follows live load.
+
+    A sampling thread reads CPU and memory every SAMPLE_SECONDS along with the bytes the jobs
+    finished in that window. The limit grows by one while the CPU is under its ceiling and every
+    slot is busy, shrinks when CPU or memory crosses its ceiling, and a step up that lowered
+    throughput is undone and held for BACKOFF_SAMPLES samples.
+    """
+
+    def __init__(self, min_workers=MIN_WORKERS, max_workers=MAX_WORKERS, cpu_ceiling=CPU_CEILING,
+                 memory_floor=MEMORY_FLOOR, sample_seconds=SAMPLE_SECONDS, name="jobs"):
+        self.min_workers = min_workers
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.cpu_ceiling = cpu_ceiling
+        self.memory_floor = memory_floor
+        self.sample_seconds = sample_seconds
+        self.name = name
+        self.limit = min_workers
+        self.active = 0
+        self.busy_since_sample = False
+        self.completed_units = 0
+        self.completed_jobs = 0
+        self.last_step = 0
+        self.last_throughput = None
+        self.backoff = 0
+        self.condition = threading.Condition()
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.logger = logging.getLogger(__name__)
+
+    @contextlib.contextmanager
+    def slot(self, units=1):
+        """Wait for a free slot under the current limit; units (e.g. input bytes) count toward throughput."""
+        with self.condition:
+            while self.active >= self.limit:
+                self.condition.wait()
+            self.active += 1
+            if self.active >= self.limit:
+                self.busy_since_sample = True
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.active -= 1
+                self.completed_units += units
+                self.completed_jobs += 1
+                self.condition.notify_all()
+
+    def adjust(self, cpu, memory_ratio, throughput):
+        """
+        Return the next limit for one sample.
+
+        Readings may be None when unavailable; throughput is None for a window in which no job
+        finished, and a step up is only judged once a later window has finished jobs.
+        """
+        with self.condition:
+            limit, step = self.limit, 0
+            saturated = self.busy_since_sample or self.active >= self.limit
+            if memory_ratio is not None and memory_ratio < self.memory_floor:
+                step = -1
+            elif cpu is not None and cpu > self.cpu_ceiling:
+                step = -1
+            elif self.last_step > 0 and throughput is None:
+                pass
+            elif (self.last_step > 0 and self.last_throughput
+                  and throughput < self.last_throughput * (1 - THROUGHPUT_TOLERANCE)):
+                # The last step up made things slower: undo it and stop probing for a while
+                step = -1
+                self.backoff = BACKOFF_SAMPLES
+            elif self.backoff > 0:
+                self.backoff -= 1
+            elif cpu is not None and saturated:
+                step = 1
+
+            self.limit = max(self.min_workers, min(self.max_workers, limit + step))
+            if self.limit != limit or throughput is not None:
+                self.last_step = self.limit - limit
+            if throughput is not None:
+                self.last_throughput = throughput
+            self.busy_since_sample = False
+            self.condition.notify_all()
+            return self.limit
+
+    def sample_loop(self):
+        cpu_times = SystemLoad.read_cpu_times()
+        started_at = time.monotonic()
+        while not self.stop_event.wait(self.sample_seconds):
+            current_times = SystemLoad.read_cpu_times()
+            now = time.monotonic()
+            with self.condition:
+                units, self.completed_units = self.completed_units, 0
+                jobs, self.completed_jobs = self.completed_jobs, 0
+            cpu = SystemLoad.cpu_utilization(cpu_times, current_times)
+            memory_ratio = SystemLoad.memory_available_ratio()
+            previous_limit = self.limit
+            limit = self.adjust(cpu, memory_ratio, units / (now - started_at) if jobs else None)
+            if limit != previous_limit:
+                self.logger.info(
+                    f"Concurrent {self.name}: {previous_limit} -> {limit} (cpu {cpu}, memory available {memory_ratio})"
+                )
+            cpu_times, started_at = current_times, now
+
+    def start(self):
+        self.thread = threading.Thread(target=self.sample_loop, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,114 @@
+import contextlib
+import logging
+import os
+import shutil
+import threading
+from utils.concurrency.config import (
+    DEFAULT_ENCODER_IONICE,
+    DEFAULT_ENCODER_IONICE_LEVEL,
+    DEFAULT_ENCODER_NICE,
+    DEFAULT_PARTITION_THREADS,
+    DEFAULT_PIN_CPUS,
+)
+
+# ionice -c values of the I/O priority classes
+IONICE_CLASSES = {"best-effort": "2", "idle": "3"}
+
+
+class CpuBudget:
+    """
+    Divides the CPUs this process may use among concurrent encodes.
+
+    allocate() hands each encode a thread count, and optionally a CPU set, sized for the number
+    of encodes running at that moment, which may change between jobs under adaptive concurrency.
+    """
+
+    def __init__(self, workers, cpus=None, partition_threads=DEFAULT_PARTITION_THREADS, pin_cpus=DEFAULT_PIN_CPUS,
+                 nice=DEFAULT_ENCODER_NICE, ionice=DEFAULT_ENCODER_IONICE, ionice_level=DEFAULT_ENCODER_IONICE_LEVEL):
+        self.workers = workers if callable(workers) else (lambda: workers)
+        self.cpus = sorted(cpus) if cpus is not None else self.get_available_cpus()
+        self.partition_threads = partition_threads
+        self.pin_cpus = pin_cpus
+        self.nice = nice
+        self.ionice = ionice
+        self.ionice_level = ionice_level
+        self.lock = threading.Lock()
+        self.used_slots = set()
+
+    @classmethod
+    def get_available_cpus(cls):
+        if hasattr(os, "sched_getaffinity"):
+            return sorted(os.sched_getaffinity(0))
+        return list(range(os.cpu_count() or 1))
+
+    def get_partition(self, slot, workers):
+        """CPUs of one of `workers` contiguous slices; slices wrap when there are more workers than CPUs."""
+        if workers >= len(self.cpus):
+            return [self.cpus[slot % len(self.cpus)]]
+        size, extra = divmod(len(self.cpus), workers)
+        start = slot * size + min(slot, extra)
+        return self.cpus[start:start + size + (1 if slot < extra else 0)]
+
+    @contextlib.contextmanager
+    def allocate(self):
+        """Yield the resources for one encode: threads, cpus, nice, ionice and ionice_level."""
+        workers = max(1, self.workers())
+        with self.lock:
+            slot = next(index for index in range(len(self.used_slots) + 1) if index not in self.used_slots)
+            self.used_slots.add(slot)
+        try:
+            partitioned = workers > 1
+            yield {
+                "threads": max(1, len(self.cpus) // workers) if partitioned and self.partition_threads else None,
+                "cpus": self.get_partition(slot % workers, workers) if partitioned and self.pin_cpus else None,
+                "nice": self.nice,
+                "ionice": self.ionice,
+                "ionice_level": self.ionice_level,
+            }
+        finally:
+            with self.lock:
+                self.used_slots.discard(slot)
+
+
+def has_process_settings(resources):
+    """Whether a job's resources need applying to its process (beyond ffmpeg arguments)."""
+    return bool(resources) and any(resources.get(key) is not None for key in ("cpus", "nice", "ionice"))
+
+
+def get_command_prefix(resources):
+    """
+    Return the taskset/nice/ionice prefix applying a job's CPU affinity and priorities, or [].
+
+    Each tool sets its own affinity or priority and execs the next, so ffmpeg and every thread
+    it starts inherit them without running Python between fork and exec. nice is relative to
+    this process's priority. Settings whose tool is not installed (taskset and ionice come with
+    util-linux) are skipped and logged.
+    """
+    if not has_process_settings(resources) or os.name != "posix":
+        return []
+    logger = logging.getLogger(__name__)
+    prefix = []
+    if resources.get("cpus") is not None:
+        taskset = shutil.which("taskset")
+        if taskset:
+            prefix += [taskset, "-c", ",".join(str(cpu) for cpu in resources["cpus"])]
+        else:
+            logger.debug("Could not set CPU affinity: taskset not found")
+    if resources.get("nice") is not None:
+        nice = shutil.which("nice")
+        if nice:
+            prefix += [nice, "-n", str(resources["nice"])]
+        else:
+            logger.debug("Could not set nice: nice not found")
+    if resources.get("ionice") is not None:
+        ionice = shutil.which("ionice")
+        if resources["ionice"] not in IONICE_CLASSES:
+            logger.debug(f"Could not set ionice: unknown class {resources['ionice']}")
+        elif ionice:
+            # -t runs the command even when the kernel refuses the priority
+            prefix += [ionice, "-t", "-c", IONICE_CLASSES[resources["ionice"]]]
+            if resources["ionice"] == "best-effort":
+                prefix += ["-n", str(resources["ionice_level"])]
+        else:
+            logger.debug("Could not set ionice: ionice not found")
+    return prefix
@@ -0,0 +1,17 @@
+# Coordinator HTTP endpoint; workers on other hosts need the host to be reachable (e.g. "0.0.0.0")
+DEFAULT_COORDINATOR_HOST = "127.0.0.1"
+DEFAULT_COORDINATOR_PORT = 8765
+
+# A leased job returns to the queue if its worker neither finishes nor renews it within this time
+LEASE_SECONDS = 300
+# Workers renew their lease this often while a job runs
+LEASE_RENEW_SECONDS = 60
+# Attempts (failures and expired leases) before a job is given up
+MAX_ATTEMPTS = 3
+
+# Idle workers ask for work again after this many seconds
+WORKER_POLL_SECONDS = 2
+# The coordinator keeps answering "finished" this long so idle workers can exit cleanly
+FINISH_GRACE_SECONDS = 5
+
+JOB_TYPES = ["video", "image", "convert"]
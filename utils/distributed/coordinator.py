@@ -0,0 +1,209 @@
+"""
+Coordinator of a distributed run: builds the job queue from the usual discovery and hands
+jobs to workers over HTTP.
+
+Workers must see the input and output paths at the same locations (local disk or a shared
+mount), only job descriptions and results travel over the protocol.
+
+    python -m utils.distributed.coordinator path/to/media --host 0.0.0.0 --port 8765
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from utils.distributed.config import (
+    DEFAULT_COORDINATOR_HOST,
+    DEFAULT_COORDINATOR_PORT,
+    FINISH_GRACE_SECONDS,
+    LEASE_SECONDS,
+    MAX_ATTEMPTS,
+)
+from utils.distributed.job_queue import JobQueue
+from utils.handler.handler import Handler
+from utils.images.image_compressor import ImageCompressor
+from utils.logging.logging import setup_logging, stop_logging
+from utils.metrics.run_metrics import RunMetrics
+from utils.video.config import INCOMPATIBLE_FILETYPES
+from utils.video.video_compressor import VideoCompressor
+
+
+class CoordinatorRequestHandler(BaseHTTPRequestHandler):
+    def send_json(self, payload, status=200):
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != "/status":
+            self.send_error(404)
+            return
+        self.send_json(Coordinator.QUEUE.counts())
+
+    def do_POST(self):
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        except ValueError:
+            self.send_error(400)
+            return
+
+        job_queue = Coordinator.QUEUE
+        if self.path == "/lease":
+            job = job_queue.lease(request.get("worker"))
+            if job is not None:
+                Coordinator.LOGGER.info(f"Leased job {job['id']} ({job['input_file']}) to worker {job['worker']}")
+            self.send_json({"job": job, "finished": job is None and job_queue.is_finished()})
+        elif self.path == "/renew":
+            self.send_json({"ok": job_queue.renew(request["job_id"], request["lease"])})
+        elif self.path == "/complete":
+            job = job_queue.complete(request["job_id"], request["lease"])
+            if job is not None:
+                Coordinator.LOGGER.info(f"Job {job['id']} completed by worker {job['worker']}")
+            self.send_json({"ok": job is not None})
+        elif self.path == "/fail":
+            job = job_queue.fail(request["job_id"], request["lease"], request.get("error"))
+            if job is not None:
+                Coordinator.LOGGER.warning(
+                    f"Job {job['id']} failed on worker {job['worker']} (attempt {job['attempts']}, now {job['status']}). "
+                    f"ERROR MESSAGE: {job['error']}"
+                )
+            self.send_json({"ok": job is not None})
+        else:
+            self.send_error(404)
+
+    def log_message(self, format, *args):
+        Coordinator.LOGGER.debug(format % args)
+
+
+class Coordinator:
+    LOGGER = logging.getLogger(__name__)
+    QUEUE = None
+    SERVER = None
+    THREAD = None
+
+    @classmethod
+    def build_jobs(cls, input_directory, output_directory, process_video=True, process_image=True, convert_incompatible=True,
+                   job_queue=None):
+        """
+        Queue one job per file the directory compressors would process, with the same output paths.
+
+        Images the small image policy skips are not queued, as in a local run.
+        """
+        job_queue = job_queue or JobQueue()
+        if process_video:
+            for input_file in VideoCompressor.iter_video_files(input_directory):
+                output_file = VideoCompressor.calculate_output_path(input_file, input_directory, output_directory)
+                job_queue.add_job("video", input_file, output_file)
+        if process_image:
+            for input_file in ImageCompressor.get_image_files(input_directory, output_directory=output_directory):
+                action = ImageCompressor.get_image_action(input_file)
+                if action == "skip":
+                    continue
+                output_file = os.path.join(output_directory, os.path.relpath(input_file, input_directory))
+                if action == "compress":
+                    # Images copied unchanged keep their extension
+                    output_file = ImageCompressor.get_output_path(input_file, output_file)
+                job_queue.add_job("image", input_file, output_file)
+        if convert_incompatible:
+            for input_file in VideoCompressor.iter_video_files(input_directory, filetypes=INCOMPATIBLE_FILETYPES):
+                output_file = os.path.join(output_directory, os.path.relpath(input_file, input_directory))
+                job_queue.add_job("convert", input_file, os.path.splitext(output_file)[0] + ".mp4")
+        return job_queue
+
+    @classmethod
+    def start(cls, job_queue, host=DEFAULT_COORDINATOR_HOST, port=DEFAULT_COORDINATOR_PORT):
+        """Serve job_queue in a daemon thread. Returns the bound port."""
+        cls.QUEUE = job_queue
+        cls.SERVER = ThreadingHTTPServer((host, port), CoordinatorRequestHandler)
+        cls.SERVER.daemon_threads = True
+        cls.THREAD = threading.Thread(target=cls.SERVER.serve_forever, daemon=True)
+        cls.THREAD.start()
+        cls.LOGGER.info(f"Coordinator listening on http://{host}:{cls.SERVER.server_port}")
+        return cls.SERVER.server_port
+
+    @classmethod
+    def stop(cls):
+        if cls.SERVER is not None:
+            cls.SERVER.shutdown()
+            cls.SERVER.server_close()
+            cls.SERVER = None
+            cls.THREAD = None
+
+    @classmethod
+    def run(cls, input_directory, process_video=True, process_image=True, convert_incompatible=True,
+            host=DEFAULT_COORDINATOR_HOST, port=DEFAULT_COORDINATOR_PORT, progress_callback=None,
+            lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS, finish_grace_seconds=FINISH_GRACE_SECONDS):
+        """
+        Queue the jobs, serve them until every job is done or failed, and return the run summary.
+
+        The summary has the same shape as Handler.start_compression's.
+        """
+        RunMetrics.reset()
+        output_directory = Handler.get_output_directory(input_directory)
+        setup_logging(output_directory)
+        VideoCompressor.LOGGER = logging.getLogger(VideoCompressor.__module__)
+        ImageCompressor.LOGGER = logging.getLogger(ImageCompressor.__module__)
+
+        try:
+            with RunMetrics.stage("scan"):
+                job_queue = cls.build_jobs(
+                    input_directory, output_directory, process_video, process_image, convert_incompatible,
+                    JobQueue(lease_seconds, max_attempts),
+                )
+            total_jobs = len(job_queue.jobs)
+            cls.LOGGER.info(f"Queued {total_jobs} jobs from: {input_directory}")
+            cls.start(job_queue, host, port)
+
+            while not job_queue.is_finished():
+                if progress_callback:
+                    counts = job_queue.counts()
+                    finished = counts["done"] + counts["failed"]
+                    progress_callback(finished / total_jobs, "", finished, total_jobs)
+                time.sleep(0.5)
+            # Keep answering so idle workers learn the run is over
+            time.sleep(finish_grace_seconds)
+            cls.stop()
+
+            for job in job_queue.jobs.values():
+                RunMetrics.record_job(
+                    "image" if job["type"] == "image" else "video", job["input_file"], job["output_file"],
+                    job["status"] == "done"
+                )
+            if progress_callback:
+                progress_callback(1, "", total_jobs, total_jobs)
+            RunMetrics.write(output_directory)
+            return {"output_directory": output_directory, **RunMetrics.size_summary()}
+        finally:
+            cls.stop()
+            stop_logging()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Coordinate a distributed compression run")
+    parser.add_argument("input_path", help="Directory or single file to compress")
+    parser.add_argument("--host", default=DEFAULT_COORDINATOR_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_COORDINATOR_PORT)
+    parser.add_argument("--lease-seconds", type=float, default=LEASE_SECONDS)
+    parser.add_argument("--max-attempts", type=int, default=MAX_ATTEMPTS)
+    parser.add_argument("--finish-grace-seconds", type=float, default=FINISH_GRACE_SECONDS)
+    parser.add_argument("--no-video", action="store_true")
+    parser.add_argument("--no-image", action="store_true")
+    parser.add_argument("--no-convert", action="store_true")
+    args = parser.parse_args(argv)
+
+    summary = Coordinator.run(
+        args.input_path, not args.no_video, not args.no_image, not args.no_convert, args.host, args.port,
+        lease_seconds=args.lease_seconds, max_attempts=args.max_attempts, finish_grace_seconds=args.finish_grace_seconds,
+    )
+    print(json.dumps(summary, indent=2))
+    return 1 if summary["failed"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
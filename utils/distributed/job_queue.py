@@ -0,0 +1,116 @@
+import itertools
+import threading
+import time
+import uuid
+from utils.distributed.config import LEASE_SECONDS, MAX_ATTEMPTS
+
+
+class JobQueue:
+    """
+    Thread-safe queue of compression jobs handed out to workers under time-limited leases.
+
+    A job is pending, leased, done or failed. A lease that expires, or a job a worker reports
+    as failed, counts as an attempt; the job goes back to pending until MAX_ATTEMPTS is reached.
+    Every lease carries a token, so reports from a worker whose lease already expired are ignored.
+    """
+
+    def __init__(self, lease_seconds=LEASE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        self.job_ids = itertools.count(1)
+        self.jobs = {}
+        self.pending = []
+
+    def add_job(self, job_type, input_file, output_file):
+        with self.lock:
+            job_id = next(self.job_ids)
+            self.jobs[job_id] = {
+                "id": job_id,
+                "type": job_type,
+                "input_file": input_file,
+                "output_file": output_file,
+                "status": "pending",
+                "attempts": 0,
+                "lease": None,
+                "lease_expires": None,
+                "worker": None,
+                "error": None,
+            }
+            self.pending.append(job_id)
+            return job_id
+
+    def expire_leases(self):
+        """Return jobs whose lease ran out to the queue, or fail them after too many attempts."""
+        now = time.monotonic()
+        with self.lock:
+            for job in self.jobs.values():
+                if job["status"] == "leased" and job["lease_expires"] <= now:
+                    self.retry(job, f"Lease expired on worker {job['worker']}")
+
+    def retry(self, job, error):
+        job.update(lease=None, lease_expires=None, error=error)
+        if job["attempts"] >= self.max_attempts:
+            job["status"] = "failed"
+        else:
+            job["status"] = "pending"
+            self.pending.append(job["id"])
+
+    def lease(self, worker):
+        """Lease the next pending job to a worker, or return None when nothing is pending."""
+        self.expire_leases()
+        with self.lock:
+            if not self.pending:
+                return None
+            job = self.jobs[self.pending.pop(0)]
+            job.update(
+                status="leased",
+                attempts=job["attempts"] + 1,
+                lease=uuid.uuid4().hex,
+                lease_expires=time.monotonic() + self.lease_seconds,
+                worker=worker,
+            )
+            return dict(job)
+
+    def get_leased_job(self, job_id, lease):
+        job = self.jobs.get(job_id)
+        if job is None or job["status"] != "leased" or job["lease"] != lease:
+            return None
+        return job
+
+    def renew(self, job_id, lease):
+        """Extend a running job's lease. Returns False if the lease is no longer held."""
+        with self.lock:
+            job = self.get_leased_job(job_id, lease)
+            if job is None:
+                return False
+            job["lease_expires"] = time.monotonic() + self.lease_seconds
+            return True
+
+    def complete(self, job_id, lease):
+        with self.lock:
+            job = self.get_leased_job(job_id, lease)
+            if job is None:
+                return None
+            job.update(status="done", lease=None, lease_expires=None, error=None)
+            return dict(job)
+
+    def fail(self, job_id, lease, error):
+        with self.lock:
+            job = self.get_leased_job(job_id, lease)
+            if job is None:
+                return None
+            self.retry(job, error)
+            return dict(job)
+
+    def is_finished(self):
+        self.expire_leases()
+        with self.lock:
+            return all(job["status"] in ("done", "failed") for job in self.jobs.values())
+
+    def counts(self):
+        with self.lock:
+            counts = {"pending": 0, "leased": 0, "done": 0, "failed": 0}
+            for job in self.jobs.values():
+                counts[job["status"]] += 1
+            return counts
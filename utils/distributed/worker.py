@@ -0,0 +1,164 @@
+"""
+Worker of a distributed run: leases jobs from a coordinator, encodes them with the usual
+compressors and reports the outcome. Run as many as the host has room for:
+
+    python -m utils.distributed.worker http://coordinator:8765
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import shutil
+import socket
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from utils.distributed.config import LEASE_RENEW_SECONDS, WORKER_POLL_SECONDS
+from utils.images.image_compressor import ImageCompressor
+from utils.storage.storage import Storage
+from utils.video.video_compressor import VideoCompressor
+
+
+class Worker:
+    LOGGER = logging.getLogger(__name__)
+
+    def __init__(self, coordinator_url, worker_id=None, poll_seconds=WORKER_POLL_SECONDS,
+                 renew_seconds=LEASE_RENEW_SECONDS):
+        self.coordinator_url = coordinator_url.rstrip("/")
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.poll_seconds = poll_seconds
+        self.renew_seconds = renew_seconds
+        self.video_codec = None
+
+    def request(self, path, payload):
+        data = json.dumps(payload).encode("utf-8")
+        request = urllib.request.Request(
+            self.coordinator_url + path, data=data, headers={"Content-Type": "application/json"}
+        )
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return json.load(response)
+
+    def run(self):
+        """
+        Process jobs until the coordinator reports the run finished or goes away. Returns the jobs completed.
+
+        Until the first successful request the coordinator is waited for indefinitely.
+        """
+        VideoCompressor.LOGGER = VideoCompressor.LOGGER or logging.getLogger(VideoCompressor.__module__)
+        ImageCompressor.LOGGER = ImageCompressor.LOGGER or logging.getLogger(ImageCompressor.__module__)
+        completed = 0
+        connected = False
+        while True:
+            try:
+                response = self.request("/lease", {"worker": self.worker_id})
+                connected = True
+            except (urllib.error.URLError, ConnectionError) as e:
+                if not connected:
+                    # Workers may start before the coordinator is listening
+                    time.sleep(self.poll_seconds)
+                    continue
+                self.LOGGER.info(f"Coordinator unreachable, stopping worker {self.worker_id}: {e}")
+                return completed
+            job = response["job"]
+            if job is None:
+                if response["finished"]:
+                    return completed
+                time.sleep(self.poll_seconds)
+                continue
+
+            error = self.run_job(job)
+            try:
+                if error is None:
+                    self.request("/complete", {"job_id": job["id"], "lease": job["lease"]})
+                    completed += 1
+                else:
+                    self.request("/fail", {"job_id": job["id"], "lease": job["lease"], "error": error})
+            except (urllib.error.URLError, ConnectionError) as e:
+                self.LOGGER.warning(f"Could not report job {job['id']}: {e}")
+
+    def run_job(self, job):
+        """Run a job while renewing its lease. Returns None on success or an error message."""
+        stop_renewing = threading.Event()
+
+        def renew():
+            while not stop_renewing.wait(self.renew_seconds):
+                try:
+                    if not self.request("/renew", {"job_id": job["id"], "lease": job["lease"]})["ok"]:
+                        self.LOGGER.warning(f"Lease on job {job['id']} was lost, its result will be ignored")
+                        return
+                except (urllib.error.URLError, ConnectionError) as e:
+                    self.LOGGER.warning(f"Could not renew lease on job {job['id']}: {e}")
+
+        renewer = threading.Thread(target=renew, daemon=True)
+        renewer.start()
+        try:
+            self.encode(job["type"], job["input_file"], job["output_file"])
+            return None
+        except Exception as e:
+            return str(e)
+        finally:
+            stop_renewing.set()
+            renewer.join()
+
+    def encode(self, job_type, input_file, output_file):
+        """
+        Write the job's output, raising RuntimeError when the compressor reports a failure.
+
+        An output left by an earlier attempt is removed first, so only this attempt's result counts.
+        Images follow the same skip/passthrough decision as a local run.
+        """
+        if os.path.exists(output_file):
+            os.remove(output_file)
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        with Storage.staged_output(output_file, input_file, "image" if job_type == "image" else "video") as staging_file:
+            if job_type == "video":
+                if self.video_codec is None:
+                    self.video_codec = VideoCompressor.select_best_codec()
+                bitrate = VideoCompressor.get_bitrate(input_file)
+                framerate = VideoCompressor.get_output_framerate(input_file)
+                succeeded = VideoCompressor.compress_video(input_file, staging_file, bitrate, self.video_codec, framerate)
+            elif job_type == "image":
+                action = ImageCompressor.get_image_action(input_file)
+                if action == "skip":
+                    return
+                if action == "passthrough":
+                    with Storage.io_slot(input_file, staging_file):
+                        shutil.copy2(input_file, staging_file)
+                    return
+                source = io.BytesIO(Storage.read_file(input_file))
+                succeeded = ImageCompressor.compress_image(input_file, staging_file, source=source)
+                if succeeded:
+                    ImageCompressor.add_metadata(staging_file)
+                elif os.path.exists(staging_file):
+                    os.remove(staging_file)
+            elif job_type == "convert":
+                succeeded = VideoCompressor.convert_incompatible_video(input_file, staging_file)
+            else:
+                raise ValueError(f"Unknown job type: {job_type}")
+        if not succeeded:
+            raise RuntimeError(f"Compression failed for: {input_file}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Process jobs from a distributed compression coordinator")
+    parser.add_argument("coordinator_url", help="e.g. http://127.0.0.1:8765")
+    parser.add_argument("--id", dest="worker_id", default=None, help="Worker name shown in the coordinator log")
+    parser.add_argument("--poll-seconds", type=float, default=WORKER_POLL_SECONDS)
+    parser.add_argument("--renew-seconds", type=float, default=LEASE_RENEW_SECONDS)
+    parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(
+        level=args.log_level.upper(), stream=sys.stderr, format="%(asctime)s - %(levelname)s - %(name)s - %(message)s"
+    )
+    worker = Worker(args.coordinator_url, args.worker_id, args.poll_seconds, args.renew_seconds)
+    completed = worker.run()
+    worker.LOGGER.info(f"Worker {worker.worker_id} finished after {completed} jobs")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
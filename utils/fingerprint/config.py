@@ -0,0 +1,15 @@
+# Hash for content fingerprints: "xxh3_128" (the optional xxhash package, several GB/s per core),
+# "blake2b" (standard library), or "auto" to use xxhash when it is installed
+HASH_ALGORITHMS = ["auto", "xxh3_128", "blake2b"]
+DEFAULT_HASH_ALGORITHM = "auto"
+
+# Files at least this large are hashed through mmap (no copies into Python buffers), smaller
+# ones with reads into a reused buffer
+MMAP_THRESHOLD = 64 * 1024 * 1024
+
+# Bytes hashed per step, a multiple of the page size so mmap slices and reads stay aligned
+CHUNK_SIZE = 8 * 1024 * 1024
+
+# Sampled fingerprints hash the file size plus this many bytes at the head, middle and tail:
+# a quick change check for multi-GB videos, not proof that the content is identical
+SAMPLE_SIZE = 1024 * 1024
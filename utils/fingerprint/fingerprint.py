@@ -0,0 +1,97 @@
+import hashlib
+import mmap
+import os
+from utils.fingerprint.config import CHUNK_SIZE, DEFAULT_HASH_ALGORITHM, HASH_ALGORITHMS, MMAP_THRESHOLD, SAMPLE_SIZE
+
+try:
+    import xxhash
+except ImportError:  # optional, fingerprints fall back to BLAKE2
+    xxhash = None
+
+
+class Fingerprint:
+    """
+    Content fingerprints of media files, prefixed with the algorithm ("blake2b:...").
+
+    hash_file reads the whole file through mmap or page-aligned reads into a reused buffer;
+    sample_file hashes only the size and three slices, for quick change detection.
+    """
+    ALGORITHM = DEFAULT_HASH_ALGORITHM
+
+    @classmethod
+    def get_algorithm(cls, algorithm=None):
+        algorithm = cls.ALGORITHM if algorithm is None else algorithm
+        if algorithm not in HASH_ALGORITHMS:
+            raise ValueError(f"Unknown hash algorithm: {algorithm}")
+        if algorithm == "auto":
+            return "xxh3_128" if xxhash is not None else "blake2b"
+        if algorithm == "xxh3_128" and xxhash is None:
+            raise RuntimeError("The xxh3_128 hash requires the xxhash package")
+        return algorithm
+
+    @classmethod
+    def new_hash(cls, algorithm):
+        if algorithm == "xxh3_128":
+            return xxhash.xxh3_128()
+        return hashlib.blake2b(digest_size=16)
+
+    @classmethod
+    def update_from_mmap(cls, digest, file):
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            if hasattr(mapped, "madvise"):
+                mapped.madvise(mmap.MADV_SEQUENTIAL)
+            view = memoryview(mapped)
+            try:
+                for offset in range(0, len(mapped), CHUNK_SIZE):
+                    digest.update(view[offset:offset + CHUNK_SIZE])
+            finally:
+                view.release()
+
+    @classmethod
+    def update_from_reads(cls, digest, file):
+        buffer = bytearray(CHUNK_SIZE)
+        view = memoryview(buffer)
+        while read := file.readinto(buffer):
+            digest.update(view[:read])
+
+    @classmethod
+    def hash_file(cls, file_path, algorithm=None, use_mmap=None):
+        """Hash a whole file; use_mmap defaults to files of at least MMAP_THRESHOLD bytes."""
+        algorithm = cls.get_algorithm(algorithm)
+        digest = cls.new_hash(algorithm)
+        with open(file_path, "rb", buffering=0) as file:
+            size = os.fstat(file.fileno()).st_size
+            use_mmap = size >= MMAP_THRESHOLD if use_mmap is None else use_mmap
+            # Empty files cannot be mapped
+            if use_mmap and size:
+                cls.update_from_mmap(digest, file)
+            else:
+                cls.update_from_reads(digest, file)
+        return f"{algorithm}:{digest.hexdigest()}"
+
+    @classmethod
+    def read_at(cls, file, size, offset):
+        if hasattr(os, "pread"):
+            return os.pread(file.fileno(), size, offset)
+        file.seek(offset)  # pragma: no cover - Windows
+        return file.read(size)
+
+    @classmethod
+    def sample_file(cls, file_path, algorithm=None, sample_size=SAMPLE_SIZE):
+        """
+        Hash the size and sample_size bytes at the head, middle and tail of a file.
+
+        Files no larger than the three samples are hashed whole, so the fingerprint still covers
+        every byte. Edits that keep the size and miss the samples go unnoticed.
+        """
+        algorithm = cls.get_algorithm(algorithm)
+        digest = cls.new_hash(algorithm)
+        with open(file_path, "rb", buffering=0) as file:
+            size = os.fstat(file.fileno()).st_size
+            digest.update(size.to_bytes(8, "little"))
+            if size <= 3 * sample_size:
+                cls.update_from_reads(digest, file)
+            else:
+                for offset in (0, size // 2 - sample_size // 2, size - sample_size):
+                    digest.update(cls.read_at(file, sample_size, offset))
+        return f"sampled-{algorithm}:{digest.hexdigest()}"
@@ -2,61 +2,96 @@ import os
 from datetime import datetime
 from utils.video.video_compressor import VideoCompressor
 from utils.images.image_compressor import ImageCompressor
-from utils.logging.logging import setup_logging
+from utils.logging.config import DEFAULT_JSON_LOGS, DEFAULT_LOG_LEVEL
+from utils.logging.logging import setup_logging, stop_logging
+from utils.manifest.manifest import Manifest
+from utils.metrics.config import DEFAULT_METRICS_HOST, DEFAULT_METRICS_PORT
+from utils.metrics.prometheus import MetricsServer
+from utils.metrics.run_metrics import RunMetrics
+from utils.progress.progress import ProgressTracker
+from utils.storage.config import DEFAULT_OUTPUT_ROOT, DEFAULT_PASSTHROUGH
+from utils.storage.passthrough import Passthrough
+from utils.images.config import IMAGE_FILETYPES
+from utils.video.config import INCOMPATIBLE_FILETYPES, VIDEO_FILETYPES
 import logging
 
 
 class Handler:
     LOGGER = None
+    METRICS_HOST = DEFAULT_METRICS_HOST
+    METRICS_PORT = DEFAULT_METRICS_PORT
+    LOG_LEVEL = DEFAULT_LOG_LEVEL
+    JSON_LOGS = DEFAULT_JSON_LOGS
+    OUTPUT_ROOT = DEFAULT_OUTPUT_ROOT
+    PASSTHROUGH = DEFAULT_PASSTHROUGH
 
     @classmethod
-    def get_directory_size(cls, directory):
-        """Calculate total size of a directory in bytes"""
-        total_size = 0
-        if os.path.isfile(directory):
-            return os.path.getsize(directory)
-        
-        for dirpath, _, filenames in os.walk(directory):
-            for f in filenames:
-                fp = os.path.join(dirpath, f)
-                if not os.path.islink(fp):
-                    total_size += os.path.getsize(fp)
-        return total_size
+    def get_output_directory(cls, input_directory):
+        """Return a new timestamped output directory for a run over input_directory."""
+        timestamp = datetime.now().strftime("%d-%m-%Y_%H-%M-%S")
+        if cls.OUTPUT_ROOT:
+            # A separate target volume keeps writes off the disk being read
+            input_name = os.path.splitext(os.path.basename(os.path.normpath(input_directory)))[0]
+            return os.path.join(cls.OUTPUT_ROOT, f"{input_name}_output_{timestamp}")
+        if os.path.isfile(input_directory):
+            return f"{os.path.dirname(input_directory)}/output_{timestamp}"
+        return f"{input_directory}/output_{timestamp}"
 
     @classmethod
     def start_compression(cls, input_directory, process_video, process_image, convert_incompatible, progress_callback=None):
-        timestamp = datetime.now().strftime("%d-%m-%Y_%H-%M-%S")
-        
-        # Get initial size before compression
-        original_size = cls.get_directory_size(input_directory)
-        
-        if os.path.isfile(input_directory):
-            output_directory = f"{os.path.dirname(input_directory)}/output_{timestamp}"
-        else:
-            output_directory = f"{input_directory}/output_{timestamp}"
-            
+        """
+        Compress a directory or single file into a new timestamped output directory.
+
+        Returns the run summary: the output directory, file and failure counts, input and
+        output bytes of the processed media, the saved ratio and the same totals per media type.
+        """
+        RunMetrics.reset()
+        ProgressTracker.reset()
+        Manifest.reset()
+        Manifest.load(input_directory, cls.OUTPUT_ROOT)
+
+        output_directory = cls.get_output_directory(input_directory)
         os.makedirs(output_directory, exist_ok=True)
+        Manifest.start(output_directory)
 
-        setup_logging(output_directory)
+        setup_logging(output_directory, cls.LOG_LEVEL, cls.JSON_LOGS)
         cls.LOGGER = logging.getLogger(__name__)
         cls.LOGGER.info(f"Output directory created: {output_directory}")
+        if cls.METRICS_PORT is not None:
+            MetricsServer.start(cls.METRICS_HOST, cls.METRICS_PORT)
+
+        passthrough = None
+        if cls.PASSTHROUGH and os.path.isdir(input_directory):
+            handled_extensions = (VIDEO_FILETYPES if process_video else []) + (IMAGE_FILETYPES if process_image else []) + (
+                INCOMPATIBLE_FILETYPES if convert_incompatible else []
+            )
+            passthrough = Passthrough(input_directory, output_directory, handled_extensions)
 
         try:
             if process_video:
-                VideoCompressor.compress_videos_in_directory(input_directory, output_directory, progress_callback)
+                VideoCompressor.compress_videos_in_directory(input_directory, output_directory, progress_callback, passthrough=passthrough)
             if process_image:
-                ImageCompressor.compress_images_in_directory(input_directory, output_directory, progress_callback)
+                ImageCompressor.compress_images_in_directory(input_directory, output_directory, progress_callback, passthrough=passthrough)
             if convert_incompatible:
-                VideoCompressor.convert_incompatible_videos_in_directory_and_compress(input_directory, output_directory, progress_callback)
-                
-            compressed_size = cls.get_directory_size(output_directory)
-            return original_size, compressed_size,
+                VideoCompressor.convert_incompatible_videos_in_directory_and_compress(
+                    input_directory, output_directory, progress_callback, passthrough=passthrough
+                )
+            # Non-media files ride along with the first stage's walk; only walk again when no stage ran
+            if passthrough is not None:
+                if passthrough.claim_walk():
+                    passthrough.walk()
+                cls.LOGGER.info(f"Passed through files: {passthrough.summary()}")
+
+            # Sizes are accumulated as each job finishes, so no tree is walked again here
+            RunMetrics.write(output_directory)
+            return {"output_directory": output_directory, **RunMetrics.size_summary()}
         finally:
             cls.cleanup_logging()
 
     @classmethod
     def cleanup_logging(cls):
-        """Close all logging handlers"""
+        """Flush queued log records and close all logging handlers"""
+        stop_logging()
         if cls.LOGGER:
             for handler in cls.LOGGER.handlers[:]:
                 handler.close()
@@ -1 +1,81 @@
-IMAGE_FILETYPES = [".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tiff"]
+IMAGE_FILETYPES = [".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tiff", ".webp"]
+
+# Output format policy: maps an input extension to the target format name.
+# "keep" saves back to the input format, any other entry must be a key of OUTPUT_FORMATS.
+# Extensions missing from the policy fall back to "keep".
+OUTPUT_FORMATS = {
+    "jpeg": {"format": "JPEG", "extension": ".jpg", "feature": None},
+    "webp": {"format": "WEBP", "extension": ".webp", "feature": "webp"},
+    "avif": {"format": "AVIF", "extension": ".avif", "feature": "avif"},
+}
+
+DEFAULT_FORMAT_POLICY = {}
+
+# Smaller archives at a higher CPU cost: lossless-ish sources go to WebP, photos stay JPEG.
+ARCHIVE_FORMAT_POLICY = {
+    ".png": "webp",
+    ".bmp": "webp",
+    ".tiff": "webp",
+    ".gif": "keep",
+    ".jpg": "keep",
+    ".jpeg": "keep",
+}
+
+# Encoder effort knobs, "low" is fastest, "high" spends the most CPU for the smallest output.
+# WebP "method" ranges 0 (fast) to 6 (slow), AVIF "speed" ranges 0 (slow) to 10 (fast).
+ENCODER_EFFORT = {
+    "low": {
+        "JPEG": {"quality": 85, "optimize": False},
+        "WEBP": {"quality": 80, "method": 2},
+        "AVIF": {"quality": 60, "speed": 8},
+    },
+    "medium": {
+        "JPEG": {"quality": 85, "optimize": True},
+        "WEBP": {"quality": 80, "method": 4},
+        "AVIF": {"quality": 60, "speed": 6},
+    },
+    "high": {
+        "JPEG": {"quality": 85, "optimize": True, "progressive": True},
+        "WEBP": {"quality": 80, "method": 6},
+        "AVIF": {"quality": 60, "speed": 4},
+    },
+}
+
+DEFAULT_ENCODER_EFFORT = "medium"
+
+# Quality search: binary search the encoder quality on in-memory encodes to meet a target.
+# A target is a dict with exactly one of "target_size" (bytes), "min_ssim" (0-1) or "min_psnr" (dB).
+QUALITY_SEARCH_RANGE = (20, 95)
+DEFAULT_QUALITY_TARGET = None
+LOSSY_FORMATS = ["JPEG", "WEBP", "AVIF"]
+
+# Smart skip: images under MIN_PIXELS pixels (icons, thumbnails), or already stored in fewer than
+# MIN_BYTES_PER_PIXEL bytes per pixel, gain little from another resize. Read from the header only.
+# "passthrough" copies them to the output unchanged, "skip" leaves them out of the output and
+# "compress" processes them like any other image. None disables a threshold.
+SMALL_IMAGE_POLICIES = ["passthrough", "skip", "compress"]
+DEFAULT_SMALL_IMAGE_POLICY = "passthrough"
+DEFAULT_MIN_PIXELS = 256 * 256
+DEFAULT_MIN_BYTES_PER_PIXEL = 0.02
+
+# Output size: None halves both dimensions, a pixel count caps the long edge instead
+# (images already within the cap keep their size and are only re-encoded)
+DEFAULT_MAX_LONG_EDGE = None
+
+# Animated GIF/APNG/WebP: "frames" resizes every frame and keeps the timing and loop count,
+# "first_frame" keeps only the first frame (the behavior of still images), "passthrough" copies
+# animations to the output unchanged. Outputs in a format that cannot animate fall back to the first frame.
+ANIMATED_IMAGE_POLICIES = ["frames", "first_frame", "passthrough"]
+DEFAULT_ANIMATED_IMAGE_POLICY = "frames"
+ANIMATED_FORMATS = ["GIF", "PNG", "WEBP", "AVIF"]
+
+# Animated GIF frames are mapped onto one palette built from this many evenly spaced frames,
+# instead of a fresh median-cut palette per frame (which is slower and makes colors flicker)
+PALETTE_SAMPLE_FRAMES = 4
+
+# Batch resize: same-size images that shrink by a whole factor (e.g. the default halving) are decoded
+# BATCH_SIZE at a time into one array and box-downsampled together, instead of one LANCZOS resize
+# each. Box filtering is slightly softer than LANCZOS. Peak memory is about BATCH_SIZE decoded images.
+DEFAULT_BATCH_RESIZE = False
+BATCH_SIZE = 8
+BATCH_MODES = ["L", "RGB", "RGBA"]
@@ -1,61 +1,430 @@
+import contextlib
+import io
 import os
-from PIL import Image
+import shutil
+import threading
+import numpy as np
+from PIL import Image, ImageSequence, PngImagePlugin, features
+from utils.concurrency.config import DEFAULT_ADAPTIVE_CONCURRENCY
+from utils.concurrency.controller import AdaptiveConcurrency
 from utils.logging.logging import setup_logging
-from utils.images.config import IMAGE_FILETYPES
+from utils.images.config import (
+    ANIMATED_FORMATS,
+    ANIMATED_IMAGE_POLICIES,
+    BATCH_MODES,
+    BATCH_SIZE,
+    DEFAULT_ANIMATED_IMAGE_POLICY,
+    DEFAULT_BATCH_RESIZE,
+    DEFAULT_ENCODER_EFFORT,
+    DEFAULT_FORMAT_POLICY,
+    DEFAULT_MAX_LONG_EDGE,
+    DEFAULT_MIN_BYTES_PER_PIXEL,
+    DEFAULT_MIN_PIXELS,
+    DEFAULT_QUALITY_TARGET,
+    DEFAULT_SMALL_IMAGE_POLICY,
+    ENCODER_EFFORT,
+    IMAGE_FILETYPES,
+    LOSSY_FORMATS,
+    OUTPUT_FORMATS,
+    PALETTE_SAMPLE_FRAMES,
+    QUALITY_SEARCH_RANGE,
+    SMALL_IMAGE_POLICIES,
+)
+from utils.images.quality import METRICS, to_luma
+from utils.images.resample import box_downsample, get_box_factor
+from utils.metrics.prometheus import PrometheusMetrics
+from utils.metrics.run_metrics import RunMetrics
+from utils.pipeline.pipeline import Pipeline
+from utils.progress.progress import ProgressTracker
+from utils.storage.storage import Storage
 import piexif
 import logging
 
 class ImageCompressor:
     LOGGER = None
+    FORMAT_POLICY = DEFAULT_FORMAT_POLICY
+    EFFORT = DEFAULT_ENCODER_EFFORT
+    QUALITY_TARGET = DEFAULT_QUALITY_TARGET
+    ADAPTIVE_CONCURRENCY = DEFAULT_ADAPTIVE_CONCURRENCY
+    SMALL_IMAGE_POLICY = DEFAULT_SMALL_IMAGE_POLICY
+    MIN_PIXELS = DEFAULT_MIN_PIXELS
+    MIN_BYTES_PER_PIXEL = DEFAULT_MIN_BYTES_PER_PIXEL
+    MAX_LONG_EDGE = DEFAULT_MAX_LONG_EDGE
+    ANIMATED_IMAGE_POLICY = DEFAULT_ANIMATED_IMAGE_POLICY
+    BATCH_RESIZE = DEFAULT_BATCH_RESIZE
 
     @classmethod
-    def compress_images_in_directory(cls, input_directory, output_directory, progress_callback=None):
+    def compress_images_in_directory(
+        cls, input_directory, output_directory, progress_callback=None, format_policy=None, effort=None, quality_target=None,
+        passthrough=None
+    ):
         setup_logging(output_directory)
         cls.LOGGER = logging.getLogger(__name__)
         cls.LOGGER.info(f"Started compressing images in directory: {input_directory}")
 
         # Gather image files
-        image_files = cls.get_image_files(input_directory)
+        with RunMetrics.stage("scan"):
+            image_files = cls.get_image_files(input_directory, passthrough, output_directory)
 
         # Process each image file
         total_files = len(image_files)
-        for idx, input_file in enumerate(image_files, start=1):
-            try:
-                # Update progress
-                if progress_callback:
-                    progress_callback(idx / total_files, input_file, idx, total_files)
+        state = {"started": 0}
+        state_lock = threading.Lock()
 
-                # Calculate output file path
-                relative_path = os.path.relpath(input_file, input_directory)
-                output_file = os.path.join(output_directory, relative_path)
-                os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        def process(input_file, image=None):
+            with state_lock:
+                state["started"] += 1
+                idx = state["started"]
+            with controller.slot(os.path.getsize(input_file)) if controller else contextlib.nullcontext():
+                cls.process_image(
+                    input_file, input_directory, output_directory, idx, total_files, progress_callback, format_policy,
+                    effort, quality_target, passthrough, image
+                )
 
-                # Compress image
-                cls.compress_image(input_file, output_file)
-                cls.add_metadata(output_file)
+        def process_batch(batch):
+            for input_file, image in batch:
+                process(input_file, image)
 
-            except Exception as e:
-                cls.LOGGER.error(f"Uncaught error occurred while compressing image: {input_file}. ERROR MESSAGE: {str(e)}")
+        # With adaptive concurrency images are saved in parallel under the controller's live limit
+        controller = AdaptiveConcurrency(name="image saves").start() if cls.ADAPTIVE_CONCURRENCY else None
+        workers = controller.max_workers if controller else 1
+        try:
+            if cls.BATCH_RESIZE:
+                # Batches are decoded and resized on their own thread while the previous batch is saved
+                Pipeline.run(cls.iter_batches(image_files), [(cls.resize_batch, 1), (process_batch, workers)])
+            else:
+                Pipeline.run(image_files, [(process, workers)])
+        finally:
+            if controller:
+                controller.stop()
 
+        PrometheusMetrics.QUEUE_DEPTH.set(0, type="image")
         if progress_callback:
             progress_callback(1, "", total_files, total_files)
         cls.LOGGER.info(f"Finished compressing images in directory: {input_directory}")
 
     @classmethod
-    def get_image_files(cls, input_directory):
-        """Get a list of image files in the specified directory."""
+    def process_image(
+        cls, input_file, input_directory, output_directory, idx, total_files, progress_callback=None, format_policy=None,
+        effort=None, quality_target=None, passthrough=None, image=None
+    ):
+        """Compress one image of a directory run, tag it and account for it; image is a resize_batch result."""
+        output_file = None
+        succeeded = False
+        try:
+            PrometheusMetrics.QUEUE_DEPTH.set(total_files - idx + 1, type="image")
+
+            # Update progress
+            if progress_callback:
+                progress_callback(idx / total_files, input_file, idx, total_files)
+
+            # Calculate output file path
+            relative_path = os.path.relpath(input_file, input_directory)
+            output_file = os.path.join(output_directory, relative_path)
+
+            action = cls.get_image_action(input_file)
+            if action == "skip":
+                cls.LOGGER.info(f"Skipping image: {input_file} as it is below the size thresholds")
+                if passthrough is not None:
+                    passthrough.skipped(input_file)
+                return
+            if action == "passthrough":
+                cls.copy_unchanged(input_file, output_file)
+                cls.LOGGER.info(f"Image {input_file} copied unchanged to: {output_file}")
+                return
+
+            output_file = cls.get_output_path(input_file, output_file, format_policy)
+            os.makedirs(os.path.dirname(output_file), exist_ok=True)
+
+            # Compress image
+            job_id = ProgressTracker.start_job(input_file, "image", megapixels=cls.get_megapixels(input_file))
+            try:
+                source = io.BytesIO(Storage.read_file(input_file)) if image is None else None
+                with Storage.staged_output(output_file, input_file, "image") as staging_file:
+                    with RunMetrics.stage("encode", input_file, "image"):
+                        succeeded = cls.compress_image(
+                            input_file, staging_file, effort, quality_target, image=image, source=source
+                        )
+                    if succeeded:
+                        ProgressTracker.update_job(job_id, percent=90)
+                        with RunMetrics.stage("metadata", input_file, "image"):
+                            cls.add_metadata(staging_file)
+                    elif os.path.exists(staging_file):
+                        # Do not leave a partially written image to be moved into place
+                        os.remove(staging_file)
+            finally:
+                ProgressTracker.finish_job(job_id)
+
+        except Exception as e:
+            cls.LOGGER.error(f"Uncaught error occurred while compressing image: {input_file}. ERROR MESSAGE: {str(e)}")
+        RunMetrics.record_job("image", input_file, output_file, succeeded)
+
+    @classmethod
+    def copy_unchanged(cls, input_file, output_file):
+        """Copy an image to the output as is and account for it."""
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+        with Storage.io_slot(input_file, output_file), RunMetrics.stage("write", input_file, "image"):
+            shutil.copy2(input_file, output_file)
+        RunMetrics.record_job("image", input_file, output_file, True)
+
+    @classmethod
+    def get_image_files(cls, input_directory, passthrough=None, output_directory=None):
+        """
+        Get a list of image files in the specified directory.
+
+        With a passthrough, processed images and (when this is the run's first walk) every other
+        file are handed to it during the walk. The run's own output_directory and the outputs of
+        prior runs are not walked: images copied there unchanged carry no processed tag and would
+        be copied again, one folder deeper, on every run.
+        """
         image_files = []
-        for root, _, files in os.walk(input_directory):
+        walk_others = passthrough is not None and passthrough.claim_walk()
+        excluded_directories = Storage.find_run_directories(input_directory)
+        if output_directory:
+            excluded_directories.add(os.path.abspath(output_directory))
+        for root, dirs, files in os.walk(input_directory):
+            dirs[:] = [d for d in dirs if os.path.abspath(os.path.join(root, d)) not in excluded_directories]
             for file in files:
-                if any(file.lower().endswith(ext) for ext in IMAGE_FILETYPES) and not cls.is_processed(os.path.join(root, file)):
-                    image_files.append(os.path.join(root, file))
+                file_path = os.path.join(root, file)
+                if not any(file.lower().endswith(ext) for ext in IMAGE_FILETYPES):
+                    if walk_others:
+                        passthrough.other(file_path)
+                elif not cls.is_processed(file_path):
+                    image_files.append(file_path)
+                elif passthrough is not None:
+                    passthrough.skipped(file_path)
         return image_files
 
+    @classmethod
+    def get_batch_key(cls, file_path):
+        """Return (size, mode, factor) for images resize_batch can shrink, or None for any other image."""
+        try:
+            with Image.open(file_path) as img:
+                if getattr(img, "is_animated", False) is True or img.mode not in BATCH_MODES:
+                    return None
+                size, mode = img.size, img.mode
+        except Exception:
+            return None
+        if cls.get_size_action(file_path) != "compress":
+            return None
+        factor = get_box_factor(size, cls.get_target_size(*size))
+        return (size, mode, factor) if factor else None
+
+    @classmethod
+    def iter_batches(cls, image_files):
+        """
+        Yield lists of images to resize together, sharing a size, mode and whole shrink factor.
+
+        Groups are yielded once they reach BATCH_SIZE and the rest at the end; images that
+        cannot be batched are yielded alone as they come.
+        """
+        groups = {}
+        for file_path in image_files:
+            key = cls.get_batch_key(file_path)
+            if key is None:
+                yield [file_path]
+                continue
+            groups.setdefault(key, []).append(file_path)
+            if len(groups[key]) == BATCH_SIZE:
+                yield groups.pop(key)
+        yield from groups.values()
+
+    @classmethod
+    def resize_batch(cls, batch):
+        """
+        Decode a batch from iter_batches into one array and box-downsample it in a single pass.
+
+        Returns (file, resized image) pairs. Single images, and images that fail to decode, are
+        paired with None and resized by compress_image as usual.
+        """
+        if len(batch) == 1:
+            return [(batch[0], None)]
+        stack, decoded, infos = None, [], []
+        for file_path in batch:
+            try:
+                with Image.open(file_path) as img:
+                    pixels = np.asarray(img)
+                    if stack is None:
+                        stack = np.empty((len(batch),) + pixels.shape, np.uint8)
+                        mode = img.mode
+                    stack[len(decoded)] = pixels
+                    decoded.append(file_path)
+                    infos.append(dict(img.info))
+            except Exception as e:
+                cls.LOGGER.warning(f"Could not decode image: {file_path} for a batch resize. ERROR MESSAGE: {str(e)}")
+        if not decoded:
+            return [(file_path, None) for file_path in batch]
+        factor = get_box_factor((stack.shape[2], stack.shape[1]), cls.get_target_size(stack.shape[2], stack.shape[1]))
+        with RunMetrics.stage("encode"):
+            resized = box_downsample(stack[:len(decoded)], factor)
+        images = {}
+        for file_path, pixels, info in zip(decoded, resized, infos):
+            images[file_path] = Image.fromarray(pixels, mode)
+            images[file_path].info = info
+        return [(file_path, images.get(file_path)) for file_path in batch]
+
+    @classmethod
+    def get_megapixels(cls, file_path):
+        """Return the image size in megapixels from its header, or None if it cannot be read."""
+        try:
+            with Image.open(file_path) as img:
+                return img.width * img.height / 1_000_000
+        except Exception:
+            return None
+
+    @classmethod
+    def read_header(cls, file_path):
+        """Return (width, height, file size) from the image header, without decoding pixels, or None."""
+        try:
+            with Image.open(file_path) as img:
+                width, height = img.size
+            return width, height, os.path.getsize(file_path)
+        except Exception:
+            return None
+
+    @classmethod
+    def is_animated(cls, file_path):
+        """Whether the image has more than one frame (animated GIF/APNG/WebP), read from the header."""
+        try:
+            with Image.open(file_path) as img:
+                return getattr(img, "is_animated", False) is True
+        except Exception:
+            return False
+
+    @classmethod
+    def get_image_action(cls, file_path):
+        """
+        Return what a run does with an image: "compress", "skip" or "passthrough" (copy unchanged).
+
+        Small images follow the small image policy (get_size_action) and animations are passed
+        through under the "passthrough" animated image policy.
+        """
+        size_action = cls.get_size_action(file_path)
+        if size_action != "compress":
+            return size_action
+        if cls.ANIMATED_IMAGE_POLICY == "passthrough" and cls.is_animated(file_path):
+            return "passthrough"
+        return "compress"
+
+    @classmethod
+    def get_size_action(cls, file_path, min_pixels=None, min_bytes_per_pixel=None):
+        """
+        Return "compress", or the small image policy ("passthrough"/"skip") when the image is under
+        the pixel count or bytes-per-pixel thresholds. Unreadable headers are left to compress_image.
+        """
+        if cls.SMALL_IMAGE_POLICY not in SMALL_IMAGE_POLICIES:
+            raise ValueError(f"Unknown small image policy: {cls.SMALL_IMAGE_POLICY}")
+        header = cls.read_header(file_path)
+        if header is None or cls.SMALL_IMAGE_POLICY == "compress":
+            return "compress"
+        width, height, file_size = header
+        pixels = width * height
+        min_pixels = cls.MIN_PIXELS if min_pixels is None else min_pixels
+        min_bytes_per_pixel = cls.MIN_BYTES_PER_PIXEL if min_bytes_per_pixel is None else min_bytes_per_pixel
+        if (min_pixels and pixels < min_pixels) or (min_bytes_per_pixel and pixels and file_size / pixels < min_bytes_per_pixel):
+            return cls.SMALL_IMAGE_POLICY
+        return "compress"
+
+    @classmethod
+    def get_target_size(cls, width, height, max_long_edge=None):
+        """Halve both dimensions, or with a long edge cap scale down to fit it (never up)."""
+        max_long_edge = cls.MAX_LONG_EDGE if max_long_edge is None else max_long_edge
+        if not max_long_edge:
+            return max(1, round(width / 2)), max(1, round(height / 2))
+        scale = max_long_edge / max(width, height)
+        if scale >= 1:
+            return width, height
+        return max(1, round(width * scale)), max(1, round(height * scale))
+
+    @classmethod
+    def is_format_supported(cls, format_name):
+        """Check if Pillow was built with an encoder for the given output format."""
+        feature = OUTPUT_FORMATS[format_name]["feature"]
+        return feature is None or features.check(feature)
+
+    @classmethod
+    def get_output_format(cls, input_file, format_policy=None):
+        """Return the output format name for an input file, or None to keep its format."""
+        format_policy = cls.FORMAT_POLICY if format_policy is None else format_policy
+        extension = os.path.splitext(input_file)[1].lower()
+        format_name = format_policy.get(extension, "keep")
+        if format_name == "keep":
+            return None
+        if format_name not in OUTPUT_FORMATS:
+            cls.LOGGER.warning(f"Unknown output format '{format_name}' for {input_file}, keeping original format")
+            return None
+        if not cls.is_format_supported(format_name):
+            cls.LOGGER.warning(f"Output format '{format_name}' is not supported by Pillow, keeping original format for {input_file}")
+            return None
+        return format_name
+
+    @classmethod
+    def get_output_path(cls, input_file, output_file, format_policy=None):
+        """Swap the output extension to match the format chosen by the policy."""
+        format_name = cls.get_output_format(input_file, format_policy)
+        if format_name is None:
+            return output_file
+        return os.path.splitext(output_file)[0] + OUTPUT_FORMATS[format_name]["extension"]
+
+    @classmethod
+    def get_format_for_path(cls, file_path):
+        """Return the output format name matching the extension of a path, if any."""
+        pil_format = Image.registered_extensions().get(os.path.splitext(file_path)[1].lower())
+        for format_name, output_format in OUTPUT_FORMATS.items():
+            if output_format["format"] == pil_format:
+                return format_name
+        return None
+
+    @classmethod
+    def get_save_options(cls, format_name, effort=None):
+        """Build the Pillow save arguments for a format at the given encoder effort."""
+        effort = cls.EFFORT if effort is None else effort
+        pil_format = OUTPUT_FORMATS[format_name]["format"]
+        options = dict(ENCODER_EFFORT[effort][pil_format])
+        if pil_format != "JPEG":
+            # JPEG outputs are tagged by add_metadata, other formats carry the marker from the encode
+            exif_dict = {"0th": {piexif.ImageIFD.ImageDescription: b"Processed"}}
+            options["exif"] = piexif.dump(exif_dict)
+        return pil_format, options
+
+    @classmethod
+    def get_marker_options(cls, pil_format):
+        """Save arguments tagging an output as processed during the encode, for outputs add_metadata leaves alone."""
+        if pil_format == "GIF":
+            return {"comment": b"Processed"}
+        if pil_format == "PNG":
+            pnginfo = PngImagePlugin.PngInfo()
+            pnginfo.add_text("Comment", "Processed")
+            return {"pnginfo": pnginfo}
+        if pil_format in ("WEBP", "AVIF"):
+            return {"exif": piexif.dump({"0th": {piexif.ImageIFD.ImageDescription: b"Processed"}})}
+        return {}
+
+    @classmethod
+    def prepare_for_format(cls, img, pil_format):
+        """Convert the image mode to one the target encoder accepts."""
+        has_alpha = img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+        if pil_format == "JPEG":
+            return img if img.mode in ("RGB", "L") else img.convert("RGB")
+        if img.mode in ("RGB", "RGBA"):
+            return img
+        return img.convert("RGBA" if has_alpha else "RGB")
+
     @classmethod
     def add_metadata(cls, file_path):
         try:
             with Image.open(file_path) as img:
-                if file_path.lower().endswith(('.jpg', '.jpeg', '.tiff')):
+                if getattr(img, "is_animated", False) is True:
+                    # Animations are tagged during the encode, re-saving here would keep only the first frame
+                    return
+                if file_path.lower().endswith(('.jpg', '.jpeg')):
+                    # Insert the EXIF segment in place so the encoded image data is not re-compressed
+                    exif_dict = piexif.load(img.info.get("exif", file_path))
+                    exif_dict["0th"][piexif.ImageIFD.ImageDescription] = b"Processed"
+                    exif_bytes = piexif.dump(exif_dict)
+                    img.close()
+                    piexif.insert(exif_bytes, file_path)
+                elif file_path.lower().endswith('.tiff'):
                     exif_dict = piexif.load(img.info.get("exif", file_path))
                     exif_dict["0th"][piexif.ImageIFD.ImageDescription] = b"Processed"
                     exif_bytes = piexif.dump(exif_dict)
@@ -75,22 +444,176 @@ class ImageCompressor:
                     return b"Processed" in exif_data["0th"].get(piexif.ImageIFD.ImageDescription, b"")
                 elif file_path.lower().endswith(".png"):
                     return img.info.get("Comment") == "Processed"
+                elif file_path.lower().endswith(".gif"):
+                    return img.info.get("comment") == b"Processed"
+                elif file_path.lower().endswith(".webp"):
+                    exif = img.info.get("exif")
+                    return bool(exif) and b"Processed" in piexif.load(exif)["0th"].get(piexif.ImageIFD.ImageDescription, b"")
         except Exception as e:
             cls.LOGGER.error(f"An error occurred while reading metadata from image: {file_path}. ERROR MESSAGE: {str(e)}")
         return False
 
     @classmethod
-    def compress_image(cls, input_file, output_file):
+    def encode_to_bytes(cls, img, pil_format, options):
+        """Encode an image in memory and return the encoded bytes."""
+        buffer = io.BytesIO()
+        img.save(buffer, pil_format, **options)
+        return buffer.getvalue()
+
+    @classmethod
+    def search_quality(cls, img, pil_format, options, quality_target):
+        """
+        Binary search the encoder quality against a quality target using in-memory encodes.
+
+        Returns the encoded bytes of the smallest output meeting a "min_ssim"/"min_psnr" floor,
+        or of the highest quality fitting under "target_size". When the target cannot be met
+        the closest end of QUALITY_SEARCH_RANGE is used.
+        """
+        low, high = QUALITY_SEARCH_RANGE
+        encodes = {}
+
+        def encode(quality):
+            if quality not in encodes:
+                encodes[quality] = cls.encode_to_bytes(img, pil_format, {**options, "quality": quality})
+            return encodes[quality]
+
+        if "target_size" in quality_target:
+            target_size = quality_target["target_size"]
+            best = low
+            while low <= high:
+                quality = (low + high) // 2
+                if len(encode(quality)) <= target_size:
+                    best, low = quality, quality + 1
+                else:
+                    high = quality - 1
+            return encode(best)
+
+        metric_name, threshold = next(
+            (name, quality_target[f"min_{name}"]) for name in METRICS if f"min_{name}" in quality_target
+        )
+        metric = METRICS[metric_name]
+        reference = to_luma(img)
+        best = high
+        while low <= high:
+            quality = (low + high) // 2
+            with Image.open(io.BytesIO(encode(quality))) as decoded:
+                score = metric(reference, to_luma(decoded))
+            if score >= threshold:
+                best, high = quality, quality - 1
+            else:
+                low = quality + 1
+        return encode(best)
+
+    @classmethod
+    def quantize_frames(cls, frames):
+        """
+        Map RGBA frames onto one palette built from up to PALETTE_SAMPLE_FRAMES evenly spaced frames.
+
+        Returns the palette frames and their transparent index, None when every frame is opaque.
+        """
+        transparent = any(frame.getchannel("A").getextrema()[0] < 128 for frame in frames)
+        samples = frames[::max(1, len(frames) // PALETTE_SAMPLE_FRAMES)][:PALETTE_SAMPLE_FRAMES]
+        width, height = frames[0].size
+        mosaic = Image.new("RGB", (width, height * len(samples)))
+        for index, sample in enumerate(samples):
+            mosaic.paste(sample.convert("RGB"), (0, index * height))
+        palette_image = mosaic.quantize(255 if transparent else 256, method=Image.Quantize.FASTOCTREE)
+        palette = palette_image.getpalette()
+        # The quantized palette only holds the colors in use, so one appended entry is free for transparency
+        transparency = len(palette) // 3 if transparent else None
+        quantized = []
+        for frame in frames:
+            indexed = frame.convert("RGB").quantize(palette=palette_image, dither=Image.Dither.NONE)
+            if transparent:
+                indexed.putpalette(palette + [0, 0, 0])
+                indexed.paste(transparency, mask=frame.getchannel("A").point(lambda alpha: 255 if alpha < 128 else 0))
+            quantized.append(indexed)
+        return quantized, transparency
+
+    @classmethod
+    def save_animation(cls, img, output_file, new_size, pil_format, options):
+        """
+        Resize every frame of an animation and save it with the source frame durations and loop count.
+
+        Frames arrive composited to full size, so each one replaces the last. GIF frames share one
+        palette (quantize_frames); the other formats keep full color.
+        """
+        frames, durations = [], []
+        for frame in ImageSequence.Iterator(img):
+            rgba = frame.convert("RGBA")
+            # Read after the frame is loaded, WebP only fills in the duration then
+            durations.append(frame.info.get("duration", 100))
+            frame = rgba
+            if frame.size != new_size:
+                frame = frame.resize(new_size, Image.LANCZOS)
+            frames.append(frame)
+        options = {**cls.get_marker_options(pil_format), **options, "save_all": True, "duration": durations}
+        if "loop" in img.info:
+            options["loop"] = img.info["loop"]
+        if pil_format == "GIF":
+            frames, transparency = cls.quantize_frames(frames)
+            if transparency is not None:
+                options.update(transparency=transparency, disposal=2)
+        frames[0].save(output_file, pil_format, append_images=frames[1:], **options)
+
+    @classmethod
+    def compress_image(
+        cls, input_file, output_file, effort=None, quality_target=None, max_long_edge=None, image=None, source=None
+    ):
+        """
+        Resize an image and save it, converting when the output extension differs from the input.
+
+        An image already resized by resize_batch is passed as image and only saved. source is the
+        input already read into a file object (Storage.read_file); input_file is opened otherwise.
+
+        Animations keep every frame under the "frames" policy when the output format can animate,
+        otherwise only the first frame is kept. Quality targets apply to still images only.
+        Returns whether the image was saved; errors are logged.
+        """
+        if cls.ANIMATED_IMAGE_POLICY not in ANIMATED_IMAGE_POLICIES:
+            raise ValueError(f"Unknown animated image policy: {cls.ANIMATED_IMAGE_POLICY}")
         try:
-            with Image.open(input_file) as img:
+            with Image.open(input_file if source is None else source) if image is None else contextlib.nullcontext(image) as img:
                 # Calculate new size
-                new_width = max(1, round(img.width / 2))
-                new_height = max(1, round(img.height / 2))
-                new_size = (new_width, new_height)
-                
+                new_size = cls.get_target_size(img.width, img.height, max_long_edge) if image is None else img.size
+
+                input_extension = os.path.splitext(input_file)[1].lower()
+                output_extension = os.path.splitext(output_file)[1].lower()
+                format_name = cls.get_format_for_path(output_file)
+                quality_target = cls.QUALITY_TARGET if quality_target is None else quality_target
+                if input_extension == output_extension or format_name is None:
+                    pil_format, options = None, {"optimize": True, "quality": 85}
+                    if output_extension in (".gif", ".webp"):
+                        # add_metadata does not tag these formats, so tag them during the encode
+                        options.update(cls.get_marker_options(Image.registered_extensions().get(output_extension)))
+                else:
+                    pil_format, options = cls.get_save_options(format_name, effort)
+
+                if getattr(img, "is_animated", False) is True and cls.ANIMATED_IMAGE_POLICY == "frames":
+                    animated_format = pil_format or Image.registered_extensions().get(output_extension)
+                    if animated_format in ANIMATED_FORMATS:
+                        cls.save_animation(img, output_file, new_size, animated_format, options)
+                        cls.LOGGER.info(f"Animated image {input_file} saved successfully to: {output_file}")
+                        return True
+                    cls.LOGGER.warning(f"{output_extension} cannot hold an animation, keeping the first frame of {input_file}")
+
                 # Resize and save image
-                img = img.resize(new_size, Image.LANCZOS)
-                img.save(output_file, optimize=True, quality=85)
+                if new_size != img.size:
+                    img = img.resize(new_size, Image.LANCZOS)
+                if pil_format:
+                    img = cls.prepare_for_format(img, pil_format)
+
+                if quality_target and format_name is not None and OUTPUT_FORMATS[format_name]["format"] in LOSSY_FORMATS:
+                    pil_format = OUTPUT_FORMATS[format_name]["format"]
+                    data = cls.search_quality(cls.prepare_for_format(img, pil_format), pil_format, options, quality_target)
+                    with open(output_file, "wb") as output:
+                        output.write(data)
+                elif pil_format:
+                    img.save(output_file, pil_format, **options)
+                else:
+                    img.save(output_file, **options)
                 cls.LOGGER.info(f"Image {input_file} saved successfully to: {output_file}")
+            return True
         except Exception as e:
-            cls.LOGGER.error(f"An error occurred while compressing image: {input_file}. ERROR MESSAGE: {str(e)}")
\ No newline at end of file
+            cls.LOGGER.error(f"An error occurred while compressing image: {input_file}. ERROR MESSAGE: {str(e)}")
+            return False
\ No newline at end of file
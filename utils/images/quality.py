@@ -0,0 +1,44 @@
+import numpy as np
+
+DATA_RANGE = 255.0
+SSIM_WINDOW = 7
+
+
+def to_luma(img):
+    """Convert a PIL image to a float64 luminance array."""
+    return np.asarray(img.convert("L"), dtype=np.float64)
+
+
+def psnr(reference, distorted, data_range=DATA_RANGE):
+    """Peak signal-to-noise ratio in dB between two same-sized arrays."""
+    mse = np.mean(np.square(reference - distorted))
+    if mse == 0:
+        return float("inf")
+    return float(10 * np.log10(data_range ** 2 / mse))
+
+
+def box_mean(values, window):
+    """Mean over every window x window block, computed with a summed-area table."""
+    table = np.pad(values, ((1, 0), (1, 0))).cumsum(axis=0).cumsum(axis=1)
+    sums = table[window:, window:] - table[:-window, window:] - table[window:, :-window] + table[:-window, :-window]
+    return sums / (window * window)
+
+
+def ssim(reference, distorted, window=SSIM_WINDOW, data_range=DATA_RANGE):
+    """Mean structural similarity over sliding uniform windows."""
+    window = max(1, min(window, *reference.shape))
+    c1 = (0.01 * data_range) ** 2
+    c2 = (0.03 * data_range) ** 2
+
+    mu_x = box_mean(reference, window)
+    mu_y = box_mean(distorted, window)
+    mu_xx, mu_yy, mu_xy = mu_x * mu_x, mu_y * mu_y, mu_x * mu_y
+    sigma_xx = box_mean(reference * reference, window) - mu_xx
+    sigma_yy = box_mean(distorted * distorted, window) - mu_yy
+    sigma_xy = box_mean(reference * distorted, window) - mu_xy
+
+    ssim_map = ((2 * mu_xy + c1) * (2 * sigma_xy + c2)) / ((mu_xx + mu_yy + c1) * (sigma_xx + sigma_yy + c2))
+    return float(ssim_map.mean())
+
+
+METRICS = {"ssim": ssim, "psnr": psnr}
@@ -0,0 +1,29 @@
+import numpy as np
+
+
+def get_box_factor(size, new_size):
+    """Return the integer factor shrinking size exactly to new_size on both axes, or None if there is none."""
+    width, height = size
+    new_width, new_height = new_size
+    factor = width // new_width
+    if factor < 2 or new_width * factor != width or new_height * factor != height:
+        return None
+    return factor
+
+
+def box_downsample(stack, factor):
+    """
+    Average every factor x factor block of a (count, height, width[, channels]) uint8 stack.
+
+    Trailing rows and columns that do not fill a block are dropped. The sum is accumulated over
+    strided views of the stack, one per block offset, so every image is reduced in one pass.
+    """
+    height, width = stack.shape[1] // factor, stack.shape[2] // factor
+    # 255 * factor ** 2 fits uint16 up to a factor of 16
+    accumulator = np.zeros((stack.shape[0], height, width) + stack.shape[3:], np.uint16 if factor <= 16 else np.uint32)
+    for y in range(factor):
+        for x in range(factor):
+            accumulator += stack[:, y:height * factor:factor, x:width * factor:factor]
+    accumulator += factor * factor // 2
+    accumulator //= factor * factor
+    return accumulator.astype(np.uint8)
@@ -0,0 +1,12 @@
+LOG_FILENAME = "app.log"
+JSON_LOG_FILENAME = "app.jsonl"
+LOG_FORMAT = "%(asctime)s - %(levelname)s - %(name)s - %(message)s"
+
+# Root level for a run, accepts a level name or number
+DEFAULT_LOG_LEVEL = "DEBUG"
+
+# Also write one JSON object per record to JSON_LOG_FILENAME
+DEFAULT_JSON_LOGS = False
+
+# Third-party loggers that are too chatty at DEBUG
+QUIET_LOGGERS = {"PIL": "WARNING"}
@@ -1,28 +1,96 @@
+import json
 import logging
 import logging.config
+import logging.handlers
 import os
+import queue
+import threading
+from utils.logging.config import (
+    DEFAULT_JSON_LOGS,
+    DEFAULT_LOG_LEVEL,
+    JSON_LOG_FILENAME,
+    LOG_FILENAME,
+    LOG_FORMAT,
+    QUIET_LOGGERS,
+)
 
+# Active run: the output directory, the root QueueHandler and the listener thread writing to disk
+_LOCK = threading.Lock()
+_STATE = {"output_dir": None, "queue_handler": None, "listener": None}
 
-def setup_logging(output_dir):
+
+class JsonFormatter(logging.Formatter):
+    """Format records as single-line JSON objects."""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+def setup_logging(output_dir, level=DEFAULT_LOG_LEVEL, json_lines=DEFAULT_JSON_LOGS):
     """
     Set up logging configuration.
 
+    Records are put on an in-memory queue by the root logger and written to disk by a
+    QueueListener thread, so workers never block on file I/O. Calling again with the same
+    directory is a no-op; a different directory stops the previous run's listener first.
+
     Parameters:
     - output_dir (str): Path to the output directory where logs should be saved.
+    - level (str|int): Root logger level.
+    - json_lines (bool): Also write JSON lines to app.jsonl.
     """
-    # Ensure the output directory exists
-    os.makedirs(output_dir, exist_ok=True)
-
-    # Full path to the log file
-    log_file = os.path.join(output_dir, "app.log")
-
-    logging.basicConfig(
-        level=logging.DEBUG,  # Set root logger level
-        format="%(asctime)s - %(levelname)s - %(name)s - %(message)s",
-        handlers=[
-            logging.FileHandler(
-                log_file, mode="a", encoding="utf-8"
-            )  # Use UTF-8 encoding for log file
-        ],
-    )
-    logging.getLogger("PIL").setLevel(logging.WARNING)
+    output_dir = os.path.abspath(output_dir)
+    with _LOCK:
+        if _STATE["output_dir"] == output_dir:
+            return
+        _stop_listener()
+
+        # Ensure the output directory exists
+        os.makedirs(output_dir, exist_ok=True)
+
+        # Use UTF-8 encoding for log files
+        file_handler = logging.FileHandler(os.path.join(output_dir, LOG_FILENAME), mode="a", encoding="utf-8")
+        file_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        handlers = [file_handler]
+        if json_lines:
+            json_handler = logging.FileHandler(os.path.join(output_dir, JSON_LOG_FILENAME), mode="a", encoding="utf-8")
+            json_handler.setFormatter(JsonFormatter())
+            handlers.append(json_handler)
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+
+        root_logger = logging.getLogger()
+        root_logger.addHandler(queue_handler)
+        root_logger.setLevel(level)
+        for name, quiet_level in QUIET_LOGGERS.items():
+            logging.getLogger(name).setLevel(quiet_level)
+
+        _STATE.update(output_dir=output_dir, queue_handler=queue_handler, listener=listener)
+
+
+def stop_logging():
+    """Flush queued records to disk and detach the current run's handlers."""
+    with _LOCK:
+        _stop_listener()
+
+
+def _stop_listener():
+    if _STATE["queue_handler"] is not None:
+        logging.getLogger().removeHandler(_STATE["queue_handler"])
+    if _STATE["listener"] is not None:
+        _STATE["listener"].stop()
+        for handler in _STATE["listener"].handlers:
+            handler.close()
+    _STATE.update(output_dir=None, queue_handler=None, listener=None)
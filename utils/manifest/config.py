@@ -0,0 +1,8 @@
+# Written into every run's output directory, one JSON record per compressed video:
+# source and output path, size and mtime, the source's sampled fingerprint, the output's hash
+# and the encode settings
+MANIFEST_FILENAME = "manifest.jsonl"
+
+# Consult manifests of prior runs during discovery, found in the output directories directly
+# under the input directory (the default location) and under the output root
+DEFAULT_USE_MANIFESTS = True
@@ -0,0 +1,116 @@
+import glob
+import json
+import logging
+import os
+import threading
+from utils.fingerprint.fingerprint import Fingerprint
+from utils.manifest.config import DEFAULT_USE_MANIFESTS, MANIFEST_FILENAME
+
+
+class Manifest:
+    """
+    Stat records of compressed videos, appended per run and consulted by later runs.
+
+    A source whose size and mtime match a record made with the same settings, or an output of a
+    prior run that is unchanged, is recognized as processed from a stat call alone. A source whose
+    mtime changed but size did not (e.g. a copied tree) is checked against its sampled fingerprint.
+    Anything else (unknown, modified, other settings) falls back to probing for the compressed tag.
+    """
+    LOCK = threading.Lock()
+    ENABLED = DEFAULT_USE_MANIFESTS
+    PATH = None
+    KNOWN = {}
+
+    @classmethod
+    def reset(cls):
+        with cls.LOCK:
+            cls.PATH = None
+            cls.KNOWN = {}
+
+    @classmethod
+    def start(cls, output_directory):
+        """Append this run's records to the manifest in output_directory."""
+        if cls.ENABLED:
+            cls.PATH = os.path.join(output_directory, MANIFEST_FILENAME)
+
+    @classmethod
+    def find_manifests(cls, input_directory, output_root=None):
+        base_directory = input_directory if os.path.isdir(input_directory) else os.path.dirname(input_directory)
+        paths = glob.glob(os.path.join(glob.escape(base_directory), "*", MANIFEST_FILENAME))
+        if output_root:
+            paths += glob.glob(os.path.join(glob.escape(output_root), "*", MANIFEST_FILENAME))
+        return sorted(set(paths))
+
+    @classmethod
+    def load(cls, input_directory, output_root=None):
+        """Load the records of prior runs over input_directory; later records win."""
+        if not cls.ENABLED:
+            return
+        logger = logging.getLogger(__name__)
+        known = {}
+        for manifest_path in cls.find_manifests(input_directory, output_root):
+            try:
+                with open(manifest_path, encoding="utf-8") as manifest:
+                    for line in manifest:
+                        record = json.loads(line)
+                        known[record["source"]] = (
+                            record["source_size"], record["source_mtime_ns"], record["settings"], record.get("source_fingerprint")
+                        )
+                        # Outputs are recognized whatever settings the current run uses
+                        known[record["output"]] = (record["output_size"], record["output_mtime_ns"], None, None)
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Could not read manifest: {manifest_path}. ERROR MESSAGE: {e}")
+        with cls.LOCK:
+            cls.KNOWN.update(known)
+        if known:
+            logger.info(f"Loaded {len(known)} manifest records of prior runs")
+
+    @classmethod
+    def get_stat(cls, file_path):
+        stat = os.stat(file_path)
+        return stat.st_size, stat.st_mtime_ns
+
+    @classmethod
+    def is_recorded(cls, file_path, settings=None):
+        """Whether file_path is an unchanged source compressed with settings, or an unchanged output."""
+        with cls.LOCK:
+            entry = cls.KNOWN.get(os.path.abspath(file_path))
+        if entry is None:
+            return False
+        size, mtime_ns, recorded_settings, fingerprint = entry
+        if recorded_settings is not None and recorded_settings != settings:
+            return False
+        try:
+            current_size, current_mtime_ns = cls.get_stat(file_path)
+            if (current_size, current_mtime_ns) == (size, mtime_ns):
+                return True
+            return current_size == size and fingerprint is not None and Fingerprint.sample_file(file_path) == fingerprint
+        except (OSError, RuntimeError):
+            return False
+
+    @classmethod
+    def record(cls, input_file, output_file, settings=None):
+        """Append a finished job to this run's manifest; a no-op outside a run or without an output."""
+        if cls.PATH is None or output_file is None or not os.path.exists(output_file):
+            return
+        try:
+            source_size, source_mtime_ns = cls.get_stat(input_file)
+            output_size, output_mtime_ns = cls.get_stat(output_file)
+            record = {
+                "source": os.path.abspath(input_file),
+                "source_size": source_size,
+                "source_mtime_ns": source_mtime_ns,
+                "source_fingerprint": Fingerprint.sample_file(input_file),
+                "output": os.path.abspath(output_file),
+                "output_size": output_size,
+                "output_mtime_ns": output_mtime_ns,
+                "output_hash": Fingerprint.hash_file(output_file),
+                "settings": settings,
+            }
+        except OSError as e:
+            logging.getLogger(__name__).warning(f"Could not record {input_file} in the manifest. ERROR MESSAGE: {e}")
+            return
+        line = json.dumps(record) + "\n"
+        with cls.LOCK:
+            with open(cls.PATH, "a", encoding="utf-8") as manifest:
+                manifest.write(line)
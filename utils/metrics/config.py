@@ -0,0 +1,18 @@
+# Pipeline stages timed per file and per run:
+# scan (discovery and already-processed checks), probe (ffprobe/bitrate/framerate),
+# encode (ffmpeg or Pillow resize and save), metadata (processed markers written after encode),
+# write (moving staged outputs from the scratch directory into place)
+STAGES = ["scan", "probe", "encode", "metadata", "write"]
+
+PERCENTILES = [50, 90, 99]
+SLOWEST_FILES_COUNT = 10
+METRICS_FILENAME = "metrics.json"
+
+# Prometheus text exposition endpoint, disabled when the port is None
+DEFAULT_METRICS_HOST = "127.0.0.1"
+DEFAULT_METRICS_PORT = None
+METRICS_PATH = "/metrics"
+METRICS_PREFIX = "media_compressor"
+
+# Histogram buckets in seconds, spanning quick image saves to long video encodes
+DURATION_BUCKETS = [0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900, 3600]
@@ -0,0 +1,154 @@
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from utils.metrics.config import DURATION_BUCKETS, METRICS_PATH, METRICS_PREFIX
+
+
+def escape_label_value(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(label_names, label_values):
+    if not label_names:
+        return ""
+    pairs = ",".join(f'{name}="{escape_label_value(value)}"' for name, value in zip(label_names, label_values))
+    return "{" + pairs + "}"
+
+
+class Counter:
+    TYPE = "counter"
+
+    def __init__(self, name, documentation, label_names=()):
+        self.name = f"{METRICS_PREFIX}_{name}"
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, "") for name in self.label_names)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def samples(self):
+        with self.lock:
+            return [(self.name, key, value) for key, value in sorted(self.values.items())]
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.TYPE}"]
+        for name, key, value in self.samples():
+            lines.append(f"{name}{format_labels(self.label_names, key)} {value}")
+        return "\n".join(lines)
+
+
+class Gauge(Counter):
+    TYPE = "gauge"
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.label_names)
+        with self.lock:
+            self.values[key] = value
+
+
+class Histogram(Counter):
+    TYPE = "histogram"
+
+    def __init__(self, name, documentation, label_names=(), buckets=DURATION_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = list(buckets)
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, "") for name in self.label_names)
+        with self.lock:
+            counts, total, count = self.values.get(key, ([0] * len(self.buckets), 0, 0))
+            counts = [c + (value <= bound) for c, bound in zip(counts, self.buckets)]
+            self.values[key] = (counts, total + value, count + 1)
+
+    def samples(self):
+        samples = []
+        with self.lock:
+            for key, (counts, total, count) in sorted(self.values.items()):
+                for bound, bucket_count in zip(self.buckets, counts):
+                    samples.append((f"{self.name}_bucket", key + (bound,), bucket_count))
+                samples.append((f"{self.name}_bucket", key + ("+Inf",), count))
+                samples.append((f"{self.name}_sum", key, total))
+                samples.append((f"{self.name}_count", key, count))
+        return samples
+
+    def expose(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.TYPE}"]
+        for name, key, value in self.samples():
+            label_names = self.label_names + ("le",) if name.endswith("_bucket") else self.label_names
+            lines.append(f"{name}{format_labels(label_names, key)} {value}")
+        return "\n".join(lines)
+
+
+class PrometheusMetrics:
+    """Process-wide counters, gauges and histograms of the compression core."""
+    JOBS = Counter("jobs_total", "Compression jobs by media type and outcome.", ("type", "status"))
+    BYTES_IN = Counter("input_bytes_total", "Bytes read from source files of finished jobs.", ("type",))
+    BYTES_OUT = Counter("output_bytes_total", "Bytes written to outputs of finished jobs.", ("type",))
+    STAGE_SECONDS = Histogram("stage_duration_seconds", "Time spent per pipeline stage.", ("stage",))
+    ENCODER_FALLBACKS = Counter("encoder_fallbacks_total", "Encodes retried on a fallback encoder.", ("from_codec", "to_codec"))
+    ACTIVE_PROCESSES = Gauge("active_processes", "Running ffmpeg/ffprobe child processes.", ("command",))
+    QUEUE_DEPTH = Gauge("queue_depth", "Discovered files waiting to be processed.", ("type",))
+    ALL = [JOBS, BYTES_IN, BYTES_OUT, STAGE_SECONDS, ENCODER_FALLBACKS, ACTIVE_PROCESSES, QUEUE_DEPTH]
+
+    @classmethod
+    def count_job(cls, media_type, succeeded, input_bytes, output_bytes):
+        """Count a finished job whose sizes are already known."""
+        cls.JOBS.inc(type=media_type, status="succeeded" if succeeded else "failed")
+        cls.BYTES_IN.inc(input_bytes, type=media_type)
+        if succeeded:
+            cls.BYTES_OUT.inc(output_bytes, type=media_type)
+
+    @classmethod
+    def expose(cls):
+        return "\n".join(metric.expose() for metric in cls.ALL) + "\n"
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != METRICS_PATH:
+            self.send_error(404)
+            return
+        body = PrometheusMetrics.expose().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logging.getLogger(__name__).debug(format % args)
+
+
+class MetricsServer:
+    """Optional stdlib HTTP server exposing PrometheusMetrics for scraping."""
+    SERVER = None
+    THREAD = None
+    LOCK = threading.Lock()
+
+    @classmethod
+    def start(cls, host, port):
+        """Start serving in a daemon thread, a no-op if already running. Returns the bound port."""
+        with cls.LOCK:
+            if cls.SERVER is None:
+                cls.SERVER = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+                cls.SERVER.daemon_threads = True
+                cls.THREAD = threading.Thread(target=cls.SERVER.serve_forever, daemon=True)
+                cls.THREAD.start()
+                logging.getLogger(__name__).info(f"Metrics endpoint listening on http://{host}:{cls.SERVER.server_port}{METRICS_PATH}")
+            return cls.SERVER.server_port
+
+    @classmethod
+    def stop(cls):
+        with cls.LOCK:
+            if cls.SERVER is not None:
+                cls.SERVER.shutdown()
+                cls.SERVER.server_close()
+                cls.SERVER = None
+                cls.THREAD = None
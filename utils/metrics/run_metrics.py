@@ -0,0 +1,195 @@
+import json
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from utils.metrics.config import METRICS_FILENAME, PERCENTILES, SLOWEST_FILES_COUNT, STAGES
+from utils.metrics.prometheus import PrometheusMetrics
+
+
+class RunMetrics:
+    """Per-file and per-stage timings of a compression run, shared by the handler and compressors."""
+    LOCK = threading.Lock()
+    STARTED_AT = None
+    FILES = {}
+    RUN_STAGES = {}
+    SIZES = {}
+    # Per-thread stack of the time spent in stages nested in each open stage
+    NESTED = threading.local()
+
+    @classmethod
+    def reset(cls):
+        with cls.LOCK:
+            cls.STARTED_AT = time.perf_counter()
+            cls.FILES = {}
+            cls.RUN_STAGES = {}
+            cls.SIZES = {}
+
+    @classmethod
+    def get_file_record(cls, file_path, media_type=None):
+        record = cls.FILES.setdefault(file_path, {"type": media_type, "stages": {}})
+        if media_type and not record["type"]:
+            record["type"] = media_type
+        return record
+
+    @classmethod
+    def add_timing(cls, stage, seconds, file_path=None, media_type=None):
+        """Add a duration to a stage, either of a single file or of the run as a whole."""
+        if stage not in STAGES:
+            raise ValueError(f"Unknown stage: {stage}")
+        with cls.LOCK:
+            if file_path is None:
+                cls.RUN_STAGES[stage] = cls.RUN_STAGES.get(stage, 0) + seconds
+            else:
+                stages = cls.get_file_record(file_path, media_type)["stages"]
+                stages[stage] = stages.get(stage, 0) + seconds
+        PrometheusMetrics.STAGE_SECONDS.observe(seconds, stage=stage)
+
+    @classmethod
+    @contextmanager
+    def stage(cls, stage, file_path=None, media_type=None):
+        """
+        Time the body of a with-block as a stage of a file, or of the run when no file is given.
+
+        Time spent in a stage nested in the body on the same thread (e.g. probes run by the
+        discovery walk a "scan" times) is counted in the nested stage only.
+        """
+        nested = cls.NESTED.__dict__.setdefault("stack", [])
+        nested.append(0)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            nested_seconds = nested.pop()
+            if nested:
+                nested[-1] += seconds
+            cls.add_timing(stage, seconds - nested_seconds, file_path, media_type)
+
+    @classmethod
+    def record(cls, file_path, **fields):
+        """Attach extra fields (e.g. media_duration) to a file record."""
+        with cls.LOCK:
+            cls.get_file_record(file_path).update(fields)
+
+    @classmethod
+    def record_job(cls, media_type, input_file, output_file, succeeded):
+        """
+        Account a finished job's input and output bytes as it completes.
+
+        succeeded is the job's own result, so a partial output left by a failed job is never
+        counted; a missing output also counts as a failure. Only the job's own files are sized,
+        so the totals never include logs or other files in the trees.
+        """
+        succeeded = succeeded and output_file is not None
+        try:
+            input_bytes = os.path.getsize(input_file)
+            output_bytes = os.path.getsize(output_file) if succeeded else 0
+        except OSError:
+            input_bytes, output_bytes, succeeded = 0, 0, False
+
+        with cls.LOCK:
+            totals = cls.SIZES.setdefault(
+                media_type, {"files": 0, "failed": 0, "input_bytes": 0, "output_bytes": 0}
+            )
+            if succeeded:
+                totals["files"] += 1
+                totals["input_bytes"] += input_bytes
+                totals["output_bytes"] += output_bytes
+            else:
+                totals["failed"] += 1
+            cls.get_file_record(input_file, media_type).update(input_bytes=input_bytes, output_bytes=output_bytes)
+        PrometheusMetrics.count_job(media_type, succeeded, input_bytes, output_bytes)
+
+    @classmethod
+    def size_summary(cls):
+        """
+        Return the byte totals of the run, overall and per media type.
+
+        Failed jobs are counted but excluded from the byte totals so the savings
+        compare only inputs that produced an output.
+        """
+        with cls.LOCK:
+            by_type = {media_type: dict(totals) for media_type, totals in cls.SIZES.items()}
+        input_bytes = sum(totals["input_bytes"] for totals in by_type.values())
+        output_bytes = sum(totals["output_bytes"] for totals in by_type.values())
+        return {
+            "files": sum(totals["files"] for totals in by_type.values()),
+            "failed": sum(totals["failed"] for totals in by_type.values()),
+            "input_bytes": input_bytes,
+            "output_bytes": output_bytes,
+            "saved_ratio": round(1 - output_bytes / input_bytes, 4) if input_bytes else 0,
+            "by_type": by_type,
+        }
+
+    @classmethod
+    def percentile(cls, sorted_values, percent):
+        """Nearest-rank percentile of an already sorted list."""
+        if not sorted_values:
+            return 0
+        rank = max(0, min(len(sorted_values) - 1, math.ceil(percent / 100 * len(sorted_values)) - 1))
+        return sorted_values[rank]
+
+    @classmethod
+    def summary(cls):
+        """Aggregate the collected timings into a machine-readable summary."""
+        with cls.LOCK:
+            files = {path: dict(record, stages=dict(record["stages"])) for path, record in cls.FILES.items()}
+            run_stages = dict(cls.RUN_STAGES)
+            wall_seconds = time.perf_counter() - cls.STARTED_AT if cls.STARTED_AT else 0
+
+        stages = {}
+        for stage in STAGES:
+            durations = sorted(record["stages"][stage] for record in files.values() if stage in record["stages"])
+            total = sum(durations) + run_stages.get(stage, 0)
+            if not total:
+                continue
+            stages[stage] = {
+                "total_seconds": round(total, 4),
+                "files": len(durations),
+                **{f"p{p}_seconds": round(cls.percentile(durations, p), 4) for p in PERCENTILES},
+                "max_seconds": round(durations[-1], 4) if durations else 0,
+            }
+
+        file_rows = []
+        for path, record in files.items():
+            row = {"path": path, "type": record["type"], "total_seconds": round(sum(record["stages"].values()), 4)}
+            row.update({f"{stage}_seconds": round(seconds, 4) for stage, seconds in record["stages"].items()})
+            encode_seconds = record["stages"].get("encode")
+            if record.get("media_duration") and encode_seconds:
+                row["speed_vs_realtime"] = round(record["media_duration"] / encode_seconds, 3)
+            file_rows.append(row)
+        file_rows.sort(key=lambda row: row["total_seconds"], reverse=True)
+
+        encoded_videos = [
+            record for record in files.values()
+            if record["type"] == "video" and record.get("media_duration") and "encode" in record["stages"]
+        ]
+        video_encode_seconds = sum(record["stages"]["encode"] for record in encoded_videos)
+        media_seconds = sum(record["media_duration"] for record in encoded_videos)
+        return {
+            "wall_seconds": round(wall_seconds, 4),
+            "files": sum(1 for record in files.values() if "encode" in record["stages"]),
+            "stages": stages,
+            "video_speed_vs_realtime": round(media_seconds / video_encode_seconds, 3) if video_encode_seconds else None,
+            "slowest_files": file_rows[:SLOWEST_FILES_COUNT],
+            "sizes": cls.size_summary(),
+        }
+
+    @classmethod
+    def write(cls, output_directory):
+        """Write the summary next to the run log and log a short digest of it."""
+        summary = cls.summary()
+        metrics_file = os.path.join(output_directory, METRICS_FILENAME)
+        with open(metrics_file, "w", encoding="utf-8") as output:
+            json.dump(summary, output, indent=2)
+
+        logger = logging.getLogger(__name__)
+        logger.info(f"Run finished: {summary['files']} files in {summary['wall_seconds']}s, metrics written to: {metrics_file}")
+        for stage, stats in summary["stages"].items():
+            logger.info(f"Stage {stage}: total {stats['total_seconds']}s, p50 {stats['p50_seconds']}s, max {stats['max_seconds']}s")
+        if summary["video_speed_vs_realtime"]:
+            logger.info(f"Video encode speed: {summary['video_speed_vs_realtime']}x realtime")
+        return summary
@@ -0,0 +1,6 @@
+# Items buffered between two pipeline stages; keeps discovery and probing a few files ahead
+# of the encoder without holding a whole tree in memory
+DEFAULT_QUEUE_SIZE = 8
+
+# Seconds a blocked stage waits before re-checking whether the pipeline was stopped
+POLL_INTERVAL = 0.1
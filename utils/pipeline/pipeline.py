@@ -0,0 +1,101 @@
+import queue
+import threading
+from utils.pipeline.config import DEFAULT_QUEUE_SIZE, POLL_INTERVAL
+
+_DONE = object()
+
+
+class Pipeline:
+    """
+    Streaming stages connected by bounded queues.
+
+    The source is iterated on its own thread and every stage but the last runs on worker
+    threads. The last stage runs on the calling thread, so progress callbacks fire where they
+    did before and an exception raised into the caller (e.g. the UI's stop) ends the run.
+    """
+
+    @classmethod
+    def run(cls, source, stages, queue_size=DEFAULT_QUEUE_SIZE):
+        """
+        Feed items from source through stages, a list of (function, workers) pairs.
+
+        A function returns the item for the next stage, or None to drop it. Functions should
+        handle per-item errors themselves; an exception escaping one stops the pipeline and is
+        re-raised here once the threads have exited.
+        """
+        stop = threading.Event()
+        errors = []
+        queues = [queue.Queue(queue_size) for _ in stages]
+        remaining = [workers for _, workers in stages]
+        remaining_lock = threading.Lock()
+
+        def put(index, item):
+            while not stop.is_set():
+                try:
+                    queues[index].put(item, timeout=POLL_INTERVAL)
+                    return
+                except queue.Full:
+                    continue
+
+        def get(index):
+            while not stop.is_set():
+                try:
+                    return queues[index].get(timeout=POLL_INTERVAL)
+                except queue.Empty:
+                    continue
+            return _DONE
+
+        def close(index):
+            """Signal every worker of a stage that no more items are coming."""
+            for _ in range(stages[index][1]):
+                put(index, _DONE)
+
+        def produce():
+            try:
+                for item in source:
+                    if stop.is_set():
+                        return
+                    put(0, item)
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+            finally:
+                close(0)
+
+        def work(index):
+            function = stages[index][0]
+            try:
+                while True:
+                    item = get(index)
+                    if item is _DONE:
+                        break
+                    result = function(item)
+                    if result is not None and index + 1 < len(stages):
+                        put(index + 1, result)
+            except BaseException as e:
+                errors.append(e)
+                stop.set()
+            finally:
+                with remaining_lock:
+                    remaining[index] -= 1
+                    last_worker = remaining[index] == 0
+                if last_worker and index + 1 < len(stages):
+                    close(index + 1)
+
+        threads = [threading.Thread(target=produce, daemon=True)]
+        for index, (_, workers) in enumerate(stages):
+            # The calling thread is one of the last stage's workers
+            extra_workers = workers - 1 if index == len(stages) - 1 else workers
+            threads += [threading.Thread(target=work, args=(index,), daemon=True) for _ in range(extra_workers)]
+        for thread in threads:
+            thread.start()
+
+        try:
+            work(len(stages) - 1)
+        finally:
+            if errors:
+                stop.set()
+            for thread in threads:
+                thread.join()
+        if errors:
+            raise errors[0]
@@ -0,0 +1,13 @@
+# Child processes of a command allowed to run at once, by executable name; commands not listed
+# are only bounded by their callers (the encode pipeline already limits concurrent ffmpeg runs)
+COMMAND_CONCURRENCY = {"ffprobe": 64}
+DEFAULT_COMMAND_CONCURRENCY = None
+
+# Seconds before a child process is killed, by executable name; None waits indefinitely
+# (encodes of long videos can legitimately take hours)
+COMMAND_TIMEOUT_SECONDS = {"ffprobe": 60}
+DEFAULT_COMMAND_TIMEOUT_SECONDS = None
+
+# Seconds a blocked synchronous caller waits before re-checking, so an exception raised into
+# its thread (e.g. the UI's stop) cancels the process promptly
+POLL_INTERVAL = 0.1
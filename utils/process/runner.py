@@ -0,0 +1,177 @@
+import asyncio
+import concurrent.futures
+import contextlib
+import os
+import subprocess
+import sys
+import threading
+from utils.concurrency.resources import get_command_prefix
+from utils.metrics.prometheus import PrometheusMetrics
+from utils.process.config import (
+    COMMAND_CONCURRENCY,
+    COMMAND_TIMEOUT_SECONDS,
+    DEFAULT_COMMAND_CONCURRENCY,
+    DEFAULT_COMMAND_TIMEOUT_SECONDS,
+    POLL_INTERVAL,
+)
+
+
+class ProcessRunner:
+    """
+    Runs child processes on a shared asyncio event loop.
+
+    The loop lives on one background thread, so waiting on many processes costs no thread per
+    process. run() is a synchronous facade shaped like subprocess.run for callers on any thread,
+    and run_many() runs a batch of commands concurrently. Each command is bounded by a semaphore
+    and a timeout per executable (utils/process/config.py); timed out and cancelled processes are
+    killed.
+    """
+
+    LOOP = None
+    THREAD = None
+    LOCK = threading.Lock()
+    SEMAPHORES = {}
+
+    @classmethod
+    def get_loop(cls):
+        with cls.LOCK:
+            if cls.LOOP is None or not cls.THREAD.is_alive():
+                cls.LOOP = asyncio.new_event_loop()
+                cls.SEMAPHORES = {}
+                cls.THREAD = threading.Thread(target=cls.LOOP.run_forever, name="process-runner", daemon=True)
+                cls.THREAD.start()
+            return cls.LOOP
+
+    @classmethod
+    def get_semaphore(cls, command):
+        """Semaphore bounding a command, or None; only called on the loop thread."""
+        limit = COMMAND_CONCURRENCY.get(command, DEFAULT_COMMAND_CONCURRENCY)
+        if not limit:
+            return None
+        if command not in cls.SEMAPHORES:
+            cls.SEMAPHORES[command] = asyncio.Semaphore(limit)
+        return cls.SEMAPHORES[command]
+
+    @classmethod
+    def get_timeout(cls, command):
+        return COMMAND_TIMEOUT_SECONDS.get(command, DEFAULT_COMMAND_TIMEOUT_SECONDS)
+
+    @classmethod
+    async def read_stream(cls, stream, chunks, on_line):
+        """Collect a pipe into chunks, handing each line to on_line as it arrives."""
+        if on_line is None:
+            chunks.append(await stream.read())
+            return
+        while True:
+            line = await stream.readline()
+            if not line:
+                return
+            chunks.append(line)
+            on_line(line)
+
+    @classmethod
+    async def run_async(
+        cls, cmd, capture_output=False, text=False, check=False, timeout=None, on_stdout_line=None,
+        on_stderr_line=None, resources=None
+    ):
+        """
+        Run cmd and return a subprocess.CompletedProcess once it exits.
+
+        on_stdout_line/on_stderr_line receive each raw output line while the process runs (the
+        stream is piped even without capture_output). Raises subprocess.CalledProcessError with
+        check, and subprocess.TimeoutExpired after killing the process when timeout elapses.
+        """
+        command = os.path.basename(cmd[0])
+        timeout = cls.get_timeout(command) if timeout is None else timeout
+        pipe_stdout = capture_output or on_stdout_line is not None
+        pipe_stderr = capture_output or on_stderr_line is not None
+        kwargs = {}
+        if sys.platform == "win32": #pragma: no cover
+            kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW
+        # Affinity, nice and ionice are set by a command prefix before ffmpeg execs, so every ffmpeg
+        # thread inherits them; preexec_fn is not safe in this multithreaded process
+        prefix = get_command_prefix(resources)
+
+        semaphore = cls.get_semaphore(command)
+        async with semaphore if semaphore else contextlib.nullcontext():
+            PrometheusMetrics.ACTIVE_PROCESSES.inc(command=command)
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *prefix, *cmd,
+                    stdout=asyncio.subprocess.PIPE if pipe_stdout else None,
+                    stderr=asyncio.subprocess.PIPE if pipe_stderr else None,
+                    **kwargs,
+                )
+
+                stdout_chunks, stderr_chunks = [], []
+                readers = []
+                if pipe_stdout:
+                    readers.append(cls.read_stream(process.stdout, stdout_chunks, on_stdout_line))
+                if pipe_stderr:
+                    readers.append(cls.read_stream(process.stderr, stderr_chunks, on_stderr_line))
+                try:
+                    await asyncio.wait_for(asyncio.gather(*readers, process.wait()), timeout or None)
+                except asyncio.TimeoutError:
+                    await cls.kill(process)
+                    raise subprocess.TimeoutExpired(
+                        cmd, timeout, output=cls.decode(stdout_chunks, text), stderr=cls.decode(stderr_chunks, text)
+                    ) from None
+                except BaseException:
+                    await cls.kill(process)
+                    raise
+            finally:
+                PrometheusMetrics.ACTIVE_PROCESSES.dec(command=command)
+
+        stdout = cls.decode(stdout_chunks, text) if capture_output else None
+        stderr = cls.decode(stderr_chunks, text) if capture_output else None
+        if check and process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, cmd, output=stdout, stderr=stderr)
+        return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+
+    @classmethod
+    async def kill(cls, process):
+        if process.returncode is None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+            await process.wait()
+
+    @classmethod
+    def decode(cls, chunks, text):
+        data = b"".join(chunks)
+        return data.decode("utf-8", errors="replace") if text else data
+
+    @classmethod
+    def wait(cls, coroutine):
+        """
+        Run a coroutine on the loop and block until it finishes.
+
+        The wait polls so an exception raised into this thread cancels the coroutine, which
+        kills its processes, instead of leaving them running.
+        """
+        future = asyncio.run_coroutine_threadsafe(coroutine, cls.get_loop())
+        try:
+            while not future.done():
+                concurrent.futures.wait([future], timeout=POLL_INTERVAL)
+        except BaseException:
+            future.cancel()
+            raise
+        return future.result()
+
+    @classmethod
+    def run(cls, cmd, **kwargs):
+        """Synchronous facade over run_async, a drop-in for subprocess.run(cmd, **kwargs)."""
+        return cls.wait(cls.run_async(cmd, **kwargs))
+
+    @classmethod
+    def run_many(cls, cmds, **kwargs):
+        """
+        Run commands concurrently, within their semaphores, and return results in order.
+
+        A failing command yields its exception in place of a CompletedProcess.
+        """
+        async def run_all():
+            return await asyncio.gather(*(cls.run_async(cmd, **kwargs) for cmd in cmds), return_exceptions=True)
+        return cls.wait(run_all())
+
@@ -0,0 +1,5 @@
+# Number of in-flight jobs listed before the rest are summarized as "... and N more"
+MAX_JOBS_SHOWN = 6
+
+# How often the command line renderer redraws the progress view, in seconds
+CLI_REFRESH_SECONDS = 1.0
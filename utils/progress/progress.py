@@ -0,0 +1,123 @@
+import itertools
+import os
+import threading
+import time
+
+
+class ProgressTracker:
+    """
+    Live view of in-flight jobs shared by the compressors, the GUI and the CLI.
+
+    Compressors start, update and finish jobs; renderers take a snapshot and format it.
+    """
+    LOCK = threading.Lock()
+    JOB_IDS = itertools.count(1)
+    STARTED_AT = None
+    JOBS = {}
+    COMPLETED = {"jobs": 0, "media_seconds": 0.0, "megapixels": 0.0}
+
+    @classmethod
+    def reset(cls):
+        with cls.LOCK:
+            cls.STARTED_AT = time.perf_counter()
+            cls.JOBS = {}
+            cls.COMPLETED = {"jobs": 0, "media_seconds": 0.0, "megapixels": 0.0}
+
+    @classmethod
+    def start_job(cls, file_path, media_type, media_duration=None, megapixels=None):
+        """Register an in-flight job and return its id."""
+        with cls.LOCK:
+            job_id = next(cls.JOB_IDS)
+            cls.JOBS[job_id] = {
+                "id": job_id,
+                "file": file_path,
+                "type": media_type,
+                "percent": 0.0,
+                "speed": None,
+                "media_duration": media_duration,
+                "megapixels": megapixels,
+                "started_at": time.perf_counter(),
+            }
+            return job_id
+
+    @classmethod
+    def update_job(cls, job_id, percent=None, speed=None):
+        with cls.LOCK:
+            job = cls.JOBS.get(job_id)
+            if job is None:
+                return
+            if percent is not None:
+                job["percent"] = max(0.0, min(100.0, percent))
+            if speed is not None:
+                job["speed"] = speed
+
+    @classmethod
+    def update_from_ffmpeg(cls, job_id, progress):
+        """Apply a block of ffmpeg -progress key=value pairs to a job."""
+        with cls.LOCK:
+            job = cls.JOBS.get(job_id)
+            media_duration = job["media_duration"] if job else None
+        percent = None
+        out_time_us = progress.get("out_time_us") or progress.get("out_time_ms")
+        if media_duration and out_time_us not in (None, "N/A"):
+            # out_time_ms is misnamed by ffmpeg and also holds microseconds
+            percent = int(out_time_us) / 1_000_000 / media_duration * 100
+        speed = None
+        if progress.get("speed", "N/A").rstrip("x") not in ("N/A", ""):
+            speed = float(progress["speed"].rstrip("x"))
+        cls.update_job(job_id, percent, speed)
+
+    @classmethod
+    def finish_job(cls, job_id):
+        with cls.LOCK:
+            job = cls.JOBS.pop(job_id, None)
+            if job is None:
+                return
+            cls.COMPLETED["jobs"] += 1
+            cls.COMPLETED["media_seconds"] += job["media_duration"] or 0
+            cls.COMPLETED["megapixels"] += job["megapixels"] or 0
+
+    @classmethod
+    def snapshot(cls):
+        """Return a consistent copy of the in-flight jobs and aggregate throughput."""
+        now = time.perf_counter()
+        with cls.LOCK:
+            jobs = []
+            for job in cls.JOBS.values():
+                job = dict(job)
+                job["elapsed"] = now - job.pop("started_at")
+                if job["type"] == "image" and job["megapixels"] and job["elapsed"] > 0:
+                    job["speed"] = job["megapixels"] / job["elapsed"]
+                jobs.append(job)
+            completed = dict(cls.COMPLETED)
+            elapsed = now - cls.STARTED_AT if cls.STARTED_AT is not None else 0
+
+        return {
+            "jobs": sorted(jobs, key=lambda job: job["id"]),
+            "completed": completed["jobs"],
+            "elapsed": elapsed,
+            "realtime_speed": completed["media_seconds"] / elapsed if elapsed else 0.0,
+            "megapixels_per_second": completed["megapixels"] / elapsed if elapsed else 0.0,
+        }
+
+    @classmethod
+    def format_lines(cls, snapshot, max_jobs=None):
+        """Render a snapshot as text lines, one per in-flight job plus an aggregate line."""
+        lines = []
+        jobs = snapshot["jobs"] if max_jobs is None else snapshot["jobs"][:max_jobs]
+        for job in jobs:
+            if job["speed"] is None:
+                speed = "--"
+            elif job["type"] == "video":
+                speed = f"{job['speed']:.2f}x"
+            else:
+                speed = f"{job['speed']:.1f} MP/s"
+            lines.append(f"{os.path.basename(job['file'])}  {job['percent']:.0f}%  {speed}")
+        hidden = len(snapshot["jobs"]) - len(jobs)
+        if hidden > 0:
+            lines.append(f"... and {hidden} more")
+        lines.append(
+            f"Active: {len(snapshot['jobs'])}  Done: {snapshot['completed']}  "
+            f"Throughput: {snapshot['realtime_speed']:.2f}x realtime, {snapshot['megapixels_per_second']:.1f} MP/s"
+        )
+        return lines
@@ -0,0 +1,24 @@
+# Parent directory for run outputs, None keeps them inside the input tree
+DEFAULT_OUTPUT_ROOT = None
+
+# Encodes are written here first and moved to the output directory on completion, None writes in place
+DEFAULT_SCRATCH_DIRECTORY = None
+
+# Maximum concurrent jobs touching a volume, keyed by any path on that volume
+VOLUME_IO_CONCURRENCY = {}
+
+# Spinning disks thrash when several jobs seek at once; solid-state volumes are unlimited (None)
+ROTATIONAL_IO_CONCURRENCY = 1
+DEFAULT_IO_CONCURRENCY = None
+
+# Passthrough: mirror every file no stage writes an output for (non-media files, disabled media
+# types, already processed or skipped media) into the output tree, fed by the discovery walk
+DEFAULT_PASSTHROUGH = False
+
+# Ways to place a passthrough file, tried in order: "reflink" (copy-on-write clone, Linux
+# Btrfs/XFS), "hardlink" (shares the source's data, so editing one edits both; same volume only)
+# and "copy" (in-kernel copy_file_range/sendfile, no userspace buffers)
+PASSTHROUGH_LINK_MODES = ["reflink", "hardlink", "copy"]
+
+# Linux FICLONE ioctl request number
+FICLONE = 0x40049409
@@ -0,0 +1,72 @@
+import logging
+import os
+import threading
+from utils.storage.storage import Storage
+
+
+class Passthrough:
+    """
+    Mirrors the files of a run that no stage writes an output for into the output tree.
+
+    The first discovery walk of the run claims the passthrough and hands it every file it does
+    not process (other()); stages hand it media they skip (skipped()). Run output directories
+    inside the input tree are never mirrored.
+    """
+
+    def __init__(self, input_directory, output_directory, handled_extensions, modes=None):
+        self.input_directory = input_directory
+        self.output_directory = output_directory
+        self.handled_extensions = {extension.lower() for extension in handled_extensions}
+        self.modes = modes
+        self.excluded_directories = {os.path.abspath(output_directory)} | Storage.find_run_directories(input_directory)
+        self.lock = threading.Lock()
+        self.walked = False
+        self.counts = {}
+        self.logger = logging.getLogger(__name__)
+
+    def claim_walk(self):
+        """Return True for the first walk of the run, which then reports its other files."""
+        with self.lock:
+            claimed, self.walked = not self.walked, True
+            return claimed
+
+    def is_excluded(self, file_path):
+        file_path = os.path.abspath(file_path)
+        return any(file_path.startswith(directory + os.sep) for directory in self.excluded_directories)
+
+    def other(self, file_path):
+        """Mirror a file the walk does not process, unless another stage handles its type."""
+        if os.path.splitext(file_path)[1].lower() not in self.handled_extensions:
+            self.link(file_path)
+
+    def skipped(self, file_path):
+        """Mirror media a stage skips (already processed or below its thresholds)."""
+        self.link(file_path)
+
+    def link(self, file_path):
+        if self.is_excluded(file_path):
+            return
+        output_file = os.path.join(self.output_directory, os.path.relpath(file_path, self.input_directory))
+        if os.path.exists(output_file):
+            return
+        try:
+            os.makedirs(os.path.dirname(output_file), exist_ok=True)
+            with Storage.io_slot(file_path, output_file):
+                mode = Storage.clone_file(file_path, output_file, self.modes)
+        except OSError as e:
+            self.logger.warning(f"Could not pass through file: {file_path}. ERROR MESSAGE: {e}")
+            return
+        with self.lock:
+            self.counts[mode] = self.counts.get(mode, 0) + 1
+        self.logger.debug(f"Passed through file ({mode}): {file_path} to {output_file}")
+
+    def walk(self):
+        """Walk the input for runs where no stage walked it."""
+        for root, directories, files in os.walk(self.input_directory):
+            directories[:] = [d for d in directories if os.path.abspath(os.path.join(root, d)) not in self.excluded_directories]
+            for file in files:
+                self.other(os.path.join(root, file))
+
+    def summary(self):
+        with self.lock:
+            return dict(self.counts)
@@ -0,0 +1,201 @@
+import contextlib
+import glob
+import os
+import shutil
+import tempfile
+import threading
+from utils.logging.config import LOG_FILENAME
+from utils.manifest.config import MANIFEST_FILENAME
+from utils.metrics.config import METRICS_FILENAME
+from utils.metrics.run_metrics import RunMetrics
+from utils.storage.config import (
+    DEFAULT_IO_CONCURRENCY,
+    DEFAULT_SCRATCH_DIRECTORY,
+    FICLONE,
+    PASSTHROUGH_LINK_MODES,
+    ROTATIONAL_IO_CONCURRENCY,
+    VOLUME_IO_CONCURRENCY,
+)
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+class Storage:
+    """Output placement: scratch staging of in-progress files and per-volume I/O concurrency limits."""
+    SCRATCH_DIRECTORY = DEFAULT_SCRATCH_DIRECTORY
+    VOLUME_IO_CONCURRENCY = dict(VOLUME_IO_CONCURRENCY)
+    LOCK = threading.Lock()
+    VOLUME_SLOTS = {}
+
+    @classmethod
+    def get_volume(cls, path):
+        """Return the device id of the volume holding path, walking up to the nearest existing ancestor."""
+        path = os.path.abspath(path)
+        while not os.path.exists(path):
+            parent = os.path.dirname(path)
+            if parent == path:
+                break
+            path = parent
+        return os.stat(path).st_dev
+
+    @classmethod
+    def find_run_directories(cls, input_directory):
+        """
+        Output directories of prior runs directly under the input directory.
+
+        They are recognized by their output_ name and the log, manifest or metrics file every run
+        writes, so the outputs of runs that stopped early are found as well.
+        """
+        directories = set()
+        for filename in (LOG_FILENAME, MANIFEST_FILENAME, METRICS_FILENAME):
+            for path in glob.glob(os.path.join(glob.escape(input_directory), "output_*", filename)):
+                directories.add(os.path.abspath(os.path.dirname(path)))
+        return directories
+
+    @classmethod
+    def is_rotational(cls, device):
+        """Return True for spinning disks, False for solid-state, None when unknown (non-Linux, network, overlay)."""
+        if os.name != "posix" or not hasattr(os, "major"):
+            return None
+        try:
+            block_device = f"/sys/dev/block/{os.major(device)}:{os.minor(device)}"
+        except (OverflowError, TypeError, ValueError):
+            return None
+        # Partitions keep their queue settings on the parent disk
+        for queue_directory in [block_device, os.path.join(block_device, "..")]:
+            try:
+                with open(os.path.join(queue_directory, "queue", "rotational")) as rotational:
+                    return rotational.read().strip() == "1"
+            except (OSError, ValueError):
+                continue
+        return None
+
+    @classmethod
+    def get_io_concurrency(cls, device):
+        for path, limit in cls.VOLUME_IO_CONCURRENCY.items():
+            if cls.get_volume(path) == device:
+                return limit
+        if cls.is_rotational(device):
+            return ROTATIONAL_IO_CONCURRENCY
+        return DEFAULT_IO_CONCURRENCY
+
+    @classmethod
+    def get_volume_slot(cls, device):
+        """Return the semaphore limiting jobs on a volume, or None when it is unlimited."""
+        with cls.LOCK:
+            if device not in cls.VOLUME_SLOTS:
+                limit = cls.get_io_concurrency(device)
+                cls.VOLUME_SLOTS[device] = threading.BoundedSemaphore(limit) if limit else None
+            return cls.VOLUME_SLOTS[device]
+
+    @classmethod
+    @contextlib.contextmanager
+    def io_slot(cls, *paths):
+        """
+        Hold a job slot on every volume the paths live on.
+
+        Only read- and write-heavy steps (reading an input, moving or copying an output) take a
+        slot, never a whole encode, so CPU-bound work keeps its own concurrency. Volumes are
+        acquired in device order so jobs spanning the same pair of volumes cannot deadlock.
+        """
+        devices = sorted({cls.get_volume(path) for path in paths})
+        slots = [slot for slot in (cls.get_volume_slot(device) for device in devices) if slot is not None]
+        with contextlib.ExitStack() as stack:
+            for slot in slots:
+                stack.enter_context(slot)
+            yield
+
+    @classmethod
+    def read_file(cls, path):
+        """Read a whole file under its volume's slot, so decoding it afterwards does not hold the slot."""
+        with cls.io_slot(path), open(path, "rb") as file:
+            return file.read()
+
+    @classmethod
+    @contextlib.contextmanager
+    def staged_output(cls, output_file, input_file=None, media_type=None):
+        """
+        Yield the path an encoder should write to for output_file.
+
+        With a scratch directory configured the file is written there under its own name, so
+        encoders still see the right extension, and moved into place under the volumes' I/O slot
+        once the block completes. A failed job leaves nothing behind in the scratch directory.
+        """
+        if not cls.SCRATCH_DIRECTORY:
+            yield output_file
+            return
+
+        os.makedirs(cls.SCRATCH_DIRECTORY, exist_ok=True)
+        staging_directory = tempfile.mkdtemp(prefix="job_", dir=cls.SCRATCH_DIRECTORY)
+        try:
+            staging_file = os.path.join(staging_directory, os.path.basename(output_file))
+            yield staging_file
+            if os.path.exists(staging_file):
+                os.makedirs(os.path.dirname(output_file), exist_ok=True)
+                # Same-volume moves are a rename; across volumes the file is streamed and then removed
+                with cls.io_slot(staging_file, output_file), RunMetrics.stage("write", input_file, media_type):
+                    shutil.move(staging_file, output_file)
+        finally:
+            shutil.rmtree(staging_directory, ignore_errors=True)
+
+    @classmethod
+    def reflink(cls, source, destination):
+        """Clone source into destination sharing its blocks copy-on-write; raises OSError where unsupported."""
+        if fcntl is None:
+            raise OSError("reflinks are not supported on this platform")
+        with open(source, "rb") as source_file, open(destination, "wb") as destination_file:
+            try:
+                fcntl.ioctl(destination_file.fileno(), FICLONE, source_file.fileno())
+            except OSError:
+                destination_file.close()
+                os.remove(destination)
+                raise
+
+    @classmethod
+    def copy_in_kernel(cls, source, destination):
+        """Copy without userspace buffers: copy_file_range where available, else shutil (sendfile/fcopyfile)."""
+        if not hasattr(os, "copy_file_range"):
+            shutil.copyfile(source, destination)
+            return
+        with open(source, "rb") as source_file, open(destination, "wb") as destination_file:
+            remaining = os.fstat(source_file.fileno()).st_size
+            try:
+                while remaining > 0:
+                    copied = os.copy_file_range(source_file.fileno(), destination_file.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            except OSError:
+                # Some filesystems (and kernels before 5.3 across filesystems) reject copy_file_range
+                source_file.seek(0)
+                destination_file.seek(0)
+                destination_file.truncate()
+                shutil.copyfileobj(source_file, destination_file)
+
+    @classmethod
+    def clone_file(cls, source, destination, modes=None):
+        """
+        Place a copy of source at destination, trying modes (PASSTHROUGH_LINK_MODES) in order.
+
+        Returns the mode used. Copies keep the source's timestamps and permissions.
+        """
+        modes = PASSTHROUGH_LINK_MODES if modes is None else modes
+        for mode in modes:
+            try:
+                if mode == "reflink":
+                    cls.reflink(source, destination)
+                    shutil.copystat(source, destination)
+                elif mode == "hardlink":
+                    os.link(source, destination)
+                elif mode == "copy":
+                    cls.copy_in_kernel(source, destination)
+                    shutil.copystat(source, destination)
+                else:
+                    raise ValueError(f"Unknown link mode: {mode}")
+                return mode
+            except OSError:
+                continue
+        raise OSError(f"Could not place {source} at {destination} with any of: {', '.join(modes)}")
@@ -21,4 +21,66 @@ INCOMPATIBLE_FILETYPES = [
     ".h264",
 ]
 
-VIDEO_CODECS = ["h264_qsv", "libx264"]
\ No newline at end of file
+VIDEO_CODECS = ["h264_qsv", "libx264"]
+# Rate control: "abr" (single-pass average bitrate), "crf" (constant quality),
+# "capped_crf" (constant quality limited by -maxrate/-bufsize) and "two_pass" (two-pass ABR).
+RATE_CONTROL_MODES = ["abr", "crf", "capped_crf", "two_pass"]
+DEFAULT_RATE_CONTROL = "abr"
+
+# Encoder speed/size trade-off, None leaves the encoder default (medium).
+ENCODER_PRESETS = ["ultrafast", "superfast", "veryfast", "faster", "fast", "medium", "slow", "slower", "veryslow"]
+DEFAULT_PRESET = None
+
+# CRF defaults by source height, larger frames hide quantization better and tolerate a higher CRF.
+CRF_BY_HEIGHT = [(2160, 26), (1440, 25), (1080, 24), (720, 23), (0, 22)]
+
+# Capped CRF buffer size, as a multiple of the -maxrate cap
+CAPPED_CRF_BUFSIZE_FACTOR = 2
+
+# Output framerate cap, None preserves the source framerate
+DEFAULT_MAX_FRAMERATE = None
+
+# Output height cap (aspect ratio preserved), None keeps the source resolution
+DEFAULT_MAX_HEIGHT = None
+
+# Audio handling: "auto" copies audio whose codec the output container accepts and
+# re-encodes anything else, "copy" always stream-copies, "aac" always re-encodes, "drop" removes audio.
+AUDIO_POLICIES = ["auto", "copy", "aac", "drop"]
+DEFAULT_AUDIO_POLICY = "auto"
+AUDIO_BITRATE = "128k"
+
+# Audio codecs (ffprobe codec_name) each output container can hold without re-encoding
+CONTAINER_AUDIO_CODECS = {
+    ".mp4": ["aac", "mp3", "ac3", "eac3", "alac", "opus"],
+    ".m4v": ["aac", "mp3", "ac3", "eac3", "alac"],
+    ".mov": ["aac", "mp3", "ac3", "eac3", "alac", "pcm_s16le", "pcm_s24le"],
+    ".mkv": ["aac", "mp3", "ac3", "eac3", "dts", "flac", "opus", "vorbis", "pcm_s16le", "pcm_s24le", "truehd"],
+    ".webm": ["opus", "vorbis"],
+    ".ogv": ["opus", "vorbis", "flac"],
+    ".avi": ["mp3", "ac3", "mp2", "pcm_s16le"],
+    ".flv": ["aac", "mp3"],
+    ".ts": ["aac", "mp3", "mp2", "ac3", "eac3"],
+    ".mts": ["aac", "mp3", "mp2", "ac3", "eac3"],
+    ".mpeg": ["mp2", "mp3", "ac3"],
+    ".vob": ["mp2", "ac3"],
+    ".3gp": ["aac", "amr_nb", "amr_wb"],
+    ".wmv": ["wmav1", "wmav2", "mp3"],
+    ".asf": ["wmav1", "wmav2", "mp3"],
+}
+
+# Audio encoder used when re-encoding, for containers that cannot hold AAC
+DEFAULT_AUDIO_ENCODER = "aac"
+CONTAINER_AUDIO_ENCODERS = {".webm": "libopus", ".ogv": "libvorbis"}
+
+# Streaming pipeline: ffprobe workers running ahead of the encoder, and concurrent encodes
+# (ffmpeg already spreads a single encode across cores, so one encoder is the default)
+PROBE_WORKERS = 2
+ENCODE_WORKERS = 1
+
+# Metadata reader: "ffprobe" spawns a process per file, "pyav" reads in-process through the
+# optional av package (no process startup, much faster on folders of many short clips),
+# "auto" uses PyAV when it is installed
+PROBE_BACKENDS = ["auto", "ffprobe", "pyav"]
+DEFAULT_PROBE_BACKEND = "auto"
+# Candidates of one folder probed together during discovery (concurrently with ffprobe)
+PROBE_BATCH_SIZE = 64
@@ -1,41 +1,241 @@
+import contextlib
 import json
 import subprocess
-import sys
+import tempfile
+import threading
 import ffmpeg
 import os
+
+try:
+    import av
+except ImportError:  # optional, probes fall back to ffprobe processes
+    av = None
 from utils.video.config import INCOMPATIBLE_FILETYPES, VIDEO_FILETYPES
 from utils.video.config import VIDEO_CODECS
+from utils.video.config import (
+    AUDIO_BITRATE,
+    AUDIO_POLICIES,
+    CAPPED_CRF_BUFSIZE_FACTOR,
+    CONTAINER_AUDIO_CODECS,
+    CONTAINER_AUDIO_ENCODERS,
+    CRF_BY_HEIGHT,
+    DEFAULT_AUDIO_ENCODER,
+    DEFAULT_AUDIO_POLICY,
+    DEFAULT_MAX_FRAMERATE,
+    DEFAULT_MAX_HEIGHT,
+    DEFAULT_PRESET,
+    DEFAULT_RATE_CONTROL,
+    ENCODE_WORKERS,
+    DEFAULT_PROBE_BACKEND,
+    PROBE_BACKENDS,
+    PROBE_BATCH_SIZE,
+    PROBE_WORKERS,
+    RATE_CONTROL_MODES,
+)
+from utils.concurrency.config import DEFAULT_ADAPTIVE_CONCURRENCY
+from utils.concurrency.controller import AdaptiveConcurrency
+from utils.concurrency.resources import CpuBudget
 from utils.logging.logging import setup_logging
+from utils.manifest.manifest import Manifest
+from utils.metrics.prometheus import PrometheusMetrics
+from utils.metrics.run_metrics import RunMetrics
+from utils.pipeline.config import DEFAULT_QUEUE_SIZE as PIPELINE_QUEUE_SIZE
+from utils.pipeline.pipeline import Pipeline
+from utils.process.runner import ProcessRunner
+from utils.progress.progress import ProgressTracker
+from utils.storage.storage import Storage
 import logging
 
 
 class VideoCompressor:
-    FRAMERATE = 29.97
     LOGGER = None
     COMPRESSED_MESSAGE = "compressed"
+    RATE_CONTROL = DEFAULT_RATE_CONTROL
+    PRESET = DEFAULT_PRESET
+    MAX_FRAMERATE = DEFAULT_MAX_FRAMERATE
+    MAX_HEIGHT = DEFAULT_MAX_HEIGHT
+    AUDIO_POLICY = DEFAULT_AUDIO_POLICY
+    ADAPTIVE_CONCURRENCY = DEFAULT_ADAPTIVE_CONCURRENCY
+    PROBE_BACKEND = DEFAULT_PROBE_BACKEND
+    PROBE_CACHE = {}
+    PROBE_CACHE_LOCK = threading.Lock()
 
     @classmethod
     def run_subprocess_with_flags(cls, cmd, **kwargs):
-        if sys.platform == "win32": #pragma: no cover
-            kwargs["encoding"] = "utf-8"
-            kwargs["creationflags"] = subprocess.CREATE_NO_WINDOW
-        return subprocess.run(cmd, **kwargs)
+        return ProcessRunner.run(cmd, **kwargs)
 
     @classmethod
-    def is_video_processed(cls, file_path):
+    def run_subprocess_with_progress(cls, cmd, job_id, resources=None):
+        """
+        Run an ffmpeg command that writes -progress blocks to stdout, forwarding each block to the job tracker.
+
+        Mirrors subprocess.run(..., capture_output=True, check=True).
+        """
+        block = {}
+
+        def on_stdout_line(line):
+            key, _, value = line.decode("utf-8", errors="replace").strip().partition("=")
+            block[key] = value
+            if key == "progress":
+                ProgressTracker.update_from_ffmpeg(job_id, dict(block))
+                block.clear()
+
+        return ProcessRunner.run(cmd, capture_output=True, check=True, on_stdout_line=on_stdout_line, resources=resources)
+
+    @classmethod
+    def run_encode(cls, cmd, job_id=None, resources=None):
+        """Run an encode, streaming per-job progress when the job is tracked and applying its process resources."""
+        if job_id is None:
+            return cls.run_subprocess_with_flags(cmd, capture_output=True, check=True, resources=resources)
+        return cls.run_subprocess_with_progress(cmd[:-1] + ["-progress", "pipe:1", "-nostats", cmd[-1]], job_id, resources)
+
+    @classmethod
+    def get_probe_cache_key(cls, file_path):
         try:
-            cmd = [
-                "ffprobe",
-                "-v",
-                "error",
-                "-show_format",
-                "-show_streams",
-                "-print_format",
-                "json",
-                file_path,
-            ]
-            result = cls.run_subprocess_with_flags(cmd, capture_output=True, text=True)
+            stat = os.stat(file_path)
+            return file_path, stat.st_size, stat.st_mtime_ns
+        except OSError:
+            return None
+
+    @classmethod
+    def get_probe_command(cls, file_path):
+        return [
+            "ffprobe",
+            "-v",
+            "error",
+            "-show_format",
+            "-show_streams",
+            "-print_format",
+            "json",
+            file_path,
+        ]
+
+    @classmethod
+    def use_av_probe(cls):
+        """Whether probes read metadata in-process through PyAV instead of spawning ffprobe."""
+        if cls.PROBE_BACKEND not in PROBE_BACKENDS:
+            raise ValueError(f"Unknown probe backend: {cls.PROBE_BACKEND}")
+        if cls.PROBE_BACKEND == "pyav" and av is None:
+            raise RuntimeError("The pyav probe backend requires the av package")
+        return cls.PROBE_BACKEND == "pyav" or (cls.PROBE_BACKEND == "auto" and av is not None)
+
+    @classmethod
+    def probe_video_av(cls, file_path):
+        """
+        Read the ffprobe metadata record (the fields this module uses) in-process through PyAV.
+
+        Streams PyAV has no decoder for (e.g. tmcd timecode tracks) have no codec context and are left out.
+        """
+        with av.open(file_path) as container:
+            streams = []
+            for stream in container.streams:
+                if stream.codec_context is None:
+                    continue
+                record = {"index": stream.index, "codec_type": stream.type, "codec_name": stream.codec_context.name}
+                if stream.bit_rate:
+                    record["bit_rate"] = str(stream.bit_rate)
+                if stream.type == "video":
+                    record["width"] = stream.codec_context.width
+                    record["height"] = stream.codec_context.height
+                    for key, rate in (("avg_frame_rate", stream.average_rate), ("r_frame_rate", stream.base_rate)):
+                        if rate:
+                            record[key] = f"{rate.numerator}/{rate.denominator}"
+                streams.append(record)
+            format_record = {"filename": file_path, "format_name": container.format.name, "tags": dict(container.metadata)}
+            if container.duration is not None:
+                format_record["duration"] = str(container.duration / av.time_base)
+            if container.bit_rate:
+                format_record["bit_rate"] = str(container.bit_rate)
+        return {"format": format_record, "streams": streams}
+
+    @classmethod
+    def probe_video(cls, file_path):
+        """
+        Run ffprobe on a file and return its format and stream metadata.
+
+        Results are cached per (path, size, mtime) so discovery, bitrate and encode
+        settings share a single probe, and a modified file is probed again. Files PyAV
+        cannot read are probed with ffprobe instead.
+        """
+        cache_key = cls.get_probe_cache_key(file_path)
+        if cache_key is not None:
+            with cls.PROBE_CACHE_LOCK:
+                if cache_key in cls.PROBE_CACHE:
+                    return cls.PROBE_CACHE[cache_key]
+
+        metadata = None
+        if cls.use_av_probe():
+            try:
+                metadata = cls.probe_video_av(file_path)
+            except Exception as e:
+                cls.LOGGER.debug(f"PyAV could not probe {file_path}, falling back to ffprobe: {e}")
+        if metadata is None:
+            result = cls.run_subprocess_with_flags(cls.get_probe_command(file_path), capture_output=True, text=True)
             metadata = json.loads(result.stdout)
+        if cache_key is not None:
+            with cls.PROBE_CACHE_LOCK:
+                cls.PROBE_CACHE[cache_key] = metadata
+        return metadata
+
+    @classmethod
+    def probe_videos(cls, file_paths):
+        """
+        Probe a batch of files into the probe cache and return {path: metadata} for those read.
+
+        With PyAV every file is read in-process, so there is no process startup per file; the
+        ffprobe processes for the rest (or for files PyAV cannot read) run concurrently on the
+        process runner. Files that cannot
+        be stat'ed or probed are left out, and probe_video reports their errors when asked.
+        """
+        pending = {}
+        results = {}
+        for file_path in file_paths:
+            cache_key = cls.get_probe_cache_key(file_path)
+            if cache_key is None:
+                continue
+            with cls.PROBE_CACHE_LOCK:
+                if cache_key in cls.PROBE_CACHE:
+                    results[file_path] = cls.PROBE_CACHE[cache_key]
+                    continue
+            pending[file_path] = cache_key
+        if not pending:
+            return results
+
+        probed = {}
+        unprobed = list(pending)
+        if cls.use_av_probe():
+            unprobed = []
+            for file_path in pending:
+                try:
+                    probed[file_path] = cls.probe_video_av(file_path)
+                except Exception:
+                    unprobed.append(file_path)
+        if unprobed:
+            commands = [cls.get_probe_command(file_path) for file_path in unprobed]
+            outputs = ProcessRunner.run_many(commands, capture_output=True, text=True, check=True)
+            for file_path, output in zip(unprobed, outputs):
+                try:
+                    probed[file_path] = json.loads(output.stdout)
+                except Exception:
+                    continue
+        with cls.PROBE_CACHE_LOCK:
+            for file_path, metadata in probed.items():
+                cls.PROBE_CACHE[pending[file_path]] = metadata
+        results.update(probed)
+        return results
+
+    @classmethod
+    def get_video_stream(cls, metadata):
+        """Return the first video stream of probe metadata, or an empty dict."""
+        for stream in metadata.get("streams", []):
+            if stream.get("codec_type") == "video":
+                return stream
+        return {}
+
+    @classmethod
+    def is_video_processed(cls, file_path):
+        try:
+            metadata = cls.probe_video(file_path)
             vid_tags = metadata.get("format", {}).get("tags", {})
             return vid_tags.get("comment") == cls.COMPRESSED_MESSAGE
         except Exception as e:
@@ -45,21 +245,154 @@ class VideoCompressor:
             return False
 
     @classmethod
-    def get_bitrate(cls, input_file):
+    def is_already_processed(cls, file_path, settings=None):
+        """Check the prior runs' manifests from a stat call, then fall back to probing for the compressed tag."""
+        return Manifest.is_recorded(file_path, settings) or cls.is_video_processed(file_path)
+
+    @classmethod
+    def get_encode_settings(
+        cls, video_codec, framerate=None, rate_control=None, preset=None, max_framerate=None, max_height=None,
+        audio_policy=None
+    ):
+        """The settings recorded in the manifest; a source is only skipped when they match the prior run."""
+        return {
+            "video_codec": video_codec,
+            "framerate": framerate,
+            "max_framerate": cls.MAX_FRAMERATE if max_framerate is None else max_framerate,
+            "max_height": cls.MAX_HEIGHT if max_height is None else max_height,
+            "rate_control": cls.RATE_CONTROL if rate_control is None else rate_control,
+            "preset": cls.PRESET if preset is None else preset,
+            "audio_policy": cls.AUDIO_POLICY if audio_policy is None else audio_policy,
+        }
+
+    @classmethod
+    def get_audio_streams(cls, metadata):
+        """Return all audio streams of probe metadata."""
+        return [stream for stream in metadata.get("streams", []) if stream.get("codec_type") == "audio"]
+
+    @classmethod
+    def get_video_bitrate(cls, metadata):
+        """
+        Return the bitrate of the video stream. Containers that do not report per-stream
+        bitrates fall back to the container bitrate minus the audio streams.
+        """
+        video_bitrate = cls.get_video_stream(metadata).get("bit_rate")
+        if video_bitrate:
+            return int(video_bitrate)
+        container_bitrate = int(metadata["format"]["bit_rate"])
+        audio_bitrate = sum(int(stream.get("bit_rate", 0)) for stream in cls.get_audio_streams(metadata))
+        if 0 < audio_bitrate < container_bitrate:
+            return container_bitrate - audio_bitrate
+        return container_bitrate
+
+    @classmethod
+    def get_audio_args(cls, input_file, output_file, audio_policy=None):
+        """Build the ffmpeg audio arguments for a policy, using the probed audio codecs."""
+        audio_policy = cls.AUDIO_POLICY if audio_policy is None else audio_policy
+        if audio_policy not in AUDIO_POLICIES:
+            raise ValueError(f"Unknown audio policy: {audio_policy}")
+        extension = os.path.splitext(output_file)[1].lower()
+        encoder = CONTAINER_AUDIO_ENCODERS.get(extension, DEFAULT_AUDIO_ENCODER)
+        reencode_args = ["-c:a", encoder, "-b:a", AUDIO_BITRATE]
+        if audio_policy == "drop":
+            return ["-an"]
+        if audio_policy == "aac":
+            return reencode_args
+        if audio_policy == "copy":
+            return ["-c:a", "copy"]
+
         try:
-            cmd = [
-                "ffprobe",
-                "-v",
-                "error",
-                "-show_format",
-                "-print_format",
-                "json",
-                input_file,
-            ]
-            result = cls.run_subprocess_with_flags(cmd, capture_output=True, text=True)
-            metadata = json.loads(result.stdout)
-            original_bitrate = int(metadata["format"]["bit_rate"])
-            new_bitrate = ((original_bitrate // 5 + 99999) // 100000) * 100
+            audio_streams = cls.get_audio_streams(cls.probe_video(input_file))
+        except Exception as e:
+            cls.LOGGER.warning(f"Could not read audio streams of video:{input_file}, using encoder defaults. ERROR MESSAGE: {e}")
+            return []
+        if not audio_streams:
+            return []
+        supported_codecs = CONTAINER_AUDIO_CODECS.get(extension, [])
+        if all(stream.get("codec_name") in supported_codecs for stream in audio_streams):
+            return ["-c:a", "copy"]
+        return reencode_args
+
+    @classmethod
+    def get_duration(cls, input_file):
+        """Return the container duration in seconds from the cached probe, or None if unknown."""
+        try:
+            return float(cls.probe_video(input_file)["format"]["duration"])
+        except Exception:
+            return None
+
+    @classmethod
+    def get_source_framerate(cls, metadata):
+        """Return the average framerate of the video stream, or None if unknown."""
+        stream = cls.get_video_stream(metadata)
+        for key in ("avg_frame_rate", "r_frame_rate"):
+            numerator, _, denominator = stream.get(key, "0/0").partition("/")
+            try:
+                framerate = float(numerator) / float(denominator or 1)
+            except (ValueError, ZeroDivisionError):
+                continue
+            if framerate > 0:
+                return framerate
+        return None
+
+    @classmethod
+    def get_output_height(cls, metadata, max_height=None):
+        """Return the encoded height, the source height capped at max_height."""
+        max_height = cls.MAX_HEIGHT if max_height is None else max_height
+        height = int(cls.get_video_stream(metadata).get("height", 0))
+        if max_height and height > max_height:
+            return max_height
+        return height
+
+    @classmethod
+    def get_output_framerate(cls, input_file, framerate=None, max_framerate=None):
+        """
+        Resolve the -r value for a file. An explicit framerate always wins, otherwise the
+        source framerate is preserved (None) unless it exceeds max_framerate.
+        """
+        if framerate:
+            return framerate
+        max_framerate = cls.MAX_FRAMERATE if max_framerate is None else max_framerate
+        if not max_framerate:
+            return None
+        try:
+            source_framerate = cls.get_source_framerate(cls.probe_video(input_file))
+        except Exception as e:
+            cls.LOGGER.warning(f"Could not read framerate of video:{input_file}, keeping source framerate. ERROR MESSAGE: {e}")
+            return None
+        if source_framerate and source_framerate > max_framerate:
+            return max_framerate
+        return None
+
+    @classmethod
+    def get_filter_args(cls, input_file, max_height=None):
+        """Build a downscale filter when the source is taller than max_height."""
+        if not (cls.MAX_HEIGHT if max_height is None else max_height):
+            return []
+        try:
+            metadata = cls.probe_video(input_file)
+        except Exception as e:
+            cls.LOGGER.warning(f"Could not read resolution of video:{input_file}, keeping source resolution. ERROR MESSAGE: {e}")
+            return []
+        height = int(cls.get_video_stream(metadata).get("height", 0))
+        output_height = cls.get_output_height(metadata, max_height)
+        if output_height < height:
+            # -2 keeps the aspect ratio with an even width, as required by yuv420p
+            return ["-vf", f"scale=-2:{output_height}"]
+        return []
+
+    @classmethod
+    def get_bitrate(cls, input_file, max_height=None):
+        try:
+            metadata = cls.probe_video(input_file)
+            original_bitrate = cls.get_video_bitrate(metadata)
+            target_bitrate = original_bitrate // 5
+            height = int(cls.get_video_stream(metadata).get("height", 0))
+            output_height = cls.get_output_height(metadata, max_height)
+            if output_height and output_height < height:
+                # Fewer pixels need proportionally fewer bits for the same quality
+                target_bitrate = int(target_bitrate * (output_height / height) ** 2)
+            new_bitrate = ((target_bitrate + 99999) // 100000) * 100
             return f"{new_bitrate}K"
         except Exception as e:
             cls.LOGGER.error(
@@ -67,6 +400,44 @@ class VideoCompressor:
             )
             raise e
 
+    @classmethod
+    def get_crf(cls, input_file, max_height=None):
+        """Pick a CRF value from the output height, falling back to the lowest tier."""
+        try:
+            height = cls.get_output_height(cls.probe_video(input_file), max_height)
+        except Exception as e:
+            cls.LOGGER.warning(f"Could not read resolution of video:{input_file}, using default CRF. ERROR MESSAGE: {e}")
+            height = 0
+        for min_height, crf in CRF_BY_HEIGHT:
+            if height >= min_height:
+                return crf
+        return CRF_BY_HEIGHT[-1][1]
+
+    @classmethod
+    def get_rate_control_args(cls, input_file, bitrate, rate_control, video_codec, max_height=None):
+        """Build the ffmpeg rate control arguments for a mode and codec."""
+        if rate_control not in RATE_CONTROL_MODES:
+            raise ValueError(f"Unknown rate control mode: {rate_control}")
+        if rate_control in ("abr", "two_pass"):
+            return ["-b:v", bitrate]
+
+        quality_flag = "-global_quality" if video_codec == "h264_qsv" else "-crf"
+        args = [quality_flag, str(cls.get_crf(input_file, max_height))]
+        if rate_control == "capped_crf":
+            maxrate = int(bitrate.rstrip("K"))
+            args += ["-maxrate", bitrate, "-bufsize", f"{maxrate * CAPPED_CRF_BUFSIZE_FACTOR}K"]
+        return args
+
+    @classmethod
+    def run_two_pass(cls, cmd, output_file, job_id=None, resources=None):
+        """Run an analysis pass to a null muxer, then the final pass using its stats."""
+        with tempfile.TemporaryDirectory() as passlog_directory:
+            passlog = os.path.join(passlog_directory, "ffmpeg2pass")
+            first_pass = cmd + ["-pass", "1", "-passlogfile", passlog, "-an", "-f", "null", "-loglevel", "error", "-"]
+            cls.run_encode(first_pass, resources=resources)
+            second_pass = cmd + ["-pass", "2", "-passlogfile", passlog, "-loglevel", "error", output_file]
+            cls.run_encode(second_pass, job_id, resources)
+
     @classmethod
     def is_codec_available(cls, codec):
         """Check if the specified codec is available on the system."""
@@ -86,39 +457,51 @@ class VideoCompressor:
         """Select the best available codec."""
         for codec in VIDEO_CODECS:
             if cls.is_codec_available(codec):
+                if codec != VIDEO_CODECS[0]:
+                    PrometheusMetrics.ENCODER_FALLBACKS.inc(from_codec=VIDEO_CODECS[0], to_codec=codec)
                 return codec
         raise RuntimeError("No supported video codec is available.")
 
     @classmethod
-    def compress_video_qsv(cls, input_file, output_file, bitrate, framerate=FRAMERATE):
+    def compress_video_qsv(
+        cls, input_file, output_file, bitrate, framerate=None, rate_control=None, preset=None, max_height=None,
+        audio_policy=None, job_id=None, resources=None
+    ):
         try:
+            rate_control = cls.RATE_CONTROL if rate_control is None else rate_control
+            if rate_control == "two_pass":
+                cls.LOGGER.warning(f"Two-pass encoding is not supported by h264_qsv, using ABR for: {input_file}")
+                rate_control = "abr"
             cmd = [
                 "ffmpeg",
                 "-i",
                 input_file,
-                "-b:v",
-                bitrate,
+                *cls.get_rate_control_args(input_file, bitrate, rate_control, "h264_qsv", max_height),
                 "-vcodec",
                 "h264_qsv",
-                "-r",
-                str(framerate),
+                *(["-r", str(framerate)] if framerate else []),
+                *cls.get_filter_args(input_file, max_height),
+                *cls.get_audio_args(input_file, output_file, audio_policy),
                 "-metadata",
                 "comment="+cls.COMPRESSED_MESSAGE,
                 "-preset",
-                "medium",
+                preset or cls.PRESET or "medium",
                 "-loglevel",
                 "error",
                 output_file,
             ]
-            cls.run_subprocess_with_flags(cmd, capture_output=True, check=True)
+            cls.run_encode(cmd, job_id, resources)
             cls.LOGGER.info(f"Compressed video: {input_file} to {output_file}")
-        except subprocess.CalledProcessError as e:
+            return True
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
             cls.LOGGER.error(
                 f"An error occurred while encoding: {input_file}. ERROR MESSAGE: {e.stderr}"
             )
+            return False
 
     @classmethod
     def convert_incompatible_video(cls, input_file, output_file):
+        """Convert input_file to H.264; return whether it succeeded. A failed conversion leaves no output behind."""
         try:
             cmd = [
                 "ffmpeg",
@@ -136,65 +519,108 @@ class VideoCompressor:
             ]
             cls.run_subprocess_with_flags(cmd, capture_output=True, check=True)
             cls.LOGGER.info(f"Converted video: {input_file} to {output_file}")
+            return True
         except subprocess.CalledProcessError as e:
             print(str(e.stderr))
             cls.LOGGER.error(
                 f"An error occurred while converting: {input_file}. ERROR MESSAGE: {e.stderr.decode()}"
             )
+            if os.path.exists(output_file):
+                os.remove(output_file)
+            return False
 
     @classmethod
-    def compress_video_cpu(cls, input_file, output_file, bitrate, framerate=FRAMERATE):
+    def compress_video_cpu(
+        cls, input_file, output_file, bitrate, framerate=None, rate_control=None, preset=None, max_height=None,
+        audio_policy=None, job_id=None, resources=None
+    ):
         try:
+            rate_control = cls.RATE_CONTROL if rate_control is None else rate_control
+            preset = cls.PRESET if preset is None else preset
             cmd = [
                 "ffmpeg",
                 "-i",
                 input_file,
-                "-b:v",
-                bitrate,
+                *cls.get_rate_control_args(input_file, bitrate, rate_control, "libx264", max_height),
                 "-vcodec",
                 "libx264",
-                "-r",
-                str(framerate),
+                *(["-threads", str(resources["threads"])] if resources and resources["threads"] else []),
+                *(["-r", str(framerate)] if framerate else []),
+                *cls.get_filter_args(input_file, max_height),
+                *cls.get_audio_args(input_file, output_file, audio_policy),
                 "-metadata",
                 "comment="+cls.COMPRESSED_MESSAGE,
-                "-loglevel",
-                "error",
-                output_file,
             ]
-            cls.run_subprocess_with_flags(cmd, capture_output=True, check=True)
+            if preset:
+                cmd += ["-preset", preset]
+            if rate_control == "two_pass":
+                cls.run_two_pass(cmd, output_file, job_id, resources)
+            else:
+                cmd += ["-loglevel", "error", output_file]
+                cls.run_encode(cmd, job_id, resources)
             cls.LOGGER.info(f"Compressed video: {input_file} to {output_file}")
-        except subprocess.CalledProcessError as e:
+            return True
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
             cls.LOGGER.error(
-                f"An error occurred while encoding: {input_file}. ERROR MESSAGE: {e.stderr.decode()}"
+                f"An error occurred while encoding: {input_file}. ERROR MESSAGE: {(e.stderr or b'').decode()}"
             )
+            return False
 
     @classmethod
     def compress_video(
-        cls, input_file, output_file, bitrate, video_codec, framerate=FRAMERATE
+        cls, input_file, output_file, bitrate, video_codec, framerate=None, rate_control=None, preset=None, max_height=None,
+        audio_policy=None, job_id=None, resources=None
     ):
+        """Encode input_file to output_file; return whether it succeeded. A failed encode leaves no output behind."""
         if not os.path.exists(os.path.dirname(output_file)):
             os.makedirs(os.path.dirname(output_file), exist_ok=True)
-        if video_codec == "h264_qsv":
-            cls.compress_video_qsv(input_file, output_file, bitrate, framerate)
-        else:
-            cls.compress_video_cpu(input_file, output_file, bitrate, framerate)
+        succeeded = False
+        try:
+            if video_codec == "h264_qsv":
+                succeeded = cls.compress_video_qsv(
+                    input_file, output_file, bitrate, framerate, rate_control, preset, max_height, audio_policy, job_id,
+                    resources
+                )
+                if succeeded:
+                    return True
+                # Hardware encoders can fail per file (unsupported input, driver limits), retry in software
+                cls.LOGGER.warning(f"Retrying with libx264 after h264_qsv failed for: {input_file}")
+                PrometheusMetrics.ENCODER_FALLBACKS.inc(from_codec="h264_qsv", to_codec="libx264")
+                if os.path.exists(output_file):
+                    os.remove(output_file)
+                ProgressTracker.update_job(job_id, percent=0)
+            succeeded = cls.compress_video_cpu(
+                input_file, output_file, bitrate, framerate, rate_control, preset, max_height, audio_policy, job_id, resources
+            )
+            return succeeded
+        finally:
+            # A partial file would be moved into place and recognized as processed by later runs
+            if not succeeded and os.path.exists(output_file):
+                os.remove(output_file)
 
     @classmethod
-    def get_video_files(cls, input_directory, filetypes=VIDEO_FILETYPES):
+    def get_video_files(cls, input_directory, filetypes=VIDEO_FILETYPES, passthrough=None):
         """Get a list of video files in the specified directory."""
-        video_files = []
+        return list(cls.iter_video_files(input_directory, filetypes, passthrough=passthrough))
+
+    @classmethod
+    def iter_video_files(
+        cls, input_directory, filetypes=VIDEO_FILETYPES, settings=None, passthrough=None, output_directory=None
+    ):
+        """Yield unprocessed video files as the walk finds them."""
         if(os.path.isdir(input_directory)):
-            video_files += (cls.get_video_files_from_directory(input_directory, filetypes))
+            yield from cls.iter_video_files_from_directory(
+                input_directory, filetypes, settings, passthrough, output_directory
+            )
         else:
-            video_files += cls.check_singular_file(input_directory, filetypes)
-        return video_files
+            yield from cls.check_singular_file(input_directory, filetypes, settings)
             
     @classmethod
-    def check_singular_file(cls, input_file, filetypes=VIDEO_FILETYPES):
+    def check_singular_file(cls, input_file, filetypes=VIDEO_FILETYPES, settings=None):
         root = os.path.dirname(input_file)
         video_files = []
         if any(input_file.lower().endswith(ext) for ext in filetypes):
-            if not cls.is_video_processed(os.path.join(root, input_file)):
+            if not cls.is_already_processed(os.path.join(root, input_file), settings):
                 video_files =  [os.path.join(root, input_file)]
             else:
                 cls.LOGGER.info(
@@ -203,18 +629,47 @@ class VideoCompressor:
         return video_files
     
     @classmethod
-    def get_video_files_from_directory(cls, input_directory, filetypes=VIDEO_FILETYPES):
-        video_files = []
-        for root, _, files in os.walk(input_directory):
+    def get_video_files_from_directory(cls, input_directory, filetypes=VIDEO_FILETYPES, passthrough=None):
+        return list(cls.iter_video_files_from_directory(input_directory, filetypes, passthrough=passthrough))
+
+    @classmethod
+    def iter_video_files_from_directory(
+        cls, input_directory, filetypes=VIDEO_FILETYPES, settings=None, passthrough=None, output_directory=None
+    ):
+        """
+        Yield unprocessed video files, probing each folder's candidates in batches of PROBE_BATCH_SIZE.
+
+        Files recorded in a prior run's manifest are recognized from their stat and never probed.
+        With a passthrough, skipped videos and (when this is the run's first walk) every other
+        file are handed to it as the walk finds them. The run's own output_directory is not
+        walked: encodes write to it while discovery is still running.
+        """
+        walk_others = passthrough is not None and passthrough.claim_walk()
+        excluded_directory = os.path.abspath(output_directory) if output_directory else None
+        for root, dirs, files in os.walk(input_directory):
+            if excluded_directory:
+                dirs[:] = [d for d in dirs if os.path.abspath(os.path.join(root, d)) != excluded_directory]
+            candidates = []
             for file in files:
                 if any(file.lower().endswith(ext) for ext in filetypes):
-                    if not cls.is_video_processed(os.path.join(root, file)):
-                        video_files.append(os.path.join(root, file))
+                    candidates.append(os.path.join(root, file))
+                elif walk_others:
+                    passthrough.other(os.path.join(root, file))
+            for start in range(0, len(candidates), PROBE_BATCH_SIZE):
+                batch = candidates[start:start + PROBE_BATCH_SIZE]
+                unrecorded = [file_path for file_path in batch if not Manifest.is_recorded(file_path, settings)]
+                if len(unrecorded) > 1:
+                    with RunMetrics.stage("probe"):
+                        cls.probe_videos(unrecorded)
+                for file_path in batch:
+                    if not cls.is_already_processed(file_path, settings):
+                        yield file_path
                     else:
                         cls.LOGGER.info(
-                            f"Skipping video:{os.path.join(root, file)} as it is already processed"
+                            f"Skipping video:{file_path} as it is already processed"
                         )
-        return video_files
+                        if passthrough is not None:
+                            passthrough.skipped(file_path)
 
     @classmethod
     def calculate_output_path(cls, input_file, input_directory, output_directory):
@@ -227,8 +682,17 @@ class VideoCompressor:
 
     @classmethod
     def compress_videos_in_directory(
-        cls, input_directory, output_directory, progress_callback=None, framerate=30
+        cls, input_directory, output_directory, progress_callback=None, framerate=None, rate_control=None, preset=None,
+        max_framerate=None, max_height=None, audio_policy=None, passthrough=None
     ):
+        """
+        Compress every unprocessed video under input_directory as a streaming pipeline.
+
+        Discovery yields files as the walk finds them, PROBE_WORKERS threads run ffprobe ahead
+        of the encoder, and encoding starts on the first probed file, with bounded queues
+        between the stages. Progress is reported against the files discovered so far.
+        With ADAPTIVE_CONCURRENCY the number of concurrent encodes follows live load.
+        """
         setup_logging(output_directory)
         cls.LOGGER = logging.getLogger(__name__)
 
@@ -236,50 +700,111 @@ class VideoCompressor:
 
         # Select the best available codec
         video_codec = cls.select_best_codec()
+        settings = cls.get_encode_settings(video_codec, framerate, rate_control, preset, max_framerate, max_height, audio_policy)
+
+        state = {"discovered": 0, "discovered_size": 0, "finished": 0, "processed_size": 0}
+        state_lock = threading.Lock()
+
+        def discover():
+            video_files = iter(cls.iter_video_files(
+                input_directory, settings=settings, passthrough=passthrough, output_directory=output_directory
+            ))
+            while True:
+                with RunMetrics.stage("scan"):
+                    input_file = next(video_files, None)
+                    if input_file is None:
+                        return
+                    size = os.path.getsize(input_file)
+                with state_lock:
+                    state["discovered"] += 1
+                    state["discovered_size"] += size
+                yield input_file
+
+        def probe(input_file):
+            try:
+                # Calculate output file path
+                output_file = cls.calculate_output_path(input_file, input_directory, output_directory)
 
-        # Gather video files
-        video_files = cls.get_video_files(input_directory)
+                # Calculate bitrate and output framerate, filling the probe cache for the encoder
+                with RunMetrics.stage("probe", input_file, "video"):
+                    bitrate = cls.get_bitrate(input_file, max_height)
+                    output_framerate = cls.get_output_framerate(input_file, framerate, max_framerate)
+                    media_duration = cls.get_duration(input_file)
+                    RunMetrics.record(input_file, media_duration=media_duration)
+                return input_file, output_file, bitrate, output_framerate, media_duration
+            except Exception as e: #pragma: no cover
+                cls.LOGGER.error(
+                    f"Uncaught error occurred while probing:{input_file}. ERROR MESSAGE: {str(e)}"
+                )
+                finish(input_file, None, False)
 
-        # Calculate total size of all files
-        total_size = sum(os.path.getsize(f) for f in video_files)
-        processed_size = 0
+        def encode(job):
+            input_file, output_file, bitrate, output_framerate, media_duration = job
+            with controller.slot(os.path.getsize(input_file)) if controller else contextlib.nullcontext(), \
+                    cpu_budget.allocate() as resources:
+                run_encode(input_file, output_file, bitrate, output_framerate, media_duration, resources)
 
-        # Process each video file
-        total_files = len(video_files)
-        for idx, input_file in enumerate(video_files, start=0):
+        def run_encode(input_file, output_file, bitrate, output_framerate, media_duration, resources):
+            succeeded = False
             try:
+                with state_lock:
+                    PrometheusMetrics.QUEUE_DEPTH.set(state["discovered"] - state["finished"], type="video")
+                    progress = state["processed_size"] / state["discovered_size"] if state["discovered_size"] > 0 else 0
+                    idx, total_files = state["finished"], state["discovered"]
+
                 # Update progress
                 if progress_callback:
-                    progress = processed_size / total_size if total_size > 0 else 0
                     progress_callback(progress, input_file, idx, total_files)
 
-                # Calculate output file path
-                output_file = cls.calculate_output_path(input_file, input_directory, output_directory)
                 os.makedirs(os.path.dirname(output_directory), exist_ok=True)
 
-                # Calculate bitrate
-                bitrate = cls.get_bitrate(input_file)
-
                 # Compress video
-                cls.compress_video(
-                    input_file, output_file, bitrate, video_codec, framerate
-                )
-
-                # Update processed size
-                processed_size += os.path.getsize(input_file)
+                job_id = ProgressTracker.start_job(input_file, "video", media_duration=media_duration)
+                try:
+                    with Storage.staged_output(output_file, input_file, "video") as staging_file, \
+                            RunMetrics.stage("encode", input_file, "video"):
+                        succeeded = cls.compress_video(
+                            input_file, staging_file, bitrate, video_codec, output_framerate, rate_control, preset,
+                            max_height, audio_policy, job_id=job_id, resources=resources
+                        )
+                finally:
+                    ProgressTracker.finish_job(job_id)
 
             except Exception as e: #pragma: no cover
                 cls.LOGGER.error(
                     f"Uncaught error occurred while compressing:{input_file}. ERROR MESSAGE: {str(e)}"
                 )
+            finish(input_file, output_file, succeeded)
+
+        def finish(input_file, output_file, succeeded):
+            """Account a finished job; only a successful encode is recorded in the manifest."""
+            RunMetrics.record_job("video", input_file, output_file, succeeded)
+            if succeeded:
+                Manifest.record(input_file, output_file, settings)
+            with state_lock:
+                state["finished"] += 1
+                state["processed_size"] += os.path.getsize(input_file)
+
+        # With adaptive concurrency every encode worker waits for a slot under the controller's live limit
+        controller = AdaptiveConcurrency(name="video encodes").start() if cls.ADAPTIVE_CONCURRENCY else None
+        encode_workers = controller.max_workers if controller else ENCODE_WORKERS
+        # Concurrent encodes share the CPUs instead of each starting a thread per core
+        cpu_budget = CpuBudget(lambda: controller.limit if controller else encode_workers)
+        try:
+            Pipeline.run(discover(), [(probe, PROBE_WORKERS), (encode, encode_workers)], PIPELINE_QUEUE_SIZE)
+        finally:
+            if controller:
+                controller.stop()
 
+        PrometheusMetrics.QUEUE_DEPTH.set(0, type="video")
+        total_files = state["discovered"]
         if progress_callback:
             progress_callback(1, "", total_files, total_files)
         cls.LOGGER.info(f"Finished compressing videos in directory:{input_directory}")
 
     @classmethod
     def convert_incompatible_videos_in_directory_and_compress(
-        cls, input_directory, output_directory, progress_callback=None, framerate=30
+        cls, input_directory, output_directory, progress_callback=None, framerate=30, passthrough=None
     ):
         setup_logging(output_directory)
         cls.LOGGER = logging.getLogger(__name__)
@@ -289,9 +814,10 @@ class VideoCompressor:
         )
 
         # Gather video files
-        video_files = cls.get_video_files(
-            input_directory, filetypes=INCOMPATIBLE_FILETYPES
-        )
+        with RunMetrics.stage("scan"):
+            video_files = cls.get_video_files(
+                input_directory, filetypes=INCOMPATIBLE_FILETYPES, passthrough=passthrough
+            )
 
         # Calculate total size of all files
         total_size = sum(os.path.getsize(f) for f in video_files)
@@ -300,7 +826,11 @@ class VideoCompressor:
         # Process each video file
         total_files = len(video_files)
         for idx, input_file in enumerate(video_files, start=0):
+            output_file = None
+            succeeded = False
             try:
+                PrometheusMetrics.QUEUE_DEPTH.set(total_files - idx, type="video")
+
                 # Update progress
                 if progress_callback:
                     progress = processed_size / total_size if total_size > 0 else 0
@@ -312,7 +842,13 @@ class VideoCompressor:
                 output_file = os.path.splitext(output_file)[0] + ".mp4"
                 os.makedirs(os.path.dirname(output_file), exist_ok=True)
 
-                cls.convert_incompatible_video(input_file, output_file)
+                job_id = ProgressTracker.start_job(input_file, "video")
+                try:
+                    with Storage.staged_output(output_file, input_file, "video") as staging_file, \
+                            RunMetrics.stage("encode", input_file, "video"):
+                        succeeded = cls.convert_incompatible_video(input_file, staging_file)
+                finally:
+                    ProgressTracker.finish_job(job_id)
                 
                 # Update processed size
                 processed_size += os.path.getsize(input_file)
@@ -321,7 +857,9 @@ class VideoCompressor:
                 cls.LOGGER.error(
                     f"Uncaught error occurred while compressing incompatible file:{input_file}. ERROR MESSAGE: {str(e)}"
                 )
+            RunMetrics.record_job("video", input_file, output_file, succeeded)
 
+        PrometheusMetrics.QUEUE_DEPTH.set(0, type="video")
         if progress_callback:
             progress_callback(1, "", total_files, total_files)
         cls.LOGGER.info(f"Finished compressing videos in directory:{input_directory}")